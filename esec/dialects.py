@@ -196,6 +196,34 @@ END generation
 
 #-----------------------------------------------------------------------
 
+ASSGA_DEF = r'''
+FROM suitable_individuals SELECT (size) population
+YIELD population
+
+BEGIN generation
+    REPEAT (size)
+        FROM population SELECT 2 parents USING binary_tournament
+        FROM parents    SELECT 1 offspring \
+             USING crossover_one(per_pair_rate=0.9), \
+                   mutate_random(per_gene_rate=0.01)
+
+        insert_async(offspring=offspring, into=population, replace=uniform_shuffle)
+    END repeat
+
+    YIELD population
+END generation
+'''
+'''Asynchronous Steady State Genetic Algorithm.
+
+- As for SSGA, but each offspring is evaluated by a worker process
+  while the next offspring is bred (see `esec.steadystate`)
+- The first child of each crossover is used, since choosing the better
+  child would require waiting for both evaluations
+- Offspring are inserted when their evaluation completes
+'''
+
+#-----------------------------------------------------------------------
+
 NKC_GA_DEF = r'''
 FROM random_binary(length=config.landscape.size) SELECT (size) population
 JOIN population, population INTO pairs USING random_tuples
@@ -237,6 +265,7 @@ configs = {
     'ES': _make_config(ES_DEF, es_success_rate=_es_success_rate, es_adapt=_es_adapt),
     'EP': _make_config(EP_DEF),
     'SSGA': _make_config(SSGA_DEF),
+    'ASSGA': _make_config(ASSGA_DEF, evaluator_pool={ 'workers': 0 }),
     'NKC_GA': _make_config(NKC_GA_DEF, assign=_nkc_assign),
 }
 
@@ -2,7 +2,10 @@
 
 '''
 import itertools
+import math
+import operator
 import sys
+import timeit
 from warnings import warn
 
 ILLEGAL_VARIABLE_NAMES = frozenset((
@@ -13,19 +16,47 @@ ILLEGAL_VARIABLE_NAMES = frozenset((
 ))
 
 class Profiler(object):
-    '''Tracks statement execution time.'''
-    def __init__(self):
+    '''Records the time taken, the number of executions and the number
+    of individuals produced by each statement and block of a system.
+
+    Code emitted with profiling enabled passes a description of every
+    profiled statement to `define`, reads `timer` before each statement
+    and appends to `data` after it. Executions are recorded until
+    `flush` is called, which `esec.system.System` does after each step,
+    so that profiling a statement costs little more than reading the
+    time twice.
+    '''
+    def __init__(self, timer=None):
+        self.timer = timer or timeit.default_timer
+        '''The function returning the current time in seconds.'''
+        self.statements = ()
+        '''The ``(block_name, line, text)`` description of each
+        profiled statement. `line` is the one-based line number in the
+        definition, or ``None`` for a block.'''
         self.data = []
+        '''The ``(index, seconds, individuals)`` tuple for each
+        execution since the last call to `flush`. Emitted code keeps a
+        reference to this list, so it is never replaced.'''
 
-    def _current_time(self):
-        return 0
-
-    def start(self, statement):
-        self.data.append(None)
-        self.data[-1] = (statement, 0, self._current_time())
+    def define(self, statements):
+        '''Sets the descriptions of the profiled statements and
+        discards any recorded executions.
+        '''
+        self.statements = tuple(statements)
+        del self.data[:]
 
-    def end(self, statement):
-        self.data.append((statement, 1, self._current_time()))
+    def flush(self):
+        '''Returns a dictionary mapping the description of each
+        statement executed since the last call to ``(calls, seconds,
+        individuals)`` and discards the recorded executions.
+        '''
+        data = list(self.data)
+        del self.data[:]
+        totals = { }
+        for index, seconds, individuals in data:
+            calls, total_seconds, total_individuals = totals.get(index, (0, 0.0, 0))
+            totals[index] = (calls + 1, total_seconds + seconds, total_individuals + individuals)
+        return dict((self.statements[index], value) for index, value in totals.iteritems())
 
 def _alias(dest, source):
     '''Makes `dest` an alias for `source`. Both are strings.'''
@@ -41,11 +72,17 @@ def _part(_source, count=None):
     '''Returns `count` individuals from the beginning of `_source`.
     
     If `count` is ``None``, returns all the individuals in `_source`.
+    If `_source` has a ``limit_hint`` method, it is called with `count`
+    before any individuals are taken, which allows selectors to avoid
+    ordering individuals that will never be returned.
     '''
     if count is None:
         return _source
-    else:
-        return itertools.islice(_source, int(count))
+    count = int(count)
+    limit_hint = getattr(_source, 'limit_hint', None)
+    if limit_hint is not None:
+        _source = limit_hint(count)
+    return itertools.islice(_source, count)
 
 def _group(_source):
     '''Creates a group from the individuals in `_source`.
@@ -85,6 +122,17 @@ def _evaluator(*_sources):
     assert len(_sources) == 1, "Only simple evaluators are currently supported"
     return eval_or_call(_sources[0])
 
+def _evaluate(_source, evaluator=None):
+    '''Assigns `evaluator` to every individual in `_source` and discards
+    any existing fitness values.
+
+    esec replaces this with an implementation that also arranges for the
+    individuals to be evaluated together.
+    '''
+    for indiv in _source:
+        indiv._eval = evaluator     #pylint: disable=W0212
+        del indiv.fitness
+
 def _yield(source_name, source_group):  #pylint: disable=W0613
     '''A placeholder for the ``_yield`` method, which will be specified
     by esec.
@@ -99,8 +147,20 @@ DEFAULT_CONTEXT = {
     '_range': _range,
     '_part': _part,
     '_evaluator': _evaluator,
+    '_evaluate': _evaluate,
     '_yield': _yield,
+    '_iter': iter,
+    '_chain': itertools.chain,
+    '_islice': itertools.islice,
+}
+
+# Operators that are evaluated in advance when their operands are
+# constant.
+_FOLD_BINARY = {
+    '+': operator.add, '-': operator.sub, '*': operator.mul,
+    '/': operator.div, '%': operator.mod, '^': operator.pow,
 }
+_FOLD_UNARY = { '+': operator.pos, '-': operator.neg }
 
 class _emitter(object): #pylint: disable=R0903
     '''Converts a semantic model to Python code for use with ``esec``.
@@ -116,6 +176,22 @@ class _emitter(object): #pylint: disable=R0903
         self.optimise = optimise_level
         self.profile = profile
 
+        # The variables stored in locals within the current block, those
+        # locals that currently hold the value of their variable and the
+        # names of locals holding hoisted expressions, keyed by the id of
+        # the expression.
+        self._locals = frozenset()
+        self._live = set()
+        self._hoisted = {}
+        self._temp_count = 0
+        self._groups = self._find_groups() if self.optimise > 0 else frozenset()
+
+        # The descriptions of profiled statements and their indices,
+        # keyed by the id of the statement.
+        self._profiled = []
+        self._profile_index = {}
+        self._block_name = None
+
         self._wl("_global = globals()")
 
         for block_name in model.block_names:
@@ -123,6 +199,11 @@ class _emitter(object): #pylint: disable=R0903
         
         self._wl("_block_" + model.INIT_BLOCK_NAME + "()")
 
+        if self.profile:
+            self.code[1:1] = ["_profiler.define(["] + [
+                self.INDENT + repr(desc) + "," for desc in self._profiled
+            ] + ["])"]
+
     def _w(self, obj):  #pylint: disable=C0103
         '''Appends the provided code to the current line.'''
         if self._current_line is None:
@@ -146,20 +227,254 @@ class _emitter(object): #pylint: disable=R0903
             self._current_line = self.INDENT * self._indent
         self._flush()
 
+    def _capture(self, func, *args):
+        '''Returns the code written by ``func(*args)`` instead of adding
+        it to the current line.
+        '''
+        saved, self._current_line = self._current_line, ''
+        func(*args)
+        code, self._current_line = self._current_line, saved
+        return code
+
+    def _profile_id(self, block_name, line, text):
+        '''Returns the index passed to the profiler for a statement
+        with the provided description.
+        '''
+        self._profiled.append((block_name, line, text))
+        return len(self._profiled) - 1
+
+    def _profile_statement(self, stmt):
+        '''Returns the index passed to the profiler for `stmt`, which
+        is the same each time `stmt` is emitted.
+        '''
+        index = self._profile_index.get(id(stmt))
+        if index is None:
+            span = getattr(stmt, 'span', None)
+            line = min(span).line + 1 if span else None
+            index = self._profile_index[id(stmt)] = self._profile_id(self._block_name, line, str(stmt))
+        return index
+
+    def _temp_name(self, prefix):
+        '''Returns a unique name for a local variable.'''
+        self._temp_count += 1
+        return '%s%d' % (prefix, self._temp_count)
+
+    @classmethod
+    def _walk(cls, statements):
+        '''Returns every statement in `statements`, including those
+        within REPEAT blocks.
+        '''
+        for stmt in statements:
+            yield stmt
+            if stmt.tag == 'repeatblock':
+                for inner in cls._walk(stmt.statements):
+                    yield inner
+
+    @staticmethod
+    def _targets(stmt):
+        '''Returns the variables assigned to by `stmt`, excluding those
+        within REPEAT blocks.
+        '''
+        if stmt.tag == 'store':
+            return [group.id for group in stmt.destinations if group.id.tag == 'variable']
+        elif stmt.tag == 'function' and stmt.name in ('_assign', '_alias'):
+            dest = stmt.parameter_dict['_destination']
+            if dest.tag == 'groupref': dest = dest.id
+            if dest.tag == 'variable': return [dest]
+        return []
+
+    @staticmethod
+    def _is_barrier(stmt):
+        '''Returns ``True`` if `stmt` may change the values of variables
+        without assigning to them. Function calls, aliases, pragmas and
+        YIELD statements (which call the monitor) are all assumed to do
+        so.
+        '''
+        if stmt.tag in ('yieldstmt', 'pragma'):
+            return True
+        elif stmt.tag == 'function':
+            return stmt.name != '_assign' or stmt.parameter_dict['_destination'].tag != 'variable'
+        return False
+
+    def _find_groups(self):
+        '''Returns the names of variables that are only assigned by Store
+        statements. These always contain groups, which may be iterated
+        without using ``_merge``.
+        '''
+        stored, assigned = set(), set()
+        for statements in self.model.blocks.itervalues():
+            for stmt in self._walk(statements):
+                names = (var.name for var in self._targets(stmt))
+                (stored if stmt.tag == 'store' else assigned).update(names)
+        return frozenset(stored - assigned - set(self.model.externals))
+
+    def _is_group(self, expr):
+        '''Returns ``True`` if `expr` refers to a variable in
+        `_find_groups`.
+        '''
+        return expr.tag == 'groupref' and expr.id.tag == 'variable' and expr.id.name in self._groups
+
+    def _param_value(self, param):
+        '''Returns the expression passed for `param`, or ``None`` if the
+        parameter has no value and does not name a variable.
+        '''
+        if param.value is not None:
+            return param.value
+        name_lower = param.name.lower()
+        return self.model.variables.get(name_lower) or self.model.externals.get(name_lower)
+
+    def _operands(self, expr):
+        '''Returns the expressions that are evaluated as part of `expr`.
+        '''
+        tag = expr.tag
+        if tag == 'groupref':
+            return [expr.id]
+        elif tag == 'binaryop':
+            return [expr.left, expr.right]
+        elif tag == 'unaryop':
+            return [expr.right]
+        elif tag == 'function' and expr.name == '_call':
+            return [i for i in (self._param_value(p) for p in expr.parameters) if i is not None]
+        elif tag == 'function' and expr.name == '_getattrib':
+            return [expr.parameter_dict['_source']]
+        elif tag == 'function' and expr.name == '_getindex':
+            return [expr.parameter_dict['_source'], expr.parameter_dict['_index']]
+        return []
+
+    def _expressions(self, stmt, targets=True):
+        '''Returns the expressions evaluated by `stmt`, excluding those
+        within REPEAT blocks. Expressions that are assigned to are only
+        included if `targets` is ``True``.
+        '''
+        tag = stmt.tag
+        exprs = []
+        if tag == 'store':
+            op = stmt.source
+            while op.tag not in ('merge', 'join'):
+                exprs.extend(self._operands(op.func))
+                op = op.source
+            exprs.extend(op.sources)
+            for group in stmt.destinations:
+                if targets and group.id.tag != 'variable':
+                    exprs.append(group.id)
+                if group.limit is None:
+                    break
+                exprs.append(group.limit)
+        elif tag == 'function' and stmt.name == '_assign':
+            dest = stmt.parameter_dict['_destination']
+            if targets and dest.tag != 'variable':
+                exprs.append(dest)
+            exprs.append(stmt.parameter_dict['_source'])
+        elif tag == 'function' and stmt.name != '_alias':
+            exprs.append(stmt)
+        elif tag == 'evalstmt':
+            exprs.extend(stmt.evaluators)
+            exprs.extend(stmt.sources)
+        elif tag == 'yieldstmt':
+            exprs.extend(stmt.sources)
+        elif tag == 'repeatblock':
+            exprs.append(stmt.count)
+        return exprs
+
+    def _variables(self, exprs):
+        '''Returns the names of the variables used in `exprs`.'''
+        names = set()
+        stack = list(exprs)
+        while stack:
+            expr = stack.pop()
+            if expr.tag == 'variable':
+                if not expr.constant: names.add(expr.name)
+            else:
+                stack.extend(self._operands(expr))
+        return names
+
+    def _fold(self, expr):
+        '''Returns the value of `expr` if it is calculated entirely from
+        numeric constants; otherwise, returns ``None``.
+        '''
+        tag = expr.tag
+        try:
+            if tag == 'variable':
+                value = expr.value if expr.constant else None
+            elif tag == 'binaryop':
+                left, right = self._fold(expr.left), self._fold(expr.right)
+                value = None if left is None or right is None else _FOLD_BINARY[expr.op](left, right)
+            elif tag == 'unaryop':
+                right = self._fold(expr.right)
+                value = None if right is None else _FOLD_UNARY[expr.op](right)
+            else:
+                value = None
+
+            if isinstance(value, bool) or not isinstance(value, (int, long, float)):
+                return None
+            if math.isinf(value) or math.isnan(value):
+                return None
+            return value
+        except (KeyError, ArithmeticError, ValueError):
+            return None
+
+    def _is_invariant(self, expr, written):
+        '''Returns ``True`` if the value of `expr` does not depend on the
+        variables in `written` or the result of a function call.
+        '''
+        tag = expr.tag
+        if tag == 'variable':
+            return expr.constant or expr.name not in written
+        elif tag == 'function' and expr.name not in ('_getattrib', '_getindex'):
+            return False
+        elif tag not in ('groupref', 'binaryop', 'unaryop', 'function'):
+            return False
+        return all(self._is_invariant(i, written) for i in self._operands(expr))
+
+    def _find_invariants(self, expr, written, found):
+        '''Appends the largest parts of `expr` that are invariant (see
+        `_is_invariant`) to `found`. Constants and variables stored in
+        locals are not included.
+        '''
+        if expr.tag == 'groupref':
+            expr = expr.id
+        if not self._is_invariant(expr, written):
+            for operand in self._operands(expr):
+                self._find_invariants(operand, written, found)
+        elif expr.tag == 'variable':
+            if not expr.constant and expr.name not in self._locals:
+                found.append(expr)
+        elif self._fold(expr) is None:
+            found.append(expr)
+
+    def _emit_loads(self, names):
+        '''Copies each variable in `names` that is stored in a local into
+        that local, unless it already holds the current value.
+        '''
+        self._flush()
+        for name in sorted(set(names) & self._locals - self._live):
+            self._wl('%s = _global["%s"]' % (name, name))
+            self._live.add(name)
+
     def _emit_block(self, block_name, statements):
         '''Emits code for a named block.'''
         self._wl("def _block_" + block_name.lower() + "():")
         self._indent += 1
+        if self.optimise > 1 and not any(stmt.tag == 'pragma' for stmt in self._walk(statements)):
+            # Python code in pragmas may use any name, so blocks
+            # containing pragmas only use globals.
+            self._locals = frozenset(var.name for stmt in self._walk(statements)
+                                     for var in self._targets(stmt)
+                                     if var.name not in ILLEGAL_VARIABLE_NAMES)
+            self._live = set()
+        self._block_name = block_name
         if self.profile:
-            self._wl("_profiler.start('BLOCK %s')" % block_name)
+            index = self._profile_id(block_name, None, 'BLOCK ' + block_name)
+            self._wl("_prof_timer, _prof_record = _profiler.timer, _profiler.data.append")
+            self._wl("_prof = _prof_timer()")
             for stmt in statements:
-                self._wl("_profiler.start('%s')" % stmt)
                 self._emit(stmt)
-                self._wl("_profiler.end('%s')" % stmt)
-            self._wl("_profiler.end('BLOCK %s')" % block_name)
+            self._wl("_prof_record((%d, _prof_timer() - _prof, 0))" % index)
         else:
             for stmt in statements:
                 self._emit(stmt)
+        self._locals = frozenset()
+        self._live = set()
         self._indent -= 1
         self._wl()
 
@@ -169,6 +484,11 @@ class _emitter(object): #pylint: disable=R0903
         if self.optimise < 3:
             self._w('# ')
             self._wl(str(stmt))
+        if self._locals:
+            self._emit_loads(self._variables(self._expressions(stmt)))
+        if self.profile:
+            index = self._profile_statement(stmt)
+            self._wl("_prof%d = _prof_timer()" % index, preflush=True)
         if tag == 'repeatblock':
             self._emit_repeat(stmt)
         elif tag == 'function':
@@ -184,6 +504,17 @@ class _emitter(object): #pylint: disable=R0903
             self._emit_pragma(stmt)
         else:
             assert False, "Invalid statement: %s" % stmt
+        if self.profile:
+            self._flush()
+            self._w("_prof_record((%d, _prof_timer() - _prof%d, " % (index, index))
+            if tag == 'store':
+                self._w(" + ".join("len(%s)" % self._capture(self._emit_variable, dest.id)
+                                   for dest in stmt.destinations))
+            else:
+                self._w("0")
+            self._wl("))")
+        if self._is_barrier(stmt):
+            self._live.clear()
         if self.optimise < 3: self._wl()
 
     def _emit_pragma(self, stmt):
@@ -214,32 +545,49 @@ class _emitter(object): #pylint: disable=R0903
             eval_name = '_eval'
         else:
             eval_name = 'None'
-        self._w('for _indiv in _merge(')
+
+        groups = self.optimise > 0 and all(self._is_group(group) for group in stmt.sources)
+        if groups and len(stmt.sources) == 1:
+            self._w('_evaluate(')
+            self._emit_variable(stmt.sources[0].id)
+            self._wl(', ' + eval_name + ')')
+            return
+
+        self._w('_evaluate(_chain(' if groups else '_evaluate(_merge(')
         self._emit_variable(stmt.sources[0].id)
         for group in itertools.islice(stmt.sources, 1, None):
             self._w(', ')
             self._emit_variable(group.id)
-        self._wl('):')
-        self._indent += 1
-        self._wl('_indiv._eval = ' + eval_name)
-        self._wl('del _indiv.fitness')
-        self._indent -= 1
+        self._wl('), ' + eval_name + ')')
 
     def _emit_variable(self, var, name_only=False, safe_access=False):
         '''Emits names for variables.'''
         if name_only:
             self._w(var.name)
+        elif not safe_access and id(var) in self._hoisted:
+            self._w(self._hoisted[id(var)])
         elif var.tag == 'function':
             self._emit_function(var)
         elif var.constant:
-            self._w(str(var.value))
-        elif safe_access or var.name in ILLEGAL_VARIABLE_NAMES:
+            self._w(repr(var.value) if isinstance(var.value, float) else str(var.value))
+        elif (safe_access or var.name in ILLEGAL_VARIABLE_NAMES or
+              (var.name in self._locals and var.name not in self._live)):
             self._w('_global["')
             self._w(var.name)
             self._w('"]')
         else:
             self._w(var.name)
 
+    def _emit_destination(self, dest):
+        '''Emits the target of an assignment to `dest`.'''
+        if dest.tag != 'variable':
+            self._emit_expression(dest)
+        else:
+            if dest.name in self._locals:
+                self._w(dest.name + ' = ')
+                self._live.add(dest.name)
+            self._emit_variable(dest, safe_access=True)
+
     def _emit_function(self, expr):
         '''Emits code for functions.'''
         if expr.name == '_call':
@@ -262,15 +610,11 @@ class _emitter(object): #pylint: disable=R0903
             self._w('_')
         self._w('=')
         
-        if param.value is None:
-            name_lower = param.name.lower()
-            var = self.model.variables.get(name_lower) or self.model.externals.get(name_lower)
-            if var:
-                self._emit_variable(var)
-            else:
-                self._w('True')
+        value = self._param_value(param)
+        if value is None:
+            self._w('True')
         else:
-            self._emit_expression(param.value)
+            self._emit_expression(value)
 
     def _emit_call(self, expr):
         '''Emits code for function calls.'''
@@ -300,11 +644,7 @@ class _emitter(object): #pylint: disable=R0903
 
     def _emit_assign(self, expr):
         '''Emits code for assignment statements.'''
-        dest = expr.parameter_dict['_destination']
-        if dest.tag == 'variable':
-            self._emit_variable(dest, safe_access=True)
-        else:
-            self._emit_expression(dest)
+        self._emit_destination(expr.parameter_dict['_destination'])
         self._w(' = ')
         self._emit_expression(expr.parameter_dict['_source'])
         
@@ -325,12 +665,16 @@ class _emitter(object): #pylint: disable=R0903
         '''Emits code for expressions.'''
         tag = expr.tag
         
-        if tag in frozenset(('groupref',)):
+        if id(expr) in self._hoisted:
+            self._w(self._hoisted[id(expr)])
+        elif tag in frozenset(('groupref',)):
             self._emit_variable(expr.id)
         elif tag == 'variable':
             self._emit_variable(expr)
         elif tag == 'function':
             self._emit_function(expr)
+        elif tag in ('binaryop', 'unaryop') and self.optimise > 0 and self._fold(expr) is not None:
+            self._w(repr(self._fold(expr)))
         elif tag == 'binaryop':
             self._w('(')
             self._emit_expression(expr.left)
@@ -383,10 +727,7 @@ class _emitter(object): #pylint: disable=R0903
             self._wl('_source=_gen)')
 
         for group in stmt.destinations:
-            if group.id.tag == 'variable':
-                self._emit_variable(group.id, safe_access=True)
-            else:
-                self._emit_expression(group.id)
+            self._emit_destination(group.id)
             
             if group.limit is None:
                 self._wl(' = _group(_gen)')
@@ -402,19 +743,33 @@ class _emitter(object): #pylint: disable=R0903
         '''Emits optimised code for Store statements.'''
         self._flush()
         
-        if len(stmt.destinations) == 1:
+        single = len(stmt.destinations) == 1
+        filtered = stmt.source.tag not in set(('merge', 'join'))
+        if single:
             group = stmt.destinations[0]
-            if group.id.tag == 'variable':
-                self._emit_variable(group.id, safe_access=True)
-            else:
-                self._emit_expression(group.id)
+            limit = None if group.limit is None else self._fold(group.limit)
+            if filtered:
+                # Filters may accept a limit hint through _part
+                limit = None
+            self._emit_destination(group.id)
             self._w(" = _group(")
-            if group.limit is not None:
+            if limit is not None:
+                self._w("_islice(")
+            elif group.limit is not None:
                 self._w("_part(")
         else:
+            # If every destination has a constant size, filters receive
+            # the total as a limit hint through _part.
+            total = None
+            if filtered and all(group.limit is not None for group in stmt.destinations):
+                limits = [self._fold(group.limit) for group in stmt.destinations]
+                if all(limit is not None for limit in limits):
+                    total = sum(limits)
             self._w("_gen = ")
+            if total is not None:
+                self._w("_part(")
         
-        closing = ')'
+        closing = ''
         op = stmt.source
         while op.tag not in set(('merge', 'join')):
             self._emit_expression(op.func.parameter_dict["_function"])
@@ -426,36 +781,44 @@ class _emitter(object): #pylint: disable=R0903
             closing += ')'
             op = op.source
 
-        if op.tag == 'join' and closing == ')':
+        if op.tag == 'join' and not closing:
             self._w('tuples(_source=')
             closing += ')'
 
-        self._w('_' + op.tag + '(') # either '_merge()' or '_join()'
+        if op.tag == 'merge' and all(self._is_group(source) for source in op.sources):
+            # Groups are iterated directly rather than by _merge
+            self._w('_iter(' if len(op.sources) == 1 else '_chain(')
+        else:
+            self._w('_' + op.tag + '(') # either '_merge()' or '_join()'
         self._emit_expression(op.sources[0])
-        for group in itertools.islice(op.sources, 1, None):
+        for source in itertools.islice(op.sources, 1, None):
             self._w(", ")
-            self._emit_expression(group)
-        self._w(closing)
+            self._emit_expression(source)
+        self._w(')' + closing)
 
-        if len(stmt.destinations) == 1:
-            group = stmt.destinations[0]
+        if single:
             if group.limit is None:
                 self._wl(')')
+            elif limit is not None:
+                self._wl(', %d))' % limit)
             else:
                 self._w(', ')
                 self._emit_expression(group.limit)
                 self._wl('))')
         else:
+            if total is not None:
+                self._w(', %d)' % total)
             self._wl()
             for group in stmt.destinations:
-                if group.id.tag == 'variable':
-                    self._emit_variable(group.id, safe_access=True)
-                else:
-                    self._emit_expression(group.id)
+                self._emit_destination(group.id)
                 
                 if group.limit is None:
                     self._wl(' = _group(_gen)')
                     break
+
+                limit = self._fold(group.limit)
+                if limit is not None:
+                    self._wl(' = _group(_islice(_gen, %d))' % limit)
                 else:
                     self._w(' = _group(_part(_gen, ')
                     self._emit_expression(group.limit)
@@ -469,7 +832,50 @@ class _emitter(object): #pylint: disable=R0903
             for _ in xrange(int(block.count.value)):
                 for stmt in block.statements:
                     self._emit(stmt)
+            return
+
+        live = set(self._live)
+        barrier = any(self._is_barrier(stmt) for stmt in self._walk(block.statements))
+        loads, found = set(), []
+        if self.optimise > 1 and not barrier:
+            # Variables that are read before being assigned are loaded
+            # and invariant expressions are evaluated before the loop.
+            written = set(var.name for stmt in self._walk(block.statements) for var in self._targets(stmt))
+            assigned = set()
+            for stmt in block.statements:
+                loads.update(self._variables(self._expressions(stmt)) - assigned)
+                assigned.update(var.name for var in self._targets(stmt))
+                for expr in self._expressions(stmt, targets=False):
+                    self._find_invariants(expr, written, found)
+            loads = loads & self._locals - self._live
+
+        if loads or found:
+            loop = self._temp_name('_loop')
+            self._w(loop + " = _range(")
+            self._emit_expression(block.count)
+            self._wl(")")
+            self._wl("if " + loop + ":")
+            self._indent += 1
+            self._emit_loads(loads)
+            hoisted = dict(self._hoisted)
+            names = { }
+            for expr in found:
+                code = self._capture(self._emit_expression, expr)
+                if code not in names:
+                    names[code] = self._temp_name('_h')
+                    self._wl(names[code] + ' = ' + code)
+                hoisted[id(expr)] = names[code]
+            self._wl("for _ in " + loop + ":")
+
+            saved, self._hoisted = self._hoisted, hoisted
+            self._indent += 1
+            for stmt in block.statements:
+                self._emit(stmt)
+            self._indent -= 2
+            self._hoisted = saved
         else:
+            if barrier:
+                self._live.clear()
             self._w("for _ in _range(")
             self._emit_expression(block.count)
             self._wl("):")
@@ -478,8 +884,29 @@ class _emitter(object): #pylint: disable=R0903
                 self._emit(stmt)
             self._indent -= 1
 
+        # Locals assigned in the loop may not be current if it did not
+        # execute.
+        self._live = set() if barrier else live
+
 def emit(model, out=sys.stdout, optimise_level=0, profile=False):
     '''Converts the provided model to ``esec`` compatible code.
+
+    `optimise_level` selects the optimisations that are applied. Each
+    level includes those of the levels below it:
+
+      0. None.
+      1. The operators of each statement are nested in one expression,
+         constant expressions and group sizes are evaluated in advance
+         and groups created by Store statements are iterated without
+         using ``_merge``.
+      2. Variables are stored in locals within each block, invariant
+         expressions and variables are evaluated before REPEAT loops
+         and REPEAT blocks with up to four iterations are unrolled.
+      3. Comments are omitted.
+
+    Levels 2 and above assume that only function call statements, alias
+    statements, pragmas and YIELD statements change the values of
+    variables without assigning to them.
     '''
     result = _emitter(model, optimise_level, profile)
     if out is not None:
@@ -61,7 +61,7 @@ class AstSystem(System):
             elif stmt[0] == 'RepeatStmt':
                 block_stack.append(block)
                 new_block = []
-                block.append(type(stmt)(stmt[0], stmt[1], new_block))
+                block.append(type(stmt)(stmt[0], stmt[1], new_block, tokens=stmt.tokens))
                 block = new_block
             elif stmt[0] == 'EndStmt':
                 block = block_stack.pop()
@@ -89,7 +89,7 @@ class AstSystem(System):
         self._active = stmts = []
         self._visit_block(block[2])
         self._active = previous
-        return RepeatBlock(stmts, count_expr)
+        return RepeatBlock(stmts, count_expr, block.tokens)
 
     def _visit_stmt(self, stmt):
         '''Dispatches control to the appropriate handler for `stmt`.'''
@@ -274,7 +274,7 @@ class AstSystem(System):
         gen = merge_op(srcs)
         for op in operators:
             gen = Operator(gen, op)
-        gen = Store(gen, dests)
+        gen = Store(gen, dests, node.tokens)
         return gen
 
     def _joinstmt(self, node):
@@ -288,11 +288,11 @@ class AstSystem(System):
         srcs = [self._groupref(group) for group in node[1]]
         evaluators = [self._call(evaluator) for evaluator in node[2]]
 
-        return EvalStmt(srcs, evaluators)
+        return EvalStmt(srcs, evaluators, node.tokens)
 
     def _yieldstmt(self, node):
         '''Handles YIELD statements.'''
         assert node.tag == 'YieldStmt', repr(node)
 
         srcs = [self._groupref(group) for group in node[1]]
-        return YieldStmt(srcs)
+        return YieldStmt(srcs, node.tokens)
@@ -7,13 +7,14 @@ class RepeatBlock(object):
     '''Represents a repeated block of statements.'''
     tag = 'repeatblock'
 
-    def __init__(self, statements, count):
+    def __init__(self, statements, count, span=None):
         self.statements = statements
         '''A list of statements contained within this block.'''
         self.count = count
         '''A model element providing the number of times to execute
         this block.
         '''
+        self.span = span
 
     def __str__(self):
         return 'REPEAT %s' % self.count
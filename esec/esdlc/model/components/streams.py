@@ -78,13 +78,14 @@ class Store(object):
     '''
     tag = 'store'
     
-    def __init__(self, source, destinations):
+    def __init__(self, source, destinations, span=None):
         self.source = source
         '''The source stream.'''
         self.destinations = GroupList(destinations, allow_sizes=True, repeats_error=RepeatedDestinationGroupError)
         '''The destination groups. These groups may have a limit
         specified.
         '''
+        self.span = span
 
     def __str__(self):
         from_cmd = 'FROM '
@@ -126,12 +127,13 @@ class EvalStmt(object):
     '''Represents an ``EVAL`` statement for one or more groups.'''
     tag = 'evalstmt'
 
-    def __init__(self, sources, evaluators):
+    def __init__(self, sources, evaluators, span=None):
         self.sources = GroupList(sources, repeats_error=RepeatedGroupError)
         '''The list of source groups.'''
         self.evaluators = FunctionList(evaluators) if evaluators else None
         '''The list of evaluators. This may be ``None`` if no
         evaluators were specified.'''
+        self.span = span
 
     def __str__(self):
         if self.evaluators:
@@ -147,9 +149,10 @@ class YieldStmt(object):
     '''Represents a yield of one or more groups.'''
     tag = 'yieldstmt'
 
-    def __init__(self, sources):
+    def __init__(self, sources, span=None):
         self.sources = GroupList(sources, repeats_error=RepeatedGroupError)
         '''The list of source groups.'''
+        self.span = span
 
     def __str__(self):
         return 'YIELD %s' % self.sources
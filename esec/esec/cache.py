@@ -0,0 +1,104 @@
+'''Provides a cache of fitness values that persists between generations.
+
+A `FitnessCache` is created by `esec.system.System` when the
+``system.fitness_cache`` configuration value is provided, for example::
+    
+    config = {
+        'system': {
+            'definition': ...,
+            'fitness_cache': { 'size': 10000 },
+        },
+        ...
+    }
+
+While a cache is active, `esec.individual.evaluate` looks up each
+individual before calling its evaluator. Individuals with the same type
+and genome as a previously evaluated individual receive the same
+fitness without being evaluated again. When the cache holds ``size``
+entries, the least recently used entry is discarded.
+
+Only evaluators with a ``deterministic`` attribute that is ``True`` are
+cached. `esec.landscape.Landscape` sets this by default; landscapes
+that add noise to their fitness values (such as
+`esec.landscape.real.NoisyQuartic`) set it to ``False``. Evaluators that
+are not derived from `Landscape` are never cached unless they provide
+the attribute.
+
+The number of individuals found and not found in the cache are reported
+to the monitor as the ``cache_hits`` and ``cache_misses`` statistics.
+'''
+
+from array import array
+from collections import OrderedDict
+from esec.species.binary import BitGenome
+
+def _genome_key(genome):
+    '''Returns a hashable value representing `genome`. Nested lists are
+    converted to tuples.
+    '''
+    if type(genome) is array:
+        return genome.typecode, genome.tostring()
+    if type(genome) is BitGenome:
+        return genome.length, genome.bits
+    return tuple(_genome_key(gene) if isinstance(gene, list) else gene for gene in genome)
+
+class FitnessCache(object):
+    '''Stores the most recently used fitness values for each evaluator.
+    '''
+    
+    def __init__(self, size=None):
+        '''Initialises an empty cache.
+        
+        :Parameters:
+          size : int [optional]
+            The maximum number of fitness values to store. If omitted or
+            zero, 10000 values are stored.
+        '''
+        self.size = size or 10000
+        self._entries = OrderedDict()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    @staticmethod
+    def handles(evaluator):
+        '''Returns ``True`` if fitness values from `evaluator` may be
+        cached.
+        '''
+        return getattr(evaluator, 'deterministic', False) is True
+    
+    @staticmethod
+    def key(evaluator, indiv):
+        '''Returns the key used to store the fitness of `indiv` when
+        evaluated by `evaluator`, or ``None`` if the genome of `indiv`
+        cannot be used as a key.
+        '''
+        key = (evaluator, type(indiv), _genome_key(indiv.genome))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+    
+    def get(self, key):
+        '''Returns the fitness stored for `key`, or ``None`` if no value
+        is stored. The entry becomes the most recently used entry.
+        '''
+        fitness = self._entries.pop(key, None)
+        if fitness is not None:
+            self._entries[key] = fitness
+        return fitness
+    
+    def set(self, key, fitness):
+        '''Stores `fitness` for `key`, discarding the least recently used
+        entry if the cache is full.
+        '''
+        entries = self._entries
+        entries.pop(key, None)
+        entries[key] = fitness
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+    
+    def clear(self):
+        '''Removes all stored fitness values.'''
+        self._entries.clear()
@@ -0,0 +1,181 @@
+'''Saves and restores the state of a running system.
+
+Checkpoints are written using the binary ``pickle`` protocol and are
+streamed directly to the file. The objects that were created when the
+system was constructed, such as species, landscapes, configuration
+values and functions provided in ``system``, are not written to the
+file. Instead, references to them are stored, and these are resolved
+against a newly constructed system when the checkpoint is loaded. For
+this to succeed, the system must be constructed with the same
+configuration as the one that saved the checkpoint.
+
+All other values, including every group and variable created by the
+ESDL definition, must support pickling.
+
+:See: esec.experiment.Experiment.checkpoint,
+      esec.experiment.Experiment.resume
+'''
+
+import cPickle as pickle
+import os
+from types import FunctionType, BuiltinFunctionType, MethodType, ModuleType
+
+_MAGIC = 'esec-checkpoint'
+'''The value stored at the start of every checkpoint file.'''
+_VERSION = 2
+'''The current checkpoint format version.'''
+
+_ATOMIC = (int, long, float, complex, bool, str, unicode, type(None))
+'''Types that are always stored by value.'''
+_MAX_DEPTH = 4
+'''The number of levels below each context value that are searched for
+shared objects.'''
+_MAX_LENGTH = 1000
+'''Sequences longer than this are not searched for shared objects.'''
+
+class _SharedObjects(object):
+    '''Identifies the objects that are part of a system when it is
+    constructed.
+    
+    Each object is identified by the path used to reach it from the
+    system's context. Because the same search is performed when saving
+    and loading a checkpoint, equivalent objects have the same path.
+    
+    The members of objects in `exclude` are not searched, since they
+    may refer to values that change while the system runs.
+    '''
+    
+    def __init__(self, context, exclude=()):
+        self.paths = { }
+        self.objects = { }
+        self.exclude = set(id(obj) for obj in exclude)
+        for name in sorted(context):
+            if name == '__builtins__': continue
+            self._add(('context', name), context[name], _MAX_DEPTH)
+    
+    def _add(self, path, value, depth):
+        '''Records `value` and the objects it refers to.'''
+        if isinstance(value, _ATOMIC) or id(value) in self.paths:
+            return
+        self.paths[id(value)] = path
+        self.objects[path] = value
+        if depth <= 0 or id(value) in self.exclude:
+            return
+        if isinstance(value, (type, ModuleType, FunctionType, BuiltinFunctionType)):
+            return
+        
+        if isinstance(value, MethodType):
+            self._add(path + ('im_self',), value.im_self, depth - 1)
+            return
+        if isinstance(value, (list, tuple)):
+            if len(value) <= _MAX_LENGTH:
+                for i, item in enumerate(value):
+                    self._add(path + (i,), item, depth - 1)
+            return
+        if isinstance(value, dict):
+            if len(value) <= _MAX_LENGTH:
+                for key in sorted(k for k in value.iterkeys() if isinstance(k, basestring)):
+                    self._add(path + (key,), value[key], depth - 1)
+            return
+        
+        try:
+            members = object.__getattribute__(value, '__dict__')
+        except AttributeError:
+            members = { }
+        for key in sorted(members):
+            self._add(path + ('.', key), members[key], depth - 1)
+        # Class attributes are included for objects such as instruction
+        # sets that are defined by species.
+        for cls in type(value).__mro__:
+            if cls.__module__ == '__builtin__': continue
+            for key in sorted(cls.__dict__):
+                if key[:2] != '__':
+                    self._add(('class', cls.__module__, cls.__name__, key), cls.__dict__[key], depth - 1)
+    
+    def persistent_id(self, obj):
+        '''Returns the path for `obj` if it is a shared object.'''
+        if isinstance(obj, _ATOMIC): return None
+        return self.paths.get(id(obj))
+    
+    def persistent_load(self, path):
+        '''Returns the shared object identified by `path`.'''
+        try:
+            return self.objects[path]
+        except KeyError:
+            raise pickle.UnpicklingError('Checkpoint refers to %s, which does not exist in this system' %
+                                         '.'.join(str(p) for p in path))
+
+def save(path, context, state, exclude=(), info=None):
+    '''Writes a checkpoint to `path`.
+    
+    :Parameters:
+      path : string
+        The file to write. The checkpoint is written to a temporary file
+        first, which replaces `path` once it is complete.
+      
+      context : dict
+        The context of the system when it was constructed. Objects in
+        this context are stored by reference.
+      
+      state : dict
+        The values to store.
+      
+      exclude : iterable [optional]
+        Objects in `context` that are stored by reference but that may
+        refer to values that should be stored.
+      
+      info : object [optional]
+        A value that is returned by `load_info` without loading the rest
+        of the checkpoint. This may only contain values that are always
+        stored by value, such as strings and numbers, and tuples, lists
+        and dictionaries of them.
+    '''
+    shared = _SharedObjects(context, exclude)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as dest:
+        pickler = pickle.Pickler(dest, pickle.HIGHEST_PROTOCOL)
+        pickler.persistent_id = shared.persistent_id
+        pickler.dump((_MAGIC, _VERSION))
+        pickler.dump(info)
+        pickler.dump(state)
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temp_path, path)
+
+def load(path, context, exclude=()):
+    '''Reads a checkpoint written by `save` and returns the stored
+    values.
+    
+    :Parameters:
+      path : string
+        The file to read.
+      
+      context : dict
+        The context of a newly constructed system. References to shared
+        objects are resolved against this context.
+      
+      exclude : iterable [optional]
+        The same objects that were passed to `save`.
+    '''
+    shared = _SharedObjects(context, exclude)
+    with open(path, 'rb') as src:
+        unpickler = pickle.Unpickler(src)
+        unpickler.persistent_load = shared.persistent_load
+        _read_info(path, unpickler)
+        return unpickler.load()
+
+def load_info(path):
+    '''Returns the ``info`` value passed to `save` when the checkpoint at
+    `path` was written.
+    '''
+    with open(path, 'rb') as src:
+        return _read_info(path, pickle.Unpickler(src))
+
+def _read_info(path, unpickler):
+    '''Reads the header and ``info`` value of a checkpoint from
+    `unpickler`.
+    '''
+    header = unpickler.load()
+    if header != (_MAGIC, _VERSION):
+        raise ValueError('%s is not a supported checkpoint file' % path)
+    return unpickler.load()
@@ -0,0 +1,223 @@
+'''Provides an on-disk cache of the code generated from ESDL definitions.
+
+Compiling a definition requires it to be parsed, validated and converted
+to Python code, which is a noticeable part of the time taken to
+construct a short experiment. A `CompileCache` is created by
+`esec.system.System` when the ``system.compile_cache`` configuration
+value is provided, for example::
+    
+    config = {
+        'system': {
+            'definition': ...,
+            'compile_cache': { 'path': 'esdl_cache' },
+        },
+        ...
+    }
+
+The generated code is stored in the directory ``path`` (by default, a
+directory named ``esec_compiled`` in the system's temporary directory)
+and is reused by any later system with the same definition, the same
+names in its context and the same optimisation settings, including
+systems in other processes. Systems using a cached definition do not
+run the ESDL compiler.
+
+Entries are identified by a hash that includes the source code of
+`esdlc` and the version of Python, so upgrading either invalidates all
+existing entries. Entries are never removed from the directory; it may
+be deleted at any time.
+'''
+
+import hashlib
+import imp
+import marshal
+import os
+import tempfile
+from types import CodeType
+
+from esdlc import compileESDL
+from esdlc.emitters.esec import emit
+from esec.utils.exceptions import ESDLCompilerError
+
+_FORMAT = 1
+'''The current format of cache entries.'''
+
+_LOADED = { }
+'''The definitions that have been stored or loaded by this process,
+keyed by their cache key.'''
+
+_ESDLC_FINGERPRINT = None
+'''The hash of the source code of `esdlc`, once it has been calculated.
+'''
+
+def _esdlc_fingerprint():
+    '''Returns a hash of the source code of the `esdlc` package.'''
+    global _ESDLC_FINGERPRINT   #pylint: disable=W0603
+    if _ESDLC_FINGERPRINT is None:
+        import esdlc
+        root = os.path.dirname(os.path.abspath(esdlc.__file__))
+        digest = hashlib.sha1()
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    path = os.path.join(dirpath, filename)
+                    digest.update(os.path.relpath(path, root).replace(os.sep, '/'))
+                    with open(path, 'rb') as src:
+                        digest.update(src.read())
+        _ESDLC_FINGERPRINT = digest.hexdigest()
+    return _ESDLC_FINGERPRINT
+
+def _code_names(code):
+    '''Returns the names and string constants used by `code` and the
+    functions defined within it.
+    '''
+    result = set(code.co_names)
+    for value in code.co_consts:
+        if isinstance(value, str):
+            result.add(value)
+        elif isinstance(value, CodeType):
+            result.update(_code_names(value))
+    return result
+
+class CompiledDefinition(object):   #pylint: disable=R0903
+    '''The code generated for an ESDL definition and the details of the
+    semantic model that are used to run it.
+    '''
+    
+    def __init__(self, code_string, code, block_names, init_block_name, externals):
+        self.code_string = code_string
+        '''The generated Python source code.'''
+        self.code = code
+        '''The compiled code object for `code_string`.'''
+        self.block_names = list(block_names)
+        '''The names of the blocks in the definition.'''
+        self.init_block_name = init_block_name
+        '''The name of the initialisation block.'''
+        self.externals = list(externals)
+        '''The names of the external variables and functions used by the
+        definition.'''
+        self.names = frozenset(_code_names(code))
+        '''The names and string constants used by the generated code.
+        This includes every variable that the code refers to.'''
+
+class CompileCache(object):
+    '''Stores compiled ESDL definitions in a directory.
+    '''
+    
+    def __init__(self, path=None):
+        '''Initialises a cache using the directory `path`, which is
+        created when the first definition is stored.
+        
+        :Parameters:
+          path : string [optional]
+            The directory to store definitions in. If omitted, a
+            directory named ``esec_compiled`` in the temporary directory
+            is used.
+        '''
+        self.path = path or os.path.join(tempfile.gettempdir(), 'esec_compiled')
+        self.hits = 0
+        '''The number of definitions found in the cache.'''
+        self.misses = 0
+        '''The number of definitions not found in the cache.'''
+    
+    @staticmethod
+    def key(definition, names, optimise_level=0, profile=False):
+        '''Returns the key used to store the code generated for
+        `definition` when compiled with a context containing `names` and
+        the provided emitter settings.
+        '''
+        if '\n' not in definition and os.path.exists(definition):
+            with open(definition, 'rb') as src:
+                definition = src.read()
+        digest = hashlib.sha1()
+        for part in (_FORMAT, imp.get_magic(), _esdlc_fingerprint(), optimise_level, bool(profile)):
+            digest.update(repr(part))
+        digest.update('\0'.join(sorted(names)))
+        digest.update('\0')
+        digest.update(definition if isinstance(definition, str) else definition.encode('utf-8'))
+        return digest.hexdigest()
+    
+    def get(self, key):
+        '''Returns the `CompiledDefinition` stored for `key`, or ``None``
+        if it has not been stored or cannot be read.
+        '''
+        compiled = _LOADED.get(key)
+        if compiled is None:
+            try:
+                with open(os.path.join(self.path, key + '.esdlc'), 'rb') as src:
+                    data = marshal.load(src)
+                if data[0] == _FORMAT:
+                    code_string, code, block_names, init_block_name, externals = data[1:]
+                    compiled = CompiledDefinition(code_string, code, block_names, init_block_name, externals)
+                    _LOADED[key] = compiled
+            except (IOError, OSError, EOFError, ValueError, TypeError):
+                pass
+        
+        if compiled is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return compiled
+    
+    def put(self, key, compiled):
+        '''Stores `compiled` for `key`. Failures to write the entry are
+        ignored.
+        '''
+        _LOADED[key] = compiled
+        data = (_FORMAT, compiled.code_string, compiled.code, tuple(compiled.block_names),
+                compiled.init_block_name, tuple(compiled.externals))
+        path = os.path.join(self.path, key + '.esdlc')
+        temp_path = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+            with open(temp_path, 'wb') as dest:
+                marshal.dump(data, dest)
+            os.rename(temp_path, path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+def compile_definition(definition, context, optimise_level=0, profile=False, cache=None):
+    '''Compiles an ESDL definition for use by `esec.system.System`.
+    
+    :Parameters:
+      definition : string
+        The ESDL definition, or the path to a file containing it.
+      
+      context : dict
+        The values available to the definition. Only the names are used.
+      
+      optimise_level : int [optional]
+        The optimisation level passed to `esdlc.emitters.esec.emit`.
+      
+      profile : bool [optional]
+        ``True`` to generate code that reports statement timings.
+      
+      cache : `CompileCache` [optional]
+        The cache to look up and store the compiled definition in.
+    
+    :Returns:
+        A tuple containing the `CompiledDefinition` and the validation
+        result. The validation result is ``None`` if the definition was
+        found in `cache`.
+    
+    :Exceptions:
+      - `ESDLCompilerError`: The definition contains errors.
+    '''
+    key = None
+    if cache is not None:
+        key = cache.key(definition, context, optimise_level, profile)
+        compiled = cache.get(key)
+        if compiled is not None:
+            return compiled, None
+    
+    model, validation_result = compileESDL(definition, context)
+    if not validation_result:
+        raise ESDLCompilerError(validation_result, "Errors occurred while compiling system.")
+    code_string, _ = emit(model, out=None, optimise_level=optimise_level, profile=profile)
+    compiled = CompiledDefinition(code_string, compile(code_string, 'ESDL Definition', 'exec'),
+                                  model.block_names, model.INIT_BLOCK_NAME, model.externals.iterkeys())
+    if cache is not None:
+        cache.put(key, compiled)
+    return compiled, validation_result
@@ -6,9 +6,25 @@ example::
 
     from esec.context import rand, notify
 
+Statistics that change frequently, such as the number of births and
+evaluations, should be accumulated using `count` rather than sending a
+``'statistic'`` notification for every event. The accumulated values
+are sent to the monitor by `flush_counts`, which the system calls once
+per step.
+
+Species operators and selectors use `rand`, which is seeded by the
+system. Islands, replicates and the evaluator pool derive their seeds
+from the experiment's ``random_seed`` using `derive_seed`, so the
+numbers they produce do not depend on how many other islands, replicates
+or workers exist. Code that requires a further independent generator may
+create one with `stream`.
+
 The `_context` variable may be imported to share state that does not fit
 in with any of the other variables.
 '''
+import hashlib
+import random
+import sys
 import threading
 _context = threading.local()
 '''The object providing access to the state of the current ESDL
@@ -78,3 +94,65 @@ notify = _notify_property()
 signature of this function is given in
 `esec.monitors.MonitorBase.notify`.
 '''
+
+def derive_seed(seed, *key):
+    '''Returns a seed for the stream identified by `key` that is
+    derived from `seed`.
+
+    The result is a non-negative ``int`` that is the same for every call
+    with equal parameters, and is unrelated to the result for any other
+    `key`. Elements of `key` should be strings or integers.
+
+    `seed` must not be ``None``, since every unseeded stream would
+    otherwise receive the same seed.
+    '''
+    if seed is None:
+        raise ValueError("A seed is required to derive a stream")
+    digest = hashlib.sha1(repr((seed,) + tuple(key))).hexdigest()
+    return int(int(digest, 16) % sys.maxint)
+
+def stream(*key):
+    '''Returns a new ``random.Random`` instance for the stream
+    identified by `key`, derived from the current experiment's
+    ``random_seed``.
+
+    For example, ``stream('replicate', 3)`` always produces the same
+    sequence of numbers for a given seed, regardless of any other
+    streams that have been created. If there is no ``random_seed``, the
+    stream is seeded by the system.
+    '''
+    seed = getattr(_context, 'random_seed', None)
+    if seed is None:
+        return random.Random()
+    return random.Random(derive_seed(seed, *key))
+
+def count(name, value=1):
+    '''Adds `value` to the statistic `name`.
+
+    The total is sent to the monitor the next time `flush_counts` is
+    called, in a ``'statistic'`` notification from ``'individual'``.
+    This is equivalent to, but much faster than, calling::
+
+        notify('individual', 'statistic', { name: value })
+
+    '''
+    # _context is thread-local, so counters are created on first use in
+    # each thread.
+    counters = getattr(_context, 'counters', None)
+    if counters is None:
+        counters = _context.counters = { }
+    counters[name] = counters.get(name, 0) + value
+
+def flush_counts():
+    '''Sends the statistics accumulated by `count` to the monitor as a
+    single ``'statistic'`` notification and resets them.
+
+    `esec.system.System` calls this function after each step, before
+    the monitor's ``on_post_breed`` or ``on_post_reset`` handlers are
+    called. It may also be called at any time to ensure the monitor has
+    received all statistics.
+    '''
+    counters = getattr(_context, 'counters', None)
+    if counters:
+        _context.counters = { }
+        _context.notify('individual', 'statistic', counters)
@@ -2,6 +2,7 @@
 experiment.
 '''
 
+import os
 import random
 import sys
 import traceback
@@ -21,10 +22,15 @@ class Experiment(object):
     
     syntax = {
         'random_seed': [int, None],
+        'replicate?': int,
         'monitor': '*', # pre-initialised MonitorBase instance, class or dict
         'landscape': '*',
         'system': '*', # allow System to validate
         'selector?': '*', # System also validates this
+        'checkpoint?': {
+            'path': str,
+            'interval?': int,
+        },
         'verbose': int,
     }
     '''The expected format of the configuration dictionary passed to
@@ -38,6 +44,13 @@ class Experiment(object):
         system. Landscapes use their own random number generators and
         may be seeded independently.
       
+      replicate : (int [optional])
+        The index of this run within a set of repeated runs. If
+        provided, the system uses the independent random number stream
+        derived from ``random_seed`` for this replicate (see
+        `esec.context.stream`), so that each replicate may be
+        reproduced on its own.
+      
       monitor : (`MonitorBase` instance, subclass or dictionary)
         The monitor to use for the experiment. If it is an instance of a
         class derived from `MonitorBase`, it is used without
@@ -75,6 +88,12 @@ class Experiment(object):
         these names are reserved for use by the ESDL compiler and
         runtime.
       
+      checkpoint : (dictionary [optional])
+        The file to save checkpoints to (``path``) and the number of
+        steps between each checkpoint (``interval``, defaults to 1). If
+        the file exists when `run` is called, the saved run is resumed
+        instead of starting a new run.
+      
       verbose : (int |ge| 0 [defaults to zero])
         The verbosity level to use.
     
@@ -193,11 +212,18 @@ class Experiment(object):
                 ex_trace = ''.join(traceback.format_exception(*ex))
             self.monitor.on_exception(self, ex_type, ex_value, ex_trace)
             raise
+        
+        self._steps = 0
     
     
     def run(self):
-        '''Run the experiment.'''
-        self.begin()
+        '''Run the experiment. If a checkpoint file is specified in the
+        configuration and exists, the saved run is resumed.
+        '''
+        if cfg_read(self.cfg, 'checkpoint.path') and os.path.exists(self.cfg.checkpoint.path):
+            self.resume()
+        else:
+            self.begin()
         
         while self.step(): pass
         
@@ -228,8 +254,33 @@ class Experiment(object):
             return False
         else:
             self.system.step()
+            self._steps += 1
+            if cfg_read(self.cfg, 'checkpoint.path') and self._steps % (self.cfg.checkpoint.interval or 1) == 0:
+                self.checkpoint()
             return True
     
+    def checkpoint(self, path=None):
+        '''Saves the current state of the experiment to `path`, or the
+        file specified in the configuration if `path` is omitted.
+        
+        :See: esec.system.System.checkpoint
+        '''
+        self.system.checkpoint(path or self.cfg.checkpoint.path, { 'steps': self._steps })
+    
+    def resume(self, path=None):
+        '''Continues the experiment from a checkpoint saved in `path`,
+        or the file specified in the configuration if `path` is omitted.
+        This is used instead of `begin`.
+        
+        The experiment must have been created using the same
+        configuration as the experiment that saved the checkpoint.
+        
+        :See: esec.system.System.resume
+        '''
+        extra = self.system.resume(path or self.cfg.checkpoint.path)
+        if extra:
+            self._steps = extra.get('steps', 0)
+    
     def close(self):
         '''Closes the experiment.'''
         self.system.close()
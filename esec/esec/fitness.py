@@ -14,6 +14,12 @@ Derivations of `Fitness` need only override `Fitness.types`,
 that don't use lexicographical ordering and value maximisation should
 also override `Fitness.__ge__` and potentially `Fitness.__eq__`.
 
+Each `Fitness` has a `Fitness.sort_key` that compares in the same order
+as the fitness values themselves, but using the built-in comparisons
+of tuples and numbers. `sort_keys` returns these keys for a sequence of
+fitness values, and is used by selectors and statistics to avoid
+calling the comparison methods of `Fitness` for every comparison.
+
 The `EmptyFitness` class provides an efficient sentinel value indicating
 that no fitness value has been set. All comparisons return greater-than
 and addition and subtraction operations behave as expected against a
@@ -42,6 +48,7 @@ class Fitness(object):
     
     The `__str__` method may be overridden to provide formatted output.
     '''
+    __slots__ = ( 'values', '_sort_key' )
     
     types = [float]
     '''A list of the types of each part of the fitness value.
@@ -88,9 +95,20 @@ class Fitness(object):
         operators. Except for the augmented arithmetic operators,
         `values` should be treated as immutable.
         '''
+        self._sort_key = None
         
         if _direct:
             self.values = values
+        elif _uses_default_check(type(self)):
+            # The values are converted without calling `check`
+            if isinstance(values, _NUMBER_TYPES):
+                self.values = (self.types[0](values),)
+            elif values is None:
+                self.values = tuple([t(d) for t, d in izip(self.types, self.defaults)])
+            elif hasattr(values, '__iter__'):
+                self.values = tuple([t(v) for t, v in izip(self.types, values)])
+            else:
+                self.values = (self.types[0](values),)
         elif values is None:
             self.values = tuple(self.check(i, *args) for i, args in
                                 enumerate(izip(self.types, self.defaults, self.defaults)))
@@ -105,6 +123,16 @@ class Fitness(object):
     def __iter__(self):
         return iter(self.values)
     
+    def __getstate__(self):
+        state = dict(getattr(self, '__dict__', ()))
+        state['values'] = self.values
+        return state
+    
+    def __setstate__(self, state):
+        self._sort_key = None
+        for key, value in state.iteritems():
+            setattr(self, key, value)
+    
     def __str__(self):
         if __debug__: self.validate()
         return '%.3f' % self.values[0]
@@ -123,6 +151,40 @@ class Fitness(object):
         '''
         return ','.join((str(v) for v in self.values))
     
+    @property
+    def sort_key(self):
+        '''Returns a tuple of numbers that compares in the same order as
+        this fitness, such that a more fit value has a larger key, or
+        ``None`` if there is no such tuple. Keys are only comparable
+        between instances of the same type.
+        
+        The key is created when first requested and is recreated if
+        `values` is replaced.
+        '''
+        cached = self._sort_key
+        if cached is not None and cached[0] is self.values:
+            return cached[1]
+        key = self.get_sort_key()
+        self._sort_key = (self.values, key)
+        return key
+    
+    def get_sort_key(self):
+        '''Returns the value of `sort_key` for the current `values`.
+        
+        By default, a key is returned for derivations that do not
+        override the comparison operators of `Fitness` or
+        `FitnessMinimise`, provided every part is a number other than
+        NaN. Derivations that override the comparison operators may
+        override this method to return a key that matches their order.
+        '''
+        direction = _key_direction(type(self))
+        if direction is None: return None
+        values = self.values
+        for value in values:
+            if not isinstance(value, _NUMBER_TYPES) or value != value:
+                return None
+        return values if direction > 0 else tuple([-value for value in values])
+    
     def validate(self, other=None):
         '''Verifies that each part of the fitness value matches the type
         specified in `types`. If provided, `other` is also verified.
@@ -132,7 +194,11 @@ class Fitness(object):
             ``__debug__`` is ``False``.
         '''
         if self.values is not None:
-            if not all((isinstance(*args) for args in izip(self.values, self.types))):
+            if len(self.values) == 1:
+                valid = isinstance(self.values[0], self.types[0])
+            else:
+                valid = all((isinstance(*args) for args in izip(self.values, self.types)))
+            if not valid:
                 print >> sys.stderr, self.types
                 print >> sys.stderr, self.values
                 assert False, "Incorrect value type in Fitness object"
@@ -281,7 +347,7 @@ class Fitness(object):
         if isinstance(other, EmptyFitness):
             values = tuple(self.values)
         else:
-            values = tuple((value1 + value2 for value1, value2 in izip(self.values, other.values)))
+            values = _add_values(self.values, other.values)
         return type(self)(values, True)
     
     def __radd__(self, other):
@@ -289,7 +355,7 @@ class Fitness(object):
         if isinstance(other, EmptyFitness):
             values = tuple(self.values)
         else:
-            values = tuple((value1 + value2 for value1, value2 in izip(self.values, other.values)))
+            values = _add_values(self.values, other.values)
         return type(self)(values, True)
     
     def __neg__(self):
@@ -315,7 +381,7 @@ class Fitness(object):
     def __iadd__(self, other):
         if __debug__: self.validate(other)
         if not isinstance(other, EmptyFitness):
-            self.values = tuple((value1 + value2 for value1, value2 in izip(self.values, other.values)))
+            self.values = _add_values(self.values, other.values)
         return self
     
     def __isub__(self, other):
@@ -331,27 +397,37 @@ class Fitness(object):
     
     def __div__(self, other):
         if not isinstance(other, (int, float)): return NotImplemented
-        result = (expected_type(value / other) for expected_type, value in izip(self.types, self.values))
+        result = [expected_type(value / other) for expected_type, value in izip(self.types, self.values)]
         return type(self)(tuple(result), True)
     
     def __truediv__(self, other):
         if not isinstance(other, (int, float)): return NotImplemented
-        result = (expected_type(value / other) for expected_type, value in izip(self.types, self.values))
+        result = [expected_type(value / other) for expected_type, value in izip(self.types, self.values)]
         return type(self)(tuple(result), True)
 
+_NUMBER_TYPES = (int, long, float)
+
+def _add_values(values1, values2):
+    '''Returns the sum of each pair of values in `values1` and
+    `values2`.
+    '''
+    if len(values1) == 1 and len(values2) == 1:
+        return (values1[0] + values2[0],)
+    return tuple([value1 + value2 for value1, value2 in izip(values1, values2)])
+
 #=======================================================================
 
 class FitnessMaximise(Fitness):
     '''Represents a simple fitness value where higher values are
     considered to be more fit.
     '''
-    pass
+    __slots__ = ( )
 
 class FitnessMaximize(FitnessMaximise):
     '''Represents a simple fitness value where higher values are
     considered to be more fit.
     '''
-    pass
+    __slots__ = ( )
 
 #=======================================================================
 
@@ -359,6 +435,8 @@ class FitnessMinimise(Fitness):
     '''Represents a simple fitness value where lower values are
     considered to be more fit.
     '''
+    __slots__ = ( )
+    
     def should_terminate(self, criteria):
         '''Determines whether `self` (the best found fitness) is better
         than or equal to `criteria` for the purposes of ending an
@@ -424,7 +502,7 @@ class FitnessMinimize(FitnessMinimise):
     '''Represents a simple fitness value where lower values are
     considered to be more fit.
     '''
-    pass
+    __slots__ = ( )
 
 #=======================================================================
 
@@ -442,10 +520,22 @@ class EmptyFitness(object):
     Mathematical operations on `EmptyFitness` and `Fitness` instances
     create a default instance of the type of `Fitness` provided and use
     that in place of the `EmptyFitness`.
+    
+    `EmptyFitness` has no state, so only one instance is ever created.
     '''
+    __slots__ = ( )
     
     #pylint: disable=R0201,W0613
     
+    _instance = None
+    
+    def __new__(cls, other=None):
+        instance = cls.__dict__.get('_instance')
+        if instance is None:
+            instance = super(EmptyFitness, cls).__new__(cls)
+            cls._instance = instance
+        return instance
+    
     def __init__(self, other=None):
         pass
     
@@ -463,6 +553,13 @@ class EmptyFitness(object):
         '''
         return '-'
     
+    @property
+    def sort_key(self):
+        '''Returns an empty tuple, which compares as less than the
+        `Fitness.sort_key` of any `Fitness` instance.
+        '''
+        return ()
+    
     def __bool__(self):
         return False
     
@@ -499,6 +596,61 @@ class EmptyFitness(object):
 
 #=======================================================================
 
+_default_check_classes = { }
+_key_direction_classes = { }
+
+def _uses_default_check(cls):
+    '''Returns ``True`` if `cls` does not override `Fitness.check`.'''
+    result = _default_check_classes.get(cls)
+    if result is None:
+        result = _default_check_classes[cls] = (cls.check.im_func is Fitness.check.im_func)
+    return result
+
+def _key_direction(cls):
+    '''Returns 1 if instances of `cls` are ordered by comparing their
+    values, -1 if they are ordered by comparing their negated values,
+    or ``None`` if `cls` overrides the comparison operators.
+    '''
+    try:
+        return _key_direction_classes[cls]
+    except KeyError:
+        pass
+    
+    direction = None
+    if all(getattr(cls, name).im_func is getattr(Fitness, name).im_func
+           for name in ('__eq__', '__ne__', '__lt__', '__ge__', '__le__')):
+        if cls.__gt__.im_func is Fitness.__gt__.im_func:
+            direction = 1
+        elif cls.__gt__.im_func is FitnessMinimise.__gt__.im_func:
+            direction = -1
+    _key_direction_classes[cls] = direction
+    return direction
+
+def sort_keys(fitnesses):
+    '''Returns a list of values that sort in the same order as the
+    `Fitness` or `EmptyFitness` instances in `fitnesses`.
+    
+    The list contains the `Fitness.sort_key` of each element if every
+    `Fitness` has a key and is of the same type. Otherwise, it contains
+    the elements of `fitnesses`.
+    '''
+    fitnesses = list(fitnesses)
+    keys = [ ]
+    fitness_type = None
+    for fitness in fitnesses:
+        key = getattr(fitness, 'sort_key', None)
+        if key is None:
+            return fitnesses
+        if type(fitness) is not EmptyFitness:
+            if fitness_type is None:
+                fitness_type = type(fitness)
+            elif type(fitness) is not fitness_type:
+                return fitnesses
+        keys.append(key)
+    return keys
+
+#=======================================================================
+
 _dominating_fitness_classes = { }
 
 def _dominating_fitness_gt(self, other):
@@ -523,6 +675,16 @@ def _dominating_fitness_gt(self, other):
     if not isinstance(other, type(self)): return False
     return all(i1 <= i2 for i1, i2 in izip(self.values, other.values))
 
+def _dominating_fitness_reduce(self):
+    '''Allows instances of the dynamically created classes returned by
+    `SimpleDominatingFitness` to be pickled.
+    '''
+    return _dominating_fitness_load, (len(self.types), self.values)
+
+def _dominating_fitness_load(value_count, values):
+    '''Recreates a pickled `SimpleDominatingFitness` instance.'''
+    return SimpleDominatingFitness(value_count)(values, _direct=True)
+
 def SimpleDominatingFitness(value_count=2):
     '''Returns a class suitable for a simple dominating fitness with the
     specified number of values. A fitness dominates another fitness if
@@ -542,6 +704,7 @@ def SimpleDominatingFitness(value_count=2):
         new_dict['types'] = [float] * value_count
         new_dict['defaults'] = [0.0] * value_count
         new_dict['__gt__'] = _dominating_fitness_gt
+        new_dict['__reduce__'] = _dominating_fitness_reduce
         cls = type('SimpleDominatingFitness%d' % value_count, (FitnessMinimise,), new_dict)
         _dominating_fitness_classes[value_count] = cls
     return cls
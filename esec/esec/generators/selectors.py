@@ -9,13 +9,15 @@ The global variable ``rand`` is made available through the context in
 which the selectors are executed.
 '''
 
-from itertools import cycle, repeat
+from heapq import nlargest, nsmallest
+from itertools import cycle, islice, repeat
 from math import isinf
 from warnings import warn
 from esec import esdl_func
-from esec.fitness import Fitness
+from esec.fitness import Fitness, sort_keys
 from esec.generators import _key_fitness, _key_birthday
 from esec.context import rand
+from esec.population import population_of
 
 @esdl_func('select_all')
 def All(_source):
@@ -60,6 +62,84 @@ def RepeatEach(_source, count=2):
         for _ in xrange(count):
             yield indiv
 
+def _fitness_keys(group):
+    '''Returns values that sort in the same order as the fitness of
+    each individual in `group`.
+    '''
+    return sort_keys([_key_fitness(i) for i in group])
+
+def _birthday_keys(group):
+    '''Returns the birthday of each individual in `group`.'''
+    return [_key_birthday(i) for i in group]
+
+def _sorted_by_keys(group, keys, reverse):
+    '''Returns the individuals in `group` sorted by the matching values
+    in `keys`. Individuals with equal keys remain in their original
+    order.
+    '''
+    return [group[i] for i in sorted(xrange(len(group)), key=keys.__getitem__, reverse=reverse)]
+
+class _Ordered(object):
+    '''Returns the individuals in `_source` sorted by the values that
+    `get_keys` returns for them.
+    
+    The individuals are not sorted until the first is requested. If
+    `limit_hint` is called first, only the requested number of
+    individuals are found using a heap, and the remainder are sorted
+    only if they are requested. The order is identical to that returned
+    by ``sorted``, including between individuals with equal keys.
+    
+    If `population` is provided, it is ordered by fitness using its
+    cached values and `_source` and `get_keys` are ignored.
+    '''
+    def __init__(self, _source, get_keys, reverse, population=None):
+        self.population = population
+        self.group = list(_source) if population is None else population
+        self.get_keys = get_keys
+        self.reverse = reverse
+        self._iter = None
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        '''Returns the next individual.'''
+        if self._iter is None:
+            self._iter = iter(self._sorted())
+        return next(self._iter)
+    
+    def _keys(self):
+        '''Returns the key of each individual.'''
+        if self.population is not None:
+            return self.population.sort_keys
+        return self.get_keys(self.group)
+    
+    def _sorted(self):
+        '''Returns all the individuals in order.'''
+        if self.population is not None:
+            return self.population.ranked(self.reverse)
+        return _sorted_by_keys(self.group, self._keys(), self.reverse)
+    
+    def limit_hint(self, count):
+        '''Returns an iterator over the individuals, where at most
+        `count` individuals are expected to be requested.
+        '''
+        if self._iter is None and 0 <= count < len(self.group):
+            self._iter = self._limited(count)
+        return self
+    
+    def _limited(self, count):
+        '''Returns the first `count` individuals without a full sort,
+        followed by the remaining individuals.
+        '''
+        select = nlargest if self.reverse else nsmallest
+        group = self.group
+        keys = self._keys()
+        for i in select(count, xrange(len(group)), key=keys.__getitem__):
+            yield group[i]
+        for indiv in islice(self._sorted(), count, None):
+            yield indiv
+
 @esdl_func('best')
 def Best(_source, only=False):
     '''Returns the individuals in decreasing fitness order.
@@ -74,10 +154,12 @@ def Best(_source, only=False):
         `_source`; otherwise, returns all individuals in `_source` in
         order of decreasing fitness.
     '''
+    population = population_of(_source)
     if only:
+        if population is not None: return repeat(population.best)
         return repeat(max(_source, key=_key_fitness))
     else:
-        return iter(sorted(_source, key=_key_fitness, reverse=True))
+        return _Ordered(_source, _fitness_keys, True, population)
 
 @esdl_func('best_only')
 def BestOnly(_source):
@@ -104,10 +186,12 @@ def Worst(_source, only=False):
         `_source`; otherwise, returns all individuals in `_source` in
         order of increasing fitness.
     '''
+    population = population_of(_source)
     if only:
+        if population is not None: return repeat(population.worst)
         return repeat(min(_source, key=_key_fitness))
     else:
-        return iter(sorted(_source, key=_key_fitness, reverse=False))
+        return _Ordered(_source, _fitness_keys, False, population)
 
 @esdl_func('worst_only')
 def WorstOnly(_source):
@@ -137,7 +221,7 @@ def Youngest(_source, only=False):
     if only:
         return repeat(max(_source, key=_key_birthday))
     else:
-        return iter(sorted(_source, key=_key_birthday, reverse=True))
+        return _Ordered(_source, _birthday_keys, True)
 
 @esdl_func('youngest_only')
 def YoungestOnly(_source):
@@ -167,7 +251,7 @@ def Oldest(_source, only=False):
     if only:
         return repeat(min(_source, key=_key_birthday))
     else:
-        return iter(sorted(_source, key=_key_birthday, reverse=False))
+        return _Ordered(_source, _birthday_keys, False)
 
 @esdl_func('oldest_only')
 def OldestOnly(_source):
@@ -224,30 +308,45 @@ def Tournament(_source, k=2,
     irand = rand.randrange
     frand = rand.random
     choice = rand.choice
+    population = population_of(_source)
+    if population is not None:
+        group = population
+        keys = population.sort_keys
+    else:
+        group = list(_source)
+        keys = _fitness_keys(group)
     # WITH REPLACEMENT
     if with_replacement and not without_replacement:
-        group = list(_source)
         size = len(group)
         while True:
-            pool = [group[irand(size)] for _ in xrange(k)]
-            winner = max(pool, key=_key_fitness)
+            pool = [irand(size) for _ in xrange(k)]
+            winner = max(pool, key=keys.__getitem__)
             if greediness >= 1.0 or frand() < greediness:
-                yield winner
+                yield group[winner]
             else:
                 pool.remove(winner)
-                yield choice(pool)
+                yield group[choice(pool)]
     # WITHOUT REPLACEMENT
     else:
-        group = list(_source)
-        while group:
-            winner_index = 0
-            if len(group) >= k:
-                pool_index = [irand(len(group)) for _ in xrange(k)]
-                winner_index = max(pool_index, key=lambda i: group[i].fitness)
-                if not (greediness >= 1.0 or frand() < greediness):
-                    pool_index.remove(winner_index)
-                    winner_index = choice(pool_index)
-            yield group.pop(winner_index)
+        size = len(group)
+        # slots[:size] contains the indices of the individuals that
+        # remain in contention. Winners are swapped with the last slot
+        # so they can be removed in constant time.
+        slots = range(size)
+        while size >= k:
+            pool = [irand(size) for _ in xrange(k)]
+            winner = max(pool, key=lambda i: keys[slots[i]])
+            if not (greediness >= 1.0 or frand() < greediness):
+                pool.remove(winner)
+                winner = choice(pool)
+            size -= 1
+            winner_index = slots[winner]
+            slots[winner] = slots[size]
+            yield group[winner_index]
+        # Too few individuals remain for a tournament, so they are
+        # returned in their original order.
+        for winner_index in sorted(slots[:size]):
+            yield group[winner_index]
 
 @esdl_func('binary_tournament')
 def BinaryTournament(_source,
@@ -377,6 +476,17 @@ def FitnessProportional(_source,
             with_replacement=(with_replacement and not without_replacement),
             offset=offset)
 
+def _FiniteByFitness(_source, reverse):
+    '''Returns the individuals in `_source` that have a finite fitness
+    in order of increasing fitness, or decreasing fitness if `reverse`
+    is ``True``.
+    '''
+    population = population_of(_source)
+    if population is not None:
+        return [indiv for indiv in population.ranked(reverse) if not isinf(indiv.fitness.simple)]
+    group = [indiv for indiv in _source if not isinf(indiv.fitness.simple)]
+    return _sorted_by_keys(group, _fitness_keys(group), reverse)
+
 def _GetMinimumFitness(fitness1, fitness2):
     '''Returns the minimum of two fitness values.
     
@@ -396,6 +506,108 @@ def _GetMinimumFitness(fitness1, fitness2):
     
     return fitness1 if fitness2 > fitness1 else fitness2
 
+def _AliasWheel(group, weights):
+    '''Returns an infinite sequence of members of `group`, each selected
+    with probability proportional to the corresponding value in
+    `weights`.
+    
+    Vose's alias method is used, which requires O(n) time to set up and
+    O(1) time for each selection. If every weight is zero, the first
+    member of `group` is always returned.
+    '''
+    size = len(group)
+    total = float(sum(weights))
+    if total <= 0.0:
+        return repeat(group[0])
+    
+    # Each slot contains one individual with probability `prob[i]` and
+    # the individual at `alias[i]` otherwise.
+    scaled = [w * size / total for w in weights]
+    prob = [1.0] * size
+    alias = range(size)
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        i, j = small.pop(), large.pop()
+        prob[i] = scaled[i]
+        alias[i] = j
+        scaled[j] = (scaled[j] + scaled[i]) - 1.0
+        if scaled[j] < 1.0: small.append(j)
+        else: large.append(j)
+    # Slots remaining in either list are only short of 1.0 due to
+    # rounding errors, so their probability is left as 1.0.
+    
+    return _AliasWheelSelect(group, prob, [group[j] for j in alias])
+
+def _AliasWheelSelect(group, prob, alias):
+    '''Returns an infinite sequence of members of `group` using the
+    tables created by `_AliasWheel`.
+    '''
+    frand = rand.random
+    size = len(group)
+    while True:
+        u = frand() * size
+        i = int(u)
+        yield group[i] if u - i < prob[i] else alias[i]
+
+def _CumulativeWheel(group, weights, name):
+    '''Returns each member of `group` once, with each selected with
+    probability proportional to its value in `weights` relative to the
+    remaining members.
+    
+    A binary indexed tree of cumulative weights is searched for each
+    selection and updated when the selected member is removed, requiring
+    O(log n) time for each. Members with zero weight are returned in
+    their original order once every other member has been returned.
+    '''
+    irand = rand.randrange
+    frand = rand.random
+    size = len(group)
+    total = float(sum(weights))
+    
+    # tree[k] contains the sum of weights[k - (k & -k):k]
+    tree = [0.0]
+    tree.extend(weights)
+    for k in xrange(1, size + 1):
+        parent = k + (k & -k)
+        if parent <= size: tree[parent] += tree[k]
+    top = 1
+    while top * 2 <= size: top *= 2
+    
+    remaining = [True] * size
+    positive = sum(1 for w in weights if w > 0.0)
+    while positive:
+        prob = frand() * total
+        
+        # Find the first member where the cumulative weight is not less
+        # than prob.
+        i, step = 0, top
+        while step:
+            k = i + step
+            if k <= size and tree[k] < prob:
+                i = k
+                prob -= tree[k]
+            step //= 2
+        
+        # Fall back on uniform selection if wheel fails
+        if i >= size or not remaining[i]:
+            warn('%s selection wheel failed.' % name)
+            i = [j for j, alive in enumerate(remaining) if alive][irand(sum(remaining))]
+        
+        remaining[i] = False
+        weight = weights[i]
+        if weight > 0.0: positive -= 1
+        total -= weight
+        k = i + 1
+        while k <= size:
+            tree[k] -= weight
+            k += k & -k
+        yield group[i]
+    
+    for i, alive in enumerate(remaining):
+        if alive:
+            yield group[i]
+
 
 def FitnessProportionalNormal(_source, with_replacement=True, offset=None):
     '''Returns a sequence of individuals selected in proportion to their
@@ -421,44 +633,23 @@ def FitnessProportionalNormal(_source, with_replacement=True, offset=None):
         omitted, the minimum fitness value in `_source` is used.
     '''
     group = [indiv for indiv in _source if not isinf(indiv.fitness.simple)]
-    group.sort(key=_key_fitness, reverse=True)
-    irand = rand.randrange
-    frand = rand.random
+    # Equal fitnesses are selected in their original order when every
+    # weight is zero, so the group is not sorted.
     
-    if not group: raise StopIteration
-    if len(group) == 1:
-        yield group[0]
-        raise StopIteration
+    if not group: return iter(())
+    if len(group) == 1: return iter(group)
     
     # adjust all fitnesses to be positive
-    min_fitness = _GetMinimumFitness(min(i.fitness.simple for i in group), offset)
+    fitnesses = [i.fitness.simple for i in group]
+    min_fitness = _GetMinimumFitness(min(fitnesses), offset)
     
-    size = len(group)
-    wheel = [(i.fitness.simple - min_fitness, i) for i in group]
-    assert all(i[0] >= 0.0 for i in wheel), "Fitness scaling failed"
-    total = sum(i[0] for i in wheel)
+    weights = [f - min_fitness for f in fitnesses]
+    assert all(w >= 0.0 for w in weights), "Fitness scaling failed"
     
-    while wheel:
-        prob = frand() * total
-        
-        i = 0
-        while i < size and prob > wheel[i][0]:
-            prob -= wheel[i][0]
-            i += 1
-        # Fall back on uniform selection if wheel fails
-        if i >= size:
-            warn('Fitness proportional selection wheel failed.')
-            i = irand(size)
-        
-        # WITH REPLACEMENT
-        if with_replacement:
-            yield wheel[i][1]
-        # WITHOUT REPLACEMENT
-        else:
-            winner = wheel.pop(i)
-            total -= winner[0]
-            yield winner[1]
-            size -= 1
+    if with_replacement:
+        return _AliasWheel(group, weights)
+    else:
+        return _CumulativeWheel(group, weights, 'Fitness proportional')
 
 @esdl_func('fitness_sus')
 def FitnessProportionalSUS(_source, mu=None, offset=None):
@@ -484,8 +675,7 @@ def FitnessProportionalSUS(_source, mu=None, offset=None):
     assert mu is not True, "mu has no value"
     assert offset is not True, "fitness_offset has no value"
     
-    group = [indiv for indiv in _source if not isinf(indiv.fitness.simple)]
-    group.sort(key=_key_fitness, reverse=True)
+    group = _FiniteByFitness(_source, reverse=True)
     frand = rand.random
     
     if not group: raise StopIteration
@@ -615,43 +805,19 @@ def RankProportionalNormal(_source, with_replacement=True, expectation=1.1, neta
         individuals; otherwise, ``True`` to give the highest
         probabilities to the least fit individuals.
     '''
-    group = [indiv for indiv in _source if not isinf(indiv.fitness.simple)]
-    group.sort(key=_key_fitness, reverse=not invert)
-    irand = rand.randrange
-    frand = rand.random
+    group = _FiniteByFitness(_source, reverse=not invert)
     
-    if not group: raise StopIteration
-    if len(group) == 1:
-        yield group[0]
-        raise StopIteration
+    if not group: return iter(())
+    if len(group) == 1: return iter(group)
     
     if neta is not None: expectation = neta
     size = len(group)
-    wheel = [(expectation - 2.0*(expectation-1.0)*i/(size-1.0), j) for i, j in enumerate(group)]
-    total = sum(i[0] for i in wheel)
+    weights = [expectation - 2.0*(expectation-1.0)*i/(size-1.0) for i in xrange(size)]
     
-    while wheel:
-        prob = frand() * total
-        
-        i = 0
-        if size > 1:
-            while i < size and prob > wheel[i][0]:
-                prob -= wheel[i][0]
-                i += 1
-            # Fall back on uniform selection if wheel fails
-            if i >= size:
-                warn('Rank proportional selection wheel failed.')
-                i = irand(size)
-        
-        # WITH REPLACEMENT
-        if with_replacement:
-            yield wheel[i][1]
-        # WITHOUT REPLACEMENT
-        else:
-            winner = wheel.pop(i)
-            total -= winner[0]
-            yield winner[1]
-            size -= 1
+    if with_replacement:
+        return _AliasWheel(group, weights)
+    else:
+        return _CumulativeWheel(group, weights, 'Rank proportional')
 
 @esdl_func('rank_sus')
 def RankProportionalSUS(_source, mu=None, expectation=1.1, neta=None, invert=False):
@@ -686,8 +852,7 @@ def RankProportionalSUS(_source, mu=None, expectation=1.1, neta=None, invert=Fal
     assert mu is not True, "mu has no value"
     assert expectation is not True, "expectation has no value"
     assert neta is not True, "neta has no value"
-    group = [indiv for indiv in _source if not isinf(indiv.fitness.simple)]
-    group.sort(key=_key_fitness, reverse=not invert)
+    group = _FiniteByFitness(_source, reverse=not invert)
     frand = rand.random
     
     if not group: raise StopIteration
@@ -22,13 +22,47 @@ potential solution to a problem.
 '''
 
 from esec.fitness import Fitness, EmptyFitness
-from esec.context import notify
+from esec.context import count, _context
 from esec.utils.exceptions import EvaluatorError
-from itertools import chain
+from itertools import chain, izip
+
+class _EmptyStatistic(dict):
+    '''An immutable empty dictionary, shared by all individuals that do
+    not have any statistics when `Individual.share_statistic` is set.
+    '''
+    __slots__ = ( )
+    
+    def _immutable(self, *p, **kw):
+        '''Raises `TypeError`.'''
+        raise TypeError('Statistics shared between individuals cannot be modified')
+    
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+    
+    def __reduce__(self):
+        '''Ensures that the shared instance is preserved by ``pickle``.'''
+        return '_EMPTY_STATISTIC'
+
+_EMPTY_STATISTIC = _EmptyStatistic()
+_EMPTY_FITNESS = EmptyFitness()
 
 class Individual(object):
     '''Represents a single member of the population with some type of
     internal genome.
+    
+    Individuals use ``__slots__`` to minimise the memory required for
+    large populations. Derived classes should specify ``__slots__`` for
+    any members they add.
+    '''
+    __slots__ = ( '_fitness', 'birthday', 'genome', 'statistic', '_eval_group', 'species', '_eval' )
+    
+    share_statistic = False
+    '''If ``True``, individuals created without statistics share the
+    ``statistic`` dictionary of their parent, or a single immutable
+    empty dictionary, rather than receiving a copy. This reduces the
+    memory used by large populations, but ``statistic`` must then be
+    replaced rather than modified.
+    
+    Set this on `Individual` to apply it to every species.
     '''
     
     # _birthday is a private class variable used for assigning birthdates
@@ -45,11 +79,11 @@ class Individual(object):
     
     @classmethod
     def _next_birthday(cls):
-        '''Returns the next birthday value. Also notifies the monitor
-        with the notification ``'statistic'`` and value ``'births'``.
+        '''Returns the next birthday value. Also increments the
+        ``'births'`` statistic using `esec.context.count`.
         '''
         cls._birthday += 1
-        notify('individual', 'statistic', 'births')
+        count('births')
         return cls._birthday
     
     def __init__(self, genes, parent, statistic=None):
@@ -75,19 +109,32 @@ class Individual(object):
         '''
         assert genes, "Genes must be provided"
         assert parent, "Parent must be provided"
-        self._fitness = EmptyFitness()
+        self._fitness = _EMPTY_FITNESS
         '''The fitness of this individual. `EmptyFitness` indicates that
         a fitness evaluation is required, after which it is replaced by
         an instance of `Fitness`.
         '''
         self.birthday = None
         '''The birthday value for this individual.'''
-        self.genome = list(genes)
+        self.genome = parent.species.genome_type(genes)
         '''The gene values for this individual. Gene values are
         considered immutable.
+        
+        This is a list unless the species stores genomes in another
+        type (see `esec.species.Species.genome_type`).
         '''
-        self.statistic = statistic or { }
+        self.statistic = statistic
         '''The statistics specifically associated with this individual.
+        
+        If `share_statistic` is set, this dictionary may be shared with
+        other individuals and should not be modified. Assign a new
+        dictionary to change the values.
+        '''
+        self._eval_group = None
+        '''The group this individual was most recently placed in while
+        its fitness was unknown. When the fitness is first requested,
+        every unevaluated member of the group is evaluated in a single
+        call. See `defer_evaluation`.
         '''
         
         # Species classes provide default values for species, _eval and
@@ -100,11 +147,19 @@ class Individual(object):
         # We are allowed to read parent._eval
         self._eval = parent._eval      #pylint: disable=W0212
         
-        for key, value in parent.statistic.iteritems():
-            if key in self.statistic:
-                self.statistic[key] += value
+        parent_statistic = parent.statistic
+        if not statistic:
+            if self.share_statistic:
+                # Share the parent's statistics rather than copying them
+                self.statistic = parent_statistic or _EMPTY_STATISTIC
             else:
-                self.statistic[key] = value
+                self.statistic = dict(parent_statistic)
+        else:
+            for key, value in parent_statistic.iteritems():
+                if key in statistic:
+                    statistic[key] += value
+                else:
+                    statistic[key] = value
     
     def born(self):
         '''Sets the individual's birthday to the next available value.
@@ -146,6 +201,10 @@ class Individual(object):
         AttributeError is raised. (This matches the standard behaviour
         for an unknown attribute.)
         '''
+        # Special members and an unset species are never forwarded. This
+        # allows individuals to be copied and pickled.
+        if name == 'species' or name.startswith('__'):
+            raise AttributeError(name)
         return getattr(self.species, name)
     
     # Pylint doesn't understand properties correctly
@@ -161,19 +220,29 @@ class Individual(object):
         uninitialises the value.
         '''
         if not isinstance(self._fitness, Fitness):
-            # use `notify` rather than `statistic` to ensure that all
+            group = self._eval_group
+            if group is not None:
+                # Evaluate every pending member of our group at once.
+                # `self` is included explicitly in case it has since
+                # been removed from the group.
+                evaluate(chain(group, (self,)))
+                return self._fitness
+            elif getattr(_context, 'fitness_cache', None) is not None:
+                evaluate((self,))
+                return self._fitness
+            
+            # use `count` rather than `statistic` to ensure that all
             # evals are counted. `statistic` is intended for counting
             # events that only matter if the individual survives.
             if not self._eval: self._eval = self._eval_default
             try:
                 self.fitness = self._eval.eval(self)
-                notify('individual', 'statistic', 'local_evals+global_evals')
+                count('local_evals')
+                count('global_evals')
             except KeyboardInterrupt:
                 raise
             except:
-                import sys, traceback
-                ex = sys.exc_info()
-                raise EvaluatorError(ex[0], ex[1], ''.join(traceback.format_exception(*ex)))
+                _raise_evaluator_error()
         return self._fitness
     
     @fitness.setter
@@ -181,13 +250,14 @@ class Individual(object):
         if isinstance(value, (Fitness, EmptyFitness)):
             self._fitness = value
         elif value is None:
-            self._fitness = EmptyFitness()
+            self._fitness = _EMPTY_FITNESS
         else:
             self._fitness = Fitness(value)
     
     @fitness.deleter
     def fitness(self):
-        self._fitness = EmptyFitness()
+        self._fitness = _EMPTY_FITNESS
+        self._eval_group = None
     
     #pylint: enable=E0102,E0202,E1101,C0111
     
@@ -254,6 +324,139 @@ class Individual(object):
         return str(len(self))
 
 
+def _raise_evaluator_error():
+    '''Raises an `EvaluatorError` describing the exception currently
+    being handled.
+    '''
+    import sys, traceback
+    ex = sys.exc_info()
+    raise EvaluatorError(ex[0], ex[1], ''.join(traceback.format_exception(*ex)))
+
+def evaluate(individuals):
+    '''Evaluates every member of `individuals` that does not yet have a
+    fitness.
+    
+    Pending individuals are grouped by evaluator and each evaluator is
+    called once with all of its individuals. Evaluators providing an
+    ``eval_batch(individuals)`` method receive the entire list and must
+    return a matching sequence of fitness values. Evaluators with only
+    an ``eval(indiv)`` method are called for each individual in turn.
+    
+    Objects in `individuals` that are not derived from `Individual`,
+    and individuals that already have a fitness, are ignored.
+    
+    If an `esec.cache.FitnessCache` has been configured for the current
+    system, individuals with a cached fitness are not evaluated again.
+    If an `esec.pool.EvaluatorPool` has been configured for the current
+    system and it supports the evaluator, the batch is evaluated by the
+    pool's worker processes instead.
+    
+    :Parameters:
+      individuals : iterable(`Individual`)
+        The individuals to evaluate.
+    '''
+    batches = [ ]
+    seen = set()
+    for indiv in individuals:
+        if not isinstance(indiv, Individual): continue
+        indiv._eval_group = None                #pylint: disable=W0212
+        if isinstance(indiv._fitness, Fitness): continue    #pylint: disable=W0212
+        if id(indiv) in seen: continue
+        seen.add(id(indiv))
+        
+        evaluator = indiv._eval                 #pylint: disable=W0212
+        if not evaluator: evaluator = indiv._eval = indiv._eval_default  #pylint: disable=W0212
+        for batch_eval, batch in batches:
+            if batch_eval is evaluator:
+                batch.append(indiv)
+                break
+        else:
+            batches.append((evaluator, [indiv]))
+    
+    pool = getattr(_context, 'evaluator_pool', None)
+    cache = getattr(_context, 'fitness_cache', None)
+    for evaluator, batch in batches:
+        keys = duplicates = None
+        if cache is not None and cache.handles(evaluator):
+            total = len(batch)
+            batch, keys, duplicates = _find_cached(cache, evaluator, batch)
+            count('local_cache_hits', total - len(batch))
+            count('global_cache_hits', total - len(batch))
+            count('local_cache_misses', len(batch))
+            count('global_cache_misses', len(batch))
+        
+        try:
+            eval_batch = getattr(evaluator, 'eval_batch', None)
+            if pool is not None and pool.handles(evaluator):
+                fitnesses = pool.eval_batch(evaluator, batch)
+            elif eval_batch is None:
+                fitnesses = [evaluator.eval(indiv) for indiv in batch]
+            else:
+                fitnesses = eval_batch(batch)
+            for indiv, fitness in izip(batch, fitnesses):
+                indiv.fitness = fitness
+        except KeyboardInterrupt:
+            raise
+        except:
+            _raise_evaluator_error()
+        if keys:
+            for key, indiv in izip(keys, batch):
+                if key is not None: cache.set(key, indiv._fitness)    #pylint: disable=W0212
+        if duplicates:
+            for indiv, original in duplicates:
+                indiv.fitness = original._fitness   #pylint: disable=W0212
+        # use `count` rather than `statistic` to ensure that all evals
+        # are counted.
+        count('local_evals', len(batch))
+        count('global_evals', len(batch))
+
+def _find_cached(cache, evaluator, batch):
+    '''Assigns fitness values from `cache` to the members of `batch`.
+    
+    :Returns:
+        A tuple containing the individuals that need to be evaluated,
+        their keys in `cache` (``None`` for individuals that cannot be
+        cached), and a list of ``(indiv, original)`` pairs where
+        ``indiv`` has the same key as ``original`` and should receive
+        its fitness after evaluation.
+    '''
+    remaining, keys, duplicates = [ ], [ ], [ ]
+    pending = { }
+    for indiv in batch:
+        key = cache.key(evaluator, indiv)
+        if key is None:
+            remaining.append(indiv)
+            keys.append(None)
+        elif key in pending:
+            duplicates.append((indiv, pending[key]))
+        else:
+            fitness = cache.get(key)
+            if fitness is None:
+                pending[key] = indiv
+                remaining.append(indiv)
+                keys.append(key)
+            else:
+                indiv.fitness = fitness
+    return remaining, keys, duplicates
+
+def defer_evaluation(group):
+    '''Associates every unevaluated member of `group` with `group`, so
+    that requesting the fitness of any one of them evaluates all of them
+    using `evaluate`.
+    
+    Evaluation remains lazy: if no fitness is ever requested, no
+    evaluations occur.
+    
+    :Parameters:
+      group : list(`Individual`)
+        The group to associate individuals with. This should not be
+        modified after calling `defer_evaluation`.
+    '''
+    for indiv in group:
+        if isinstance(indiv, Individual) and not isinstance(indiv._fitness, Fitness):  #pylint: disable=W0212
+            indiv._eval_group = group           #pylint: disable=W0212
+
+
 # EmptyIndividual and OnIndividual have no public methods
 #pylint: disable=R0903
 class EmptyIndividual(object):
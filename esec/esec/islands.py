@@ -0,0 +1,339 @@
+'''Provides the `IslandModel` class, which runs multiple experiments as
+islands in separate processes and migrates individuals between them.
+
+Each island is a normal `Experiment` configuration, which may use the
+same or a different ESDL definition. Every ``interval`` steps, each
+island sends ``count`` individuals from one of its groups to the islands
+it is connected to. For example::
+    
+    config = {
+        'random_seed': 12345,
+        'islands': [island_config] * 4,
+        'migration': {
+            'interval': 5,
+            'count': 2,
+            'group': 'population',
+            'topology': 'ring',
+            'select': 'best',
+        },
+    }
+    
+    results = IslandModel(config).run()
+
+Received individuals are made available to the ESDL definition of each
+island as the group ``immigrants``, which is empty except for the step
+immediately following a migration. Definitions may include them using
+normal ESDL statements::
+    
+    BEGIN generation
+        FROM population, immigrants SELECT 100 population USING best
+        ...
+    END generation
+
+Alternatively, setting ``replace`` to ``'worst'`` or ``'random'``
+replaces members of ``group`` with the immigrants before the next step,
+which allows existing definitions to be used without modification.
+
+Individuals are sent between processes as their genome and fitness
+only, and are recreated using a member of the receiving group as their
+parent. Islands exchanging individuals must use compatible species.
+
+Islands that do not specify a ``random_seed`` use a seed derived from
+the island model's seed and their index (see `esec.context.derive_seed`),
+so each island uses an independent sequence of random numbers and
+repeated runs produce identical results.
+'''
+
+import multiprocessing
+import random
+import signal
+import sys
+import traceback
+
+from esec.context import derive_seed
+from esec.utils import ConfigDict, cfg_validate
+from esec.generators import _key_fitness
+from esec.experiment import Experiment
+
+def ring(count, rand):      #pylint: disable=W0613
+    '''Connects each island to the next island.'''
+    return [[(i + 1) % count] for i in xrange(count)] if count > 1 else [[]]
+
+def fully_connected(count, rand):   #pylint: disable=W0613
+    '''Connects each island to every other island.'''
+    return [[j for j in xrange(count) if j != i] for i in xrange(count)]
+
+def random_pairs(count, rand):
+    '''Connects each island to one other island, chosen randomly for
+    each migration.'''
+    return [[rand.choice([j for j in xrange(count) if j != i])] if count > 1 else []
+            for i in xrange(count)]
+
+TOPOLOGIES = {
+    'ring': ring,
+    'full': fully_connected,
+    'random': random_pairs,
+}
+'''The topologies that may be specified by name. Each function takes the
+number of islands and a random number generator, and returns a list
+containing the destination indices for each island.'''
+
+def _select_best(group, count, rand):   #pylint: disable=W0613
+    '''Returns the `count` individuals in `group` with the highest
+    fitness.'''
+    return sorted(group, key=_key_fitness, reverse=True)[:count]
+
+def _select_random(group, count, rand):
+    '''Returns `count` randomly chosen individuals from `group`.'''
+    return rand.sample(group, min(count, len(group)))
+
+SELECTION = {
+    'best': _select_best,
+    'random': _select_random,
+}
+'''The policies for choosing emigrants.'''
+
+def _replace_worst(group, immigrants, rand):    #pylint: disable=W0613
+    '''Returns `group` with its worst members replaced by
+    `immigrants`.'''
+    survivors = sorted(group, key=_key_fitness, reverse=True)[:max(0, len(group) - len(immigrants))]
+    return survivors + immigrants[:len(group)]
+
+def _replace_random(group, immigrants, rand):
+    '''Returns `group` with randomly chosen members replaced by
+    `immigrants`.'''
+    group = list(group)
+    for i, indiv in zip(rand.sample(xrange(len(group)), min(len(group), len(immigrants))), immigrants):
+        group[i] = indiv
+    return group
+
+REPLACEMENT = {
+    None: None,
+    'worst': _replace_worst,
+    'random': _replace_random,
+}
+'''The policies for adding immigrants to an island's group.'''
+
+def _run_island(cfg, migration, conn):
+    '''Runs a single island within a worker process.
+    
+    Every ``migration.interval`` steps, a list of emigrant records is
+    sent to the main process and a list of immigrant records is
+    received. When the experiment terminates, a summary is sent instead.
+    
+    Interrupts are ignored by islands and handled in the main process.
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        experiment = Experiment(cfg)
+        system = experiment.system
+        context = system._context   #pylint: disable=W0212
+        rand = context['rand']
+        select = SELECTION[migration.select]
+        replace = REPLACEMENT[migration.replace]
+        group_name = migration.group
+        
+        emigrated = immigrated = steps = 0
+        context['immigrants'] = [ ]
+        experiment.begin()
+        running = True
+        while running:
+            running = experiment.step()
+            if not running:
+                break
+            steps += 1
+            context['immigrants'] = [ ]
+            if steps % migration.interval:
+                continue
+            
+            group = context.get(group_name) or [ ]
+            emigrants = [(indiv.genome, indiv.fitness) for indiv in select(group, migration.count, rand)]
+            emigrated += len(emigrants)
+            conn.send(('migrate', emigrants))
+            records = conn.recv()
+            if not records or not group:
+                continue
+            
+            template = group[0]
+            immigrants = [ ]
+            for genome, fitness in records:
+                indiv = type(template)(genome, template)
+                indiv.fitness = fitness
+                immigrants.append(indiv)
+            immigrated += len(immigrants)
+            
+            if replace:
+                context[group_name] = replace(group, immigrants, rand)
+            else:
+                context['immigrants'] = immigrants
+        experiment.close()
+        
+        group = context.get(group_name) or [ ]
+        best = max(group, key=_key_fitness) if group else None
+        conn.send(('done', {
+            'best': (best.genome, best.fitness) if best else None,
+            'steps': steps,
+            'emigrants': emigrated,
+            'immigrants': immigrated,
+        }))
+    except:     #pylint: disable=W0702
+        conn.send(('error', ''.join(traceback.format_exception(*sys.exc_info()))))
+    finally:
+        conn.close()
+
+class IslandModel(object):
+    '''Runs a set of experiments as islands in separate processes and
+    periodically migrates individuals between them.
+    
+    This class is instantiated with a dictionary matching `syntax`.
+    '''
+    
+    syntax = {
+        'random_seed': [int, None],
+        'islands': list,
+        'migration': {
+            'interval': int,
+            'count': int,
+            'group': str,
+            'topology': '*',
+            'select': str,
+            'replace': [str, None],
+        },
+    }
+    '''The expected format of the configuration dictionary passed to
+    `__init__`.
+    
+    Members:
+      random_seed : (int [optional])
+        The seed value used to choose random destinations and the
+        default seed for each island.
+      
+      islands : (list of dictionaries)
+        The `Experiment` configuration for each island.
+      
+      migration : (dictionary)
+        The number of steps between migrations (``interval``), the
+        number of individuals sent by each island (``count``), the
+        group they are taken from (``group``), the name of a topology in
+        `TOPOLOGIES` or a function with the same signature
+        (``topology``), the name of a policy in `SELECTION`
+        (``select``) and the name of a policy in `REPLACEMENT` or
+        ``None`` (``replace``).
+    '''
+    
+    default = {
+        'random_seed': None,
+        'migration': {
+            'interval': 10,
+            'count': 1,
+            'group': 'population',
+            'topology': 'ring',
+            'select': 'best',
+            'replace': None,
+        },
+    }
+    '''The default values to use for unspecified keys in `syntax`.
+    '''
+    
+    def __init__(self, cfg):
+        '''Initialises a new island model with configuration dictionary
+        `cfg`. `cfg` must match the syntax given in `syntax`.
+        
+        :Exceptions:
+          - `ValueError`: An unknown topology or policy was specified.
+        '''
+        self.cfg = ConfigDict(self.default)
+        self.cfg.overlay(cfg)
+        cfg_validate(self.cfg, self.syntax, 'IslandModel', warnings=True)
+        
+        migration = self.cfg.migration
+        self.topology = migration.topology
+        if not callable(self.topology):
+            self.topology = TOPOLOGIES.get(self.topology)
+            if self.topology is None:
+                raise ValueError('Unknown topology: %r' % migration.topology)
+        if migration.select not in SELECTION:
+            raise ValueError('Unknown selection policy: %r' % migration.select)
+        if migration.replace not in REPLACEMENT:
+            raise ValueError('Unknown replacement policy: %r' % migration.replace)
+        
+        try:
+            self.random_seed = int(self.cfg.random_seed)
+        except TypeError:
+            random.seed()
+            self.random_seed = self.cfg.random_seed = random.randrange(0, sys.maxint)
+        self.rand = random.Random(derive_seed(self.random_seed, 'migration'))
+        
+        self.islands = [ ]
+        for i, island in enumerate(self.cfg.islands):
+            island = ConfigDict(island)
+            if island.random_seed is None:
+                island.random_seed = derive_seed(self.random_seed, 'island', i)
+            self.islands.append(island)
+        
+        self.migrations = 0
+        '''The number of migrations that have occurred.'''
+    
+    def run(self):
+        '''Runs every island until it terminates.
+        
+        :Returns:
+            A list containing a dictionary for each island with the
+            record of the best individual in its group (``best``) as a
+            tuple of genome and fitness, the number of steps executed
+            (``steps``) and the number of individuals sent
+            (``emigrants``) and received (``immigrants``).
+        
+        :Exceptions:
+          - `RuntimeError`: An exception occurred within an island.
+        '''
+        count = len(self.islands)
+        conns = [ ]
+        processes = [ ]
+        for island in self.islands:
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_run_island,
+                                              args=(island, self.cfg.migration, child_conn))
+            process.daemon = True
+            process.start()
+            child_conn.close()
+            conns.append(parent_conn)
+            processes.append(process)
+        
+        results = [None] * count
+        errors = [ ]
+        try:
+            active = range(count)
+            while active:
+                emigrants = { }
+                for i in active:
+                    kind, value = conns[i].recv()
+                    if kind == 'migrate':
+                        emigrants[i] = value
+                    elif kind == 'done':
+                        results[i] = value
+                    else:
+                        errors.append('Island %d:\n%s' % (i, value))
+                active = sorted(emigrants)
+                if not active:
+                    break
+                
+                immigrants = dict((i, [ ]) for i in active)
+                for i, destinations in enumerate(self.topology(count, self.rand)):
+                    for dest in destinations:
+                        if i in emigrants and dest in immigrants:
+                            immigrants[dest].extend(emigrants[i])
+                for i in active:
+                    conns[i].send(immigrants[i])
+                self.migrations += 1
+        except:
+            for process in processes:
+                process.terminate()
+            raise
+        finally:
+            for process in processes:
+                process.join()
+        
+        if errors:
+            raise RuntimeError('\n'.join(errors))
+        return results
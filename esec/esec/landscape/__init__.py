@@ -54,6 +54,9 @@ interchangeable.)
   ``self.size.exact``. If ``size_equals_parameters`` is ``True`` and
   ``cfg.parameters`` is provided, the value of ``cfg.parameters`` is
   used for ``self.size.exact``.
+- Fitness values are assumed to depend only on the individual, which
+  allows them to be reused by `esec.cache.FitnessCache`. Landscapes
+  with noisy fitness values should set ``deterministic`` to ``False``.
 - If a ``self._eval`` method has been defined in the subclass, it is
   bound to the instance attribute ``self.eval`` through a function that
   wraps the returned fitness in a `FitnessMaximise` or `FitnessMinimise`
@@ -93,6 +96,7 @@ class Landscape(object):
     
     maximise = True # is the default objective maximise? (ie fitness)
     size_equals_parameters = True # should size.exact == parameters?
+    deterministic = True # are fitness values repeatable? (see esec.cache)
     syntax = { # configuration syntax key's and type. MERGED
         'class?': type, # specific class of landscape
         'instance?': '*', # landscape instance
@@ -192,6 +196,20 @@ class Landscape(object):
         if isinstance(fitness, Fitness): return fitness
         else: return FitnessMinimise(fitness + self.offset)
     
+    def eval_batch(self, individuals):
+        '''Evaluates each of the provided individuals and returns a list
+        of their fitnesses in the same order.
+        
+        By default, this calls ``eval`` for each individual. Subclasses
+        may override this to amortise the cost of evaluation across an
+        entire group, for example, by vectorising or parallelising the
+        calculation.
+        
+        :See: esec.individual.evaluate
+        '''
+        evaluate = self.eval
+        return [evaluate(indiv) for indiv in individuals]
+    
     def legal(self, indiv): #pylint: disable=W0613,R0201
         '''Determines whether the specified individual is legal.
         
@@ -233,11 +251,8 @@ class Landscape(object):
 # Expose landscapes by names and provide easy landscape load(cfg)
 #=======================================================================
 
-LANDSCAPES = []
-'''An automatically generated list of the available landscape types.'''
-
-def _do_import():
-    '''Automatically populates LANDSCAPES with all the modules in the
+def _do_import(landscapes):
+    '''Automatically populates `landscapes` with all the modules in the
     folder.
     
     :Note:
@@ -263,6 +278,36 @@ def _do_import():
                     not hasattr(cls, 'eval')):
                     continue
                 # All good
-                LANDSCAPES.append(cls)
+                list.append(landscapes, cls)
+
+class _LandscapeList(list):
+    '''A list that imports every landscape module when it is first used.
+    
+    Importing this package does not import the modules containing the
+    landscapes, since most programs only use one of them.
+    '''
+    _loaded = False
+    
+    def _load(self):
+        '''Populates the list if it has not been populated.'''
+        if not self._loaded:
+            self._loaded = True
+            _do_import(self)
+        return self
+    
+    def __len__(self):              return list.__len__(self._load())
+    def __iter__(self):             return list.__iter__(self._load())
+    def __reversed__(self):         return list.__reversed__(self._load())
+    def __contains__(self, item):   return list.__contains__(self._load(), item)
+    def __getitem__(self, key):     return list.__getitem__(self._load(), key)
+    def __getslice__(self, i, j):   return list.__getslice__(self._load(), i, j)
+    def __repr__(self):             return list.__repr__(self._load())
+    def __eq__(self, other):        return list.__eq__(self._load(), other)
+    def __ne__(self, other):        return list.__ne__(self._load(), other)
+    def index(self, item, *args):   return list.index(self._load(), item, *args)
+    def count(self, item):          return list.count(self._load(), item)
 
-_do_import()
+LANDSCAPES = _LandscapeList()
+'''An automatically generated list of the available landscape types.
+The modules containing the landscapes are imported when the list is
+first used.'''
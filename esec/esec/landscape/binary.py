@@ -12,6 +12,7 @@ Most of these binary landscapes are problem generators.
 
 from itertools import izip
 from esec.landscape import Landscape
+from esec.species.binary import BitGenome
 from esec.species.joined import JoinedIndividual
 
 #=======================================================================
@@ -25,6 +26,40 @@ def inttobinlist(n, count=24):
     '''
     return [int((n >> y) & 1) for y in xrange(count - 1, -1, -1)]
 
+def _packed_bits(indiv, size):
+    '''Returns the bits of the phenome of `indiv` if it is a
+    `BitGenome` with `size` genes. Otherwise, returns ``None``.
+    
+    Gene ``i`` is stored in bit ``i``, so consecutive blocks of three
+    or four genes appear as consecutive octal or hexadecimal digits.
+    '''
+    phenome = getattr(indiv, 'phenome', indiv)
+    if type(phenome) is BitGenome and phenome.length == size:
+        return phenome.bits
+    return None
+
+def _digit_values(table):
+    '''Returns a list of ``(digit, value)`` tuples containing the
+    hexadecimal digit for each block of genes in `table` and its value.
+    '''
+    return sorted(('%x' % sum(g << i for i, g in enumerate(block)), value)
+                  for block, value in table.iteritems())
+
+def _sum_digits(digits, count, values):
+    '''Returns the sum of the values of each digit in `digits`, which is
+    padded with zeros to `count` digits. `values` is a list returned by
+    `_digit_values`.
+    '''
+    total = counted = 0
+    for digit, value in values:
+        if digit == '0':
+            zero = value
+        else:
+            n = digits.count(digit)
+            total += n * value
+            counted += n
+    return total + (count - counted) * zero
+
 
 #=======================================================================
 class Binary(Landscape):
@@ -76,6 +111,9 @@ class OneMax(Binary):
     def _eval(self, indiv):
         '''Count the bits.
         '''
+        phenome = getattr(indiv, 'phenome', indiv)
+        if type(phenome) is BitGenome:
+            return phenome.popcount()
         return sum(indiv)
 
 
@@ -127,6 +165,8 @@ class RoyalRoad(Binary):
         Q = self.Q = self.cfg.Q
         C = self.C = self.cfg.C
         self.size.min = self.size.max = self.size.exact = Q * C
+        # bit set at the start of each block, used for packed genomes
+        self._starts = sum(1 << i for i in xrange(0, Q * C, C))
     
     def phenome_string(self, indiv):
         '''Returns a phenome string with separators between every ``C``
@@ -137,8 +177,19 @@ class RoyalRoad(Binary):
     
     def _eval(self, indiv):
         '''f(x) = sum(blocks(x)) * C'''
-        total = 0
         C = self.C
+        bits = _packed_bits(indiv, self.size.exact)
+        if bits is not None:
+            # AND each bit with the following C-1 bits, doubling the
+            # span each time, so the start of each full block is set
+            span = 1
+            while span < C:
+                shift = min(span, C - span)
+                bits &= bits >> shift
+                span += shift
+            return bin(bits & self._starts).count('1') * C
+        
+        total = 0
         for i in xrange(0, self.size.exact, C):
             q = indiv[i:i+C] # get each block of C genes
             if sum(q) == C:
@@ -182,9 +233,14 @@ class GoldbergD3B(Binary):
         self.size.exact = self.N * 3
         self.size.min = self.size.exact
         self.size.max = self.size.exact
+        self._digit_values = _digit_values(self.max_x)
     
     def _eval(self, indiv):
         '''Map each segment of 3-bits and sum for the result.'''
+        bits = _packed_bits(indiv, self.size.exact)
+        if bits is not None:
+            return _sum_digits('%o' % bits, self.N, self._digit_values)
+        
         total = 0
         for i in xrange(0, self.size.exact, 3):
             xi = indiv[i:i+3] # get each block of 3 bits
@@ -232,9 +288,14 @@ class WhitleyD4B(Binary):
         self.size.min = self.size.exact
         self.size.max = self.size.exact
         self.limit = self.size.exact * 30.0
+        self._digit_values = _digit_values(self.max_x)
     
     def _eval(self, indiv):
         '''Map each segment of 4-bits and sum for the result.'''
+        bits = _packed_bits(indiv, self.size.exact)
+        if bits is not None:
+            return _sum_digits('%x' % bits, self.N, self._digit_values)
+        
         total = 0
         for i in xrange(0, self.size.exact, 4):
             xi = indiv[i:i+4] # get each block of 4 bits
@@ -657,11 +718,24 @@ class MMDP6(Binary):
         self.subs = self.cfg.subs or self.cfg.parameters
         # set total number of binary genes (bits) needed; multiple of 6-bits
         self.size.min = self.size.max = self.size.exact = 6 * self.subs
+        # bit set at the start of each substring, used for packed genomes
+        self._starts = sum(1 << i for i in xrange(0, 6 * self.subs, 6))
     
     def _eval(self, indiv):
         '''Evaluate MMDP 6 bit.'''
-        total = 0
         payoff = self.payoff
+        bits = _packed_bits(indiv, self.size.exact)
+        if bits is not None:
+            # Sum the bits of each substring into its lowest three bits,
+            # which then appear as every second octal digit
+            unitation = 0
+            for i in xrange(6):
+                unitation += (bits >> i) & self._starts
+            digits = ('%o' % unitation)[::-2]
+            values = [(str(u), payoff[u]) for u in xrange(7)]
+            return _sum_digits(digits, self.subs, values)
+        
+        total = 0
         
         for i in xrange(0, self.size.exact, 6):
             si = indiv[i:i+6] # get each block of 6 bits
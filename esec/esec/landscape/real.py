@@ -6,13 +6,25 @@
 The `Real` base class inherits from `Landscape` for parameter validation
 and support. See `landscape` for details.
 
+Landscapes that provide an ``_eval_matrix`` method in addition to
+``_eval`` evaluate groups of individuals using NumPy. ``_eval_matrix``
+receives a matrix containing one genome per row and returns an array of
+the values that ``_eval`` would return for each row. If NumPy is not
+available, or the genomes have different lengths, ``_eval`` is used for
+each individual instead.
+
 '''
 
 from math import sin, cos, fabs, sqrt, pi, e, exp, log
 from itertools import izip
-from esec.fitness import SimpleDominatingFitness
+from esec.fitness import FitnessMaximise, FitnessMinimise, SimpleDominatingFitness
 from esec.landscape import Landscape
-from esec.utils import all_equal
+from esec.utils import all_equal, genome_matrix
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 #=======================================================================
 class Real(Landscape):
@@ -77,6 +89,36 @@ class Real(Landscape):
         Use `legal` on a genome to determine whether all genes are in
         the legal range.
         '''
+        
+        # The matrix evaluation is only used if it is defined by the
+        # same class as _eval, and eval has not been overridden.
+        owner = next((cls for cls in type(self).__mro__ if '_eval' in cls.__dict__), None)
+        self._use_matrix = (numpy is not None and '_eval_matrix' in getattr(owner, '__dict__', ()) and
+                            'eval' in self.__dict__)
+    
+    def eval_batch(self, individuals):
+        '''Evaluates each of the provided individuals and returns a list
+        of their fitnesses in the same order.
+        
+        If the landscape provides ``_eval_matrix``, the individuals are
+        evaluated together using NumPy.
+        '''
+        if not self._use_matrix or len(individuals) < 2:
+            return super(Real, self).eval_batch(individuals)
+        length = len(individuals[0])
+        if any(len(indiv) != length for indiv in individuals):
+            return super(Real, self).eval_batch(individuals)
+        
+        if all(indiv.phenome is indiv.genome for indiv in individuals):
+            matrix = genome_matrix(individuals, length)
+        else:
+            # The genome is an encoding of the phenome (for example, in
+            # BinaryRealIndividual), so the phenome is evaluated.
+            matrix = numpy.array([list(indiv) for indiv in individuals], dtype=float)
+        values = self._eval_matrix(matrix)   #pylint: disable=E1101
+        fitness_type = FitnessMinimise if self.maximise == self.invert else FitnessMaximise
+        offset = self.offset
+        return [fitness_type(value + offset) for value in values.tolist()]
     
     def legal(self, indiv):
         '''Check to see if an individual is legal.'''
@@ -234,6 +276,10 @@ class Stabilising(Real):
         for x in indiv:
             result += I * (g_sq / ((m-x)**2 + g_sq))
         return result
+    
+    def _eval_matrix(self, X):
+        g_sq = self.gamma_sq
+        return (self.amp * (g_sq / ((self.mean-X)**2 + g_sq))).sum(axis=1)
 
 #=======================================================================
 class Disruptive(Real):
@@ -278,6 +324,11 @@ class Disruptive(Real):
         for x in indiv:
             result += I - I * (g_sq / ((m-x)**2 + g_sq))
         return result
+    
+    def _eval_matrix(self, X):
+        g_sq = self.gamma_sq
+        I = self.amp
+        return (I - I * (g_sq / ((self.mean-X)**2 + g_sq))).sum(axis=1)
 
 #=======================================================================
 # Optimisation Standards
@@ -315,6 +366,9 @@ class Sphere(Real):
         '''
         return sum(v*v for v in indiv)
     
+    def _eval_matrix(self, X):
+        return (X*X).sum(axis=1)
+
 
 #rename Parabola (EC) to the more common standard Sphere
 Parabola = Sphere
@@ -348,6 +402,9 @@ class Ellipsoid(Real):
     def _eval(self, indiv):
         '''f(x) = sum(i^2 * x(i)^2)'''
         return sum(((i+1) * x*x) for i, x in enumerate(indiv))
+    
+    def _eval_matrix(self, X):
+        return (numpy.arange(1, X.shape[1]+1) * X*X).sum(axis=1)
 
 
 #=======================================================================
@@ -376,6 +433,9 @@ class HyperEllipsoid(Real):
         '''f(x) = sum(i^2 * x(i)^2)
         '''
         return sum(((i+1)**2 * x*x) for i, x in enumerate(indiv))
+    
+    def _eval_matrix(self, X):
+        return (numpy.arange(1, X.shape[1]+1)**2 * X*X).sum(axis=1)
 
 
 #=======================================================================
@@ -406,14 +466,21 @@ class Quadric(Real):
     test_cfg = ('2 -65.536 65.536',)
     
     def _eval(self, indiv):
-        '''f() = sum_{i=1 }^{n }( (sum_{j=1 }^{i }{x_j })^2)'''
+        '''f() = sum_{i=1 }^{n }( (sum_{j=1 }^{i }{x_j })^2)
+        
+        The inner sum is accumulated as a running total, so each term
+        adds one value to the previous sum.
+        '''
         total = 0
-        for i in xrange(len(indiv)):
-            tmp = 0
-            for j in xrange(i+1):
-                tmp += indiv[j]
+        tmp = 0
+        for x in indiv:
+            tmp += x
             total += tmp**2
         return total
+    
+    def _eval_matrix(self, X):
+        return (X.cumsum(axis=1)**2).sum(axis=1)
+
 RotatedHyperEllipsoid = Quadric
 
 #=======================================================================
@@ -435,6 +502,7 @@ class NoisyQuartic(Real):
     '''
     lname = 'Noisy Quartic'
     maximise = False
+    deterministic = False
     
     default = { 'size': { 'min': 2, 'max': 2 }, 'bounds': { 'lower': -5.12, 'upper': 5.12 } }
     
@@ -482,6 +550,10 @@ class Easom(Real):
         x1, x2 = indiv
         result = cos(x1) * cos(x2) * exp(-((x1-pi)**2 + (x2-pi)**2))
         return result
+    
+    def _eval_matrix(self, X):
+        x1, x2 = X[:, 0], X[:, 1]
+        return numpy.cos(x1) * numpy.cos(x2) * numpy.exp(-((x1-pi)**2 + (x2-pi)**2))
 
 #=======================================================================
 class Rosenbrock(Real):
@@ -523,6 +595,10 @@ class Rosenbrock(Real):
             total += (1-x)*(1-x) + 100*(y-x*x)*(y-x*x)
             x = y
         return total
+    
+    def _eval_matrix(self, X):
+        x, y = X[:, :-1], X[:, 1:]
+        return ((1-x)*(1-x) + 100*(y-x*x)*(y-x*x)).sum(axis=1)
 
 #=======================================================================
 class Rastrigin(Real):
@@ -559,6 +635,9 @@ class Rastrigin(Real):
         '''f() = 10*n + sum((x_i)^2 - 10cos(2*pi*x_i))'''
         c = 2*pi
         return 10*len(indiv) + sum( x*x - 10*cos(c*x) for x in indiv)
+    
+    def _eval_matrix(self, X):
+        return 10*X.shape[1] + (X*X - 10*numpy.cos(2*pi*X)).sum(axis=1)
 
 #=======================================================================
 class Griewangk(Real):
@@ -597,6 +676,10 @@ class Griewangk(Real):
             total += x*x
             prod *= cos(x/sqrt(i+1))
         return 1 + (total / 4000.) - prod
+    
+    def _eval_matrix(self, X):
+        divisors = numpy.sqrt(numpy.arange(1, X.shape[1]+1))
+        return 1 + ((X*X).sum(axis=1) / 4000.) - numpy.cos(X / divisors).prod(axis=1)
 
 
 
@@ -642,6 +725,12 @@ class Ackley(Real):
             s1 += x*x
             s2 += cos(c*x)
         return -20 * exp(-0.2*sqrt((1/n)*s1)) - exp((1/n)*s2) + 20 + e
+    
+    def _eval_matrix(self, X):
+        n = float(X.shape[1])
+        s1 = (X*X).sum(axis=1)
+        s2 = numpy.cos(2*pi*X).sum(axis=1)
+        return -20 * numpy.exp(-0.2*numpy.sqrt((1/n)*s1)) - numpy.exp((1/n)*s2) + 20 + e
 
 
 
@@ -678,6 +767,9 @@ class Schwefel(Real):
     def _eval(self, indiv):
         '''f(x) = 418.9829*n + sum(x_i * sin(sqrt(abs(x_i))))'''
         return 418.9829*len(indiv) + sum(x * sin(sqrt(fabs(x))) for x in indiv)
+    
+    def _eval_matrix(self, X):
+        return 418.9829*X.shape[1] + (X * numpy.sin(numpy.sqrt(numpy.fabs(X)))).sum(axis=1)
 
 
 #=======================================================================
@@ -719,6 +811,10 @@ class Michalewicz(Real):
         for i, x in enumerate(indiv):
             total += sin(x)*sin(((i+1)*x*x)/pi)**m2
         return -total
+    
+    def _eval_matrix(self, X):
+        i = numpy.arange(1, X.shape[1]+1)
+        return -(numpy.sin(X) * numpy.sin((i*X*X)/pi)**self.m2).sum(axis=1)
 
 
 
@@ -755,6 +851,9 @@ class MultiPeak1(Real):
         '''f(x) = sin^6(5*pi*x)
         '''
         return sin(5*pi*indiv[0])**6
+    
+    def _eval_matrix(self, X):
+        return numpy.sin(5*pi*X[:, 0])**6
 
 #=======================================================================
 class MultiPeak2(Real):
@@ -782,6 +881,9 @@ class MultiPeak2(Real):
         '''f(x) = sin^6(5*pi(x^(3/4)-0.05))
         '''
         return sin(5*pi*(indiv[0]**(3.0/4)-0.05))**6
+    
+    def _eval_matrix(self, X):
+        return numpy.sin(5*pi*(X[:, 0]**(3.0/4)-0.05))**6
 
 #=======================================================================
 class MultiPeak3(Real):
@@ -810,6 +912,10 @@ class MultiPeak3(Real):
         '''
         x = indiv[0]
         return (exp(-2*log(2)*((x-0.08)/0.854)**2))*sin(5*pi*x)**6
+    
+    def _eval_matrix(self, X):
+        x = X[:, 0]
+        return (numpy.exp(-2*log(2)*((x-0.08)/0.854)**2))*numpy.sin(5*pi*x)**6
 
 #=======================================================================
 class MultiPeak4(Real):
@@ -839,6 +945,10 @@ class MultiPeak4(Real):
         '''
         x = indiv[0]
         return (exp(-2*log(2)*((x-0.08)/0.854)**2))*sin(5*pi*(x**(3.0/4)-0.05))**6
+    
+    def _eval_matrix(self, X):
+        x = X[:, 0]
+        return (numpy.exp(-2*log(2)*((x-0.08)/0.854)**2))*numpy.sin(5*pi*(x**(3.0/4)-0.05))**6
 
 
 #=======================================================================
@@ -868,6 +978,10 @@ class Booth(Real):
         '''
         x1, x2 = indiv
         return (x1 + 2*x2 - 7)**2 + (2*x1 + x2 - 5)**2
+    
+    def _eval_matrix(self, X):
+        x1, x2 = X[:, 0], X[:, 1]
+        return (x1 + 2*x2 - 7)**2 + (2*x1 + x2 - 5)**2
 
 
 #=======================================================================
@@ -903,6 +1017,10 @@ class Himmelblau(Real):
         '''
         x1, x2 = indiv
         return (x1**2 + x2 - 11)**2 + (x1 + x2**2 - 7)**2
+    
+    def _eval_matrix(self, X):
+        x1, x2 = X[:, 0], X[:, 1]
+        return (x1**2 + x2 - 11)**2 + (x1 + x2**2 - 7)**2
 
 
 #=======================================================================
@@ -942,6 +1060,10 @@ class SixHumpCamelBack(Real):
         x1, x2 = indiv
         result = 4*(x1**2) - 2.1*(x1**4) + (1.0/3.0)*(x1**6) + x1*x2 - 4*(x2**2) + 4*(x2**4)
         return result
+    
+    def _eval_matrix(self, X):
+        x1, x2 = X[:, 0], X[:, 1]
+        return 4*(x1**2) - 2.1*(x1**4) + (1.0/3.0)*(x1**6) + x1*x2 - 4*(x2**2) + 4*(x2**4)
 
 #=======================================================================
 class SchafferF6(Real):
@@ -973,6 +1095,10 @@ class SchafferF6(Real):
         x, y = indiv
         d = x*x+y*y
         return 0.5 + (sin(sqrt(d))**2 - 0.5) / (1 + 0.001*d)**2
+    
+    def _eval_matrix(self, X):
+        d = (X*X).sum(axis=1)
+        return 0.5 + (numpy.sin(numpy.sqrt(d))**2 - 0.5) / (1 + 0.001*d)**2
 
 #=======================================================================
 # Real-valued Landscape Generators
@@ -1049,6 +1175,12 @@ class FMS(Real):
         # easy done...
         return total
     
+    def _eval_matrix(self, X):
+        theta_t = numpy.array(self._theta_t)
+        v = [X[:, i:i+1] for i in xrange(6)]
+        y = v[0] * numpy.sin(v[1]*theta_t + v[2]*numpy.sin(v[3]*theta_t + v[4]*numpy.sin(v[5]*theta_t)))
+        return ((y - numpy.array(self._y0))**2).sum(axis=1)
+    
     
     def _fms(self, v, theta_t):
         '''y(t) = a1 * sin(w1*t*theta + a2 *
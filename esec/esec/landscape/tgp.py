@@ -39,6 +39,11 @@ class TGPFitness(Fitness):
         if self.values[1] < other.values[1]: return True
         return False
     
+    def get_sort_key(self):
+        score, cost = self.values
+        if score != score: return None
+        return (score, -cost)
+    
     def __str__(self):
         if __debug__: self.validate()
         assert len(self.values) == 2
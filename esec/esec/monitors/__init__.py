@@ -258,6 +258,28 @@ class MonitorBase(object):
         '''
         return True
     
+    def get_state(self):    #pylint: disable=R0201
+        '''Called when a checkpoint is saved to obtain the statistics
+        held by this monitor.
+        
+        :Returns:
+            An object that supports pickling, which will be passed to
+            `set_state` when the checkpoint is loaded, or ``None`` if
+            the monitor has no state to save.
+        '''
+        return None
+    
+    def set_state(self, state):
+        '''Called when a checkpoint is loaded to restore the statistics
+        returned by `get_state`.
+        
+        :Parameters:
+          state : object
+            The value returned from `get_state` when the checkpoint was
+            saved.
+        '''
+        pass
+
 
 from esec.monitors.consolemonitor import ConsoleMonitor
 from esec.monitors.csvmonitor import CSVMonitor
@@ -41,6 +41,8 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
         'births':   [ ' births ', '%7d ', 'stats.births' ],
         'evals':    [ ' evals  ', '%7d ', 'stats.global_evals' ],
         'local_evals':  [ ' evals  ', '%7d ', 'stats.local_evals' ],
+        'cache_hits':   [ ' hits   ', '%7d ', 'stats.global_cache_hits', 0 ],
+        'cache_misses': [ ' misses ', '%7d ', 'stats.global_cache_misses', 0 ],
         'stable_count': [ ' stable ', '%7d ', 'stats.stable_count' ],
         
         'brief_header':     [ ' Brief:  ', '         ', None ],
@@ -127,6 +129,14 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
         'time_delta_precise': [ ' delta time        ', "%4d:%02d'%02d.%03d.%03d ", '_time_delta_precise'],
         # most recently executed block
         'block': [ '  block           ', ' %-16s ', '_last_block'],
+        # asynchronous evaluation (see esec.steadystate)
+        'async_rate': [ ' evals/s ', '%8.1f ', '_async_rate' ],
+        'async_idle': [ ' idle  ', '%5.1f%% ', '_async_idle' ],
+        'async': 'async_rate+async_idle+|',
+        # statement profiling (see system.profile)
+        'profile_time': [ ' prof.ms ', '%8.2f ', '_profile_time' ],
+        'profile_slowest': [ '  slowest stmt    ', ' line %-4s %5.1f%% ', '_profile_slowest' ],
+        'profile': 'profile_time+profile_slowest+|',
     }
     '''The set of known column descriptors.
     
@@ -600,6 +610,15 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
                     blocks[key] += 1
                 else:
                     blocks[key] = 1
+            elif name == 'Profile':
+                # `value` maps statement descriptions to totals
+                for key in ('profile', 'local_profile'):
+                    totals = self._stats.setdefault(key, { })
+                    for stmt, values in value.iteritems():
+                        if stmt in totals:
+                            totals[stmt] = tuple(a + b for a, b in zip(totals[stmt], values))
+                        else:
+                            totals[stmt] = values
         
         elif sender == 'Monitor':
             if name == 'Statistics':
@@ -752,10 +771,29 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
             if self.verbose >= 2:
                 self.notify('Monitor', 'Statistics', self._stats)
         
+        if self._stats and self._stats.get('profile'):
+            self._print_profile(self._stats['profile'])
+        
         self.report_out.flush()
         self.summary_out.flush()
     
     
+    def _print_profile(self, profile):
+        '''Displays the totals for each profiled block and statement.
+        
+        `profile` maps ``(block_name, line, text)`` tuples to
+        ``(calls, seconds, individuals)`` tuples.
+        '''
+        total = sum(values[1] for (_, line, _), values in profile.iteritems() if line is None)
+        print >> self.summary_out
+        print >> self.summary_out, '>> Profile'
+        print >> self.summary_out, ' line    calls   time (ms)  ms/call  share individuals  statement'
+        for (block_name, line, text), (calls, seconds, individuals) in sorted(profile.iteritems()):
+            print >> self.summary_out, '%5s %8d %11.3f %8.3f %5.1f%% %11d  %s%s' % (
+                '-' if line is None else line, calls, seconds * 1000.0, seconds * 1000.0 / calls,
+                100.0 * seconds / total if total else 0.0, individuals,
+                '' if line is None else '  ', text)
+    
     def on_exception(self, sender, exception_type, value, trace):
         '''Displays the exception trace and terminates immediately.'''
         try:
@@ -805,6 +843,27 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
         
         return bool(self.end_code)
     
+    def get_state(self):
+        '''Returns the accumulated statistics.'''
+        return {
+            'stats': self._stats,
+            'last_block_name': self._last_block_name,
+            'stop_now': self.stop_now,
+            'end_code': self.end_code,
+        }
+    
+    def set_state(self, state):
+        '''Restores the statistics returned by `get_state`.'''
+        self._stats = state['stats']
+        self._last_block_name = state['last_block_name']
+        self.stop_now = state['stop_now']
+        self.end_code = state['end_code']
+        
+        self._time(self)
+        self._time_delta(self)
+        self._time_precise(self)
+        self._time_delta_precise(self)
+    
     
     # Report functions
     
@@ -928,3 +987,38 @@ class ConsoleMonitor(MonitorBase):  #pylint: disable=R0902
     def _last_block(self, owner):
         '''Returns ``(last_block_name,)``.'''
         return (self._last_block_name,)
+    
+    def _async_rate(self, owner):
+        '''Returns ``(evaluations_per_second,)`` for individuals
+        evaluated asynchronously during the last iteration.
+        '''
+        elapsed = self._stats.get('local_async_time', 0.0)
+        return (self._stats.get('local_async_evals', 0) / elapsed if elapsed else 0.0,)
+    
+    def _async_idle(self, owner):
+        '''Returns ``(percentage,)`` of time that worker processes were
+        idle during the last iteration.
+        '''
+        capacity = self._stats.get('local_async_capacity', 0.0)
+        if not capacity:
+            return (0.0,)
+        return (max(0.0, 100.0 * (1.0 - self._stats.get('local_async_busy', 0.0) / capacity)),)
+    
+    def _profile_time(self, owner):
+        '''Returns ``(milliseconds,)`` spent executing profiled blocks
+        during the last iteration.
+        '''
+        profile = self._stats.get('local_profile', { })
+        return (1000.0 * sum(values[1] for (_, line, _), values in profile.iteritems() if line is None),)
+    
+    def _profile_slowest(self, owner):
+        '''Returns ``(line, percentage)`` for the profiled statement
+        that took the most time during the last iteration.
+        '''
+        profile = self._stats.get('local_profile', { })
+        block_time = sum(values[1] for (_, line, _), values in profile.iteritems() if line is None)
+        statements = [(values[1], line) for (_, line, _), values in profile.iteritems() if line is not None]
+        if not statements or not block_time:
+            return ('-', 0.0)
+        seconds, line = max(statements)
+        return (line, 100.0 * seconds / block_time)
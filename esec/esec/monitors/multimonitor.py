@@ -113,3 +113,16 @@ class MultiMonitor(MonitorBase):  #pylint: disable=R0902
             partial_result = monitor.should_terminate(sender)
             result = result or partial_result
         return result
+    
+    def get_state(self):
+        '''Returns a list containing the state of each monitor in the
+        order they were provided.
+        '''
+        return [monitor.get_state() for monitor in self._monitors]
+    
+    def set_state(self, state):
+        '''Restores the state of each monitor in the order they were
+        provided.
+        '''
+        for monitor, monitor_state in zip(self._monitors, state):
+            monitor.set_state(monitor_state)
@@ -0,0 +1,306 @@
+'''Provides a pool of worker processes for evaluating individuals in
+parallel.
+
+An `EvaluatorPool` is created by `esec.system.System` when the
+``system.evaluator_pool`` configuration value is provided, for example::
+    
+    config = {
+        'system': {
+            'definition': ...,
+            'evaluator_pool': { 'workers': 4 },
+        },
+        ...
+    }
+
+Each worker process receives its own copy of the landscape when the pool
+is created. Species are created by each worker the first time it
+receives an individual of that species, so species that are never used
+are not created. Batches of individuals that are evaluated by
+the landscape (see `esec.individual.evaluate`) are divided between the
+workers and the fitness values are returned in their original order.
+
+Because only the genome and other member values of each individual are
+sent to the workers, the results are identical to serial evaluation for
+any landscape where fitness depends only on the individual. Landscapes
+that modify their own state will not produce the same results in
+parallel, since each worker uses an independent copy of the landscape.
+
+Landscapes that are not ``deterministic`` and use ``self.rand`` while
+evaluating have their generator reseeded for each individual, using a
+seed derived from the pool's ``random_seed`` and the order in which the
+individuals were sent (see `esec.context.derive_seed`). The noise
+applied to each individual is then independent of the number of
+workers and the way individuals are divided between them, so repeated
+runs produce identical results. These results differ from those
+produced by serial evaluation.
+
+Individuals that cannot be sent to a worker (for example, because their
+genes refer to functions) are evaluated serially in the main process.
+
+:Note:
+    Workers are started by copying the main process, which requires a
+    platform that supports ``fork``. On other platforms, the landscape
+    and the species construction arguments must support pickling.
+'''
+
+import cPickle as pickle
+import multiprocessing
+import signal
+import sys
+import traceback
+from time import time
+from warnings import warn
+
+from esec.context import derive_seed
+
+_WORKER_EVALUATORS = None
+'''The evaluators available to the current worker process.'''
+_WORKER_SPECIES = None
+'''The species created by the current worker process, or ``None`` for
+species that have not been created.'''
+_WORKER_SPECIES_TYPES = None
+'''The species types available to the current worker process.'''
+_WORKER_SPECIES_ARGS = None
+'''The arguments used to create species in the current worker process.'''
+
+def _initialise_worker(evaluators, species_types, species_args):
+    '''Stores the evaluators and species types for use in
+    `_evaluate_chunk`.
+    
+    Interrupts are ignored by workers and handled in the main process.
+    '''
+    global _WORKER_EVALUATORS, _WORKER_SPECIES, _WORKER_SPECIES_TYPES, _WORKER_SPECIES_ARGS  #pylint: disable=W0603
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _WORKER_EVALUATORS = evaluators
+    _WORKER_SPECIES = [None] * len(species_types)
+    _WORKER_SPECIES_TYPES = species_types
+    _WORKER_SPECIES_ARGS = species_args
+
+def _get_worker_species(species_index):
+    '''Returns the species at `species_index`, creating it if this is
+    the first time it has been used by the current worker process.
+    '''
+    species = _WORKER_SPECIES[species_index]
+    if species is None:
+        species = _WORKER_SPECIES[species_index] = _WORKER_SPECIES_TYPES[species_index](*_WORKER_SPECIES_ARGS)
+    return species
+
+def _members(indiv):
+    '''Returns a dictionary containing the members of `indiv`, including
+    those stored in ``__slots__``.
+    '''
+    try:
+        members = dict(object.__getattribute__(indiv, '__dict__'))
+    except AttributeError:
+        members = { }
+    for cls in type(indiv).__mro__:
+        for name in cls.__dict__.get('__slots__', ()):
+            try:
+                members[name] = cls.__dict__[name].__get__(indiv, cls)
+            except AttributeError:
+                pass
+    return members
+
+def _reseeded_rand(evaluator):
+    '''Returns the random number generator of `evaluator` that is
+    reseeded for each evaluation, or ``None`` if `evaluator` is
+    ``deterministic`` or has no ``rand``.
+    '''
+    if getattr(evaluator, 'deterministic', False):
+        return None
+    return getattr(evaluator, 'rand', None)
+
+def _evaluate_chunk(data):
+    '''Evaluates a pickled list of individual records within a worker
+    process and returns the list of fitness values.
+    '''
+    evaluator_index, records = pickle.loads(data)
+    evaluator = _WORKER_EVALUATORS[evaluator_index]
+    evaluate = evaluator.eval
+    rand = _reseeded_rand(evaluator)
+    result = [ ]
+    for cls, species_index, state, seed in records:
+        if rand is not None and seed is not None:
+            rand.seed(seed)
+        indiv = cls.__new__(cls)
+        for key, value in state.iteritems():
+            setattr(indiv, key, value)
+        indiv.species = _get_worker_species(species_index)
+        indiv._eval = evaluator     #pylint: disable=W0212
+        indiv._eval_group = None    #pylint: disable=W0212
+        indiv.statistic = { }
+        result.append(evaluate(indiv))
+    return result
+
+def _evaluate_chunk_timed(data):
+    '''Evaluates a pickled list of individual records within a worker
+    process and returns the list of fitness values, the number of
+    seconds taken and ``None``.
+    
+    If the evaluation raises an exception, the list of fitness values is
+    ``None`` and the last element is a tuple containing the exception
+    type, the exception and the formatted traceback, which are the
+    arguments of `esec.utils.exceptions.EvaluatorError`. The exception
+    is returned rather than raised because ``apply_async`` does not call
+    its callback when an exception is raised.
+    '''
+    start = time()
+    try:
+        result = _evaluate_chunk(data)
+    except Exception:   #pylint: disable=W0703
+        ex = sys.exc_info()
+        trace = ''.join(traceback.format_exception(*ex))
+        try:
+            pickle.dumps(ex[:2], pickle.HIGHEST_PROTOCOL)
+            error = ex[0], ex[1], trace
+        except Exception:   #pylint: disable=W0703
+            error = Exception, Exception('%s: %s' % (ex[0].__name__, ex[1])), trace
+        return None, time() - start, error
+    return result, time() - start, None
+
+class EvaluatorPool(object):
+    '''Evaluates batches of individuals using a pool of worker
+    processes.
+    '''
+    
+    # Members that are restored by the worker rather than sent to it.
+    _excluded = frozenset(('species', '_eval', '_eval_group', '_fitness', 'statistic'))
+    
+    def __init__(self, evaluators, species_types, species_args, workers=None, random_seed=None):
+        '''Starts the worker processes.
+        
+        :Parameters:
+          evaluators : list
+            The evaluators that will be used by the workers. Individuals
+            using any other evaluator are evaluated in the main process.
+          
+          species_types : list(type)
+            The types of species of individuals that may be evaluated
+            by the workers. Individuals must belong to an instance of
+            exactly one of these types.
+          
+          species_args : tuple
+            The arguments passed to a species type by a worker when it
+            creates that species.
+          
+          workers : int [optional]
+            The number of worker processes to create. If omitted or
+            zero, one worker is created for each processor.
+          
+          random_seed : int [optional]
+            The seed used to derive the random number stream for each
+            evaluation. If omitted, the random number generators of
+            evaluators are not reseeded.
+        '''
+        self.evaluators = list(evaluators)
+        self.species_types = list(species_types)
+        self._species_index = dict((cls, i) for i, cls in enumerate(self.species_types))
+        self.workers = workers or multiprocessing.cpu_count()
+        self.random_seed = random_seed
+        self._evaluations = 0
+        self._unsupported = set()
+        self._pool = multiprocessing.Pool(self.workers, _initialise_worker,
+                                          (self.evaluators, self.species_types, tuple(species_args)))
+    
+    def handles(self, evaluator):
+        '''Returns ``True`` if `evaluator` is available to the workers.
+        '''
+        return (self._pool is not None and
+                id(evaluator) not in self._unsupported and
+                any(evaluator is e for e in self.evaluators))
+    
+    def _record(self, indiv, seeded):
+        '''Returns the information required to recreate `indiv` in a
+        worker process.
+        
+        Every individual is counted in ``_evaluations``, but a seed is
+        only derived if `seeded` is ``True``, since deriving it is
+        relatively expensive.
+        '''
+        species_index = self._species_index[type(indiv.species)]
+        state = dict((key, value) for key, value in _members(indiv).iteritems() if key not in self._excluded)
+        seed = None
+        if self.random_seed is not None:
+            if seeded:
+                seed = derive_seed(self.random_seed, 'evaluation', self._evaluations)
+            self._evaluations += 1
+        return type(indiv), species_index, state, seed
+    
+    def get_state(self):
+        '''Returns the state that is saved by
+        `esec.system.System.checkpoint`, so that a resumed run derives
+        the same seed for each evaluation.
+        '''
+        return self._evaluations
+    
+    def set_state(self, state):
+        '''Restores the state returned by `get_state`.'''
+        self._evaluations = state
+    
+    def eval_batch(self, evaluator, individuals):
+        '''Evaluates each of the provided individuals using the worker
+        processes and returns a list of their fitnesses in the same
+        order.
+        
+        If the individuals cannot be sent to the workers, they are
+        evaluated serially using ``evaluator.eval_batch`` (if available)
+        or ``evaluator.eval``.
+        '''
+        evaluator_index = next(i for i, e in enumerate(self.evaluators) if e is evaluator)
+        count = len(individuals)
+        chunk_size = max(1, -(-count // (self.workers * 4)))
+        try:
+            seeded = _reseeded_rand(evaluator) is not None
+            chunks = [pickle.dumps((evaluator_index, [self._record(indiv, seeded) for indiv in individuals[i:i+chunk_size]]),
+                                   pickle.HIGHEST_PROTOCOL)
+                      for i in xrange(0, count, chunk_size)]
+        except (pickle.PicklingError, TypeError, KeyError):
+            self._unsupported.add(id(evaluator))
+            warn('Individuals cannot be evaluated in parallel by %r; using serial evaluation' % evaluator)
+            eval_batch = getattr(evaluator, 'eval_batch', None)
+            if eval_batch is None:
+                return [evaluator.eval(indiv) for indiv in individuals]
+            return eval_batch(individuals)
+        
+        # A timeout allows KeyboardInterrupt to be raised while waiting.
+        results = self._pool.map_async(_evaluate_chunk, chunks).get(0xFFFFFFFF)
+        return [fitness for chunk in results for fitness in chunk]
+    
+    def submit(self, evaluator, individuals, callback):
+        '''Begins evaluating the provided individuals using one worker
+        process and returns immediately.
+        
+        When the evaluation is complete, `callback` is called with a
+        tuple containing the list of fitness values, in the same order
+        as `individuals`, the number of seconds spent evaluating them
+        and ``None``. If the evaluation raised an exception, the list of
+        fitness values is ``None`` and the last element contains the
+        arguments for an `esec.utils.exceptions.EvaluatorError`. The
+        callback is called from a background thread.
+        
+        :Returns:
+            ``True`` if the individuals were sent to a worker process;
+            ``False`` if they cannot be evaluated by the workers, in
+            which case `callback` is never called.
+        '''
+        if not self.handles(evaluator):
+            return False
+        evaluator_index = next(i for i, e in enumerate(self.evaluators) if e is evaluator)
+        try:
+            seeded = _reseeded_rand(evaluator) is not None
+            data = pickle.dumps((evaluator_index, [self._record(indiv, seeded) for indiv in individuals]),
+                                pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, KeyError):
+            self._unsupported.add(id(evaluator))
+            warn('Individuals cannot be evaluated in parallel by %r; using serial evaluation' % evaluator)
+            return False
+        
+        self._pool.apply_async(_evaluate_chunk_timed, (data,), callback=callback)
+        return True
+    
+    def close(self):
+        '''Stops the worker processes.'''
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,197 @@
+'''Provides a group type that caches values derived from its members.
+
+Groups created by ESDL statements are `Population` instances. A
+`Population` is a list of individuals, so iterating, indexing and
+modifying it behaves exactly as for a list, but the fitness values,
+ordering and best and worst members are computed at most once and shared
+between every selector that requests them. For example, the ``best`` and
+``best_only`` selectors both use the cached ordering rather than sorting
+the group separately.
+
+Cached values are discarded when the population is modified through any
+list method, and when any ``EVAL`` statement is executed, since this
+discards the fitness of individuals that may belong to any group (see
+`Population.invalidate_all`). Individuals that are modified in place
+by other means must not belong to a population with cached values.
+
+Within ESDL, filters receive an iterator over the group rather than the
+group itself. When the group is a `Population`, this iterator has a
+``population`` attribute referring to it (see `iter_group`).
+'''
+
+from esec.fitness import EmptyFitness, sort_keys
+
+class Population(list):
+    '''A list of individuals that caches values derived from the
+    fitness of its members.
+
+    The fitness of each member is determined in the same way as
+    `esec.generators._key_fitness`, and orderings are stable, so they
+    match the results of ``sorted`` and ``max`` using that key.
+    '''
+    __slots__ = ( '_cache', '_cache_epoch' )
+
+    _epoch = 0
+    '''Incremented by `invalidate_all` to discard every cached value.'''
+
+    def __init__(self, iterable=()):
+        list.__init__(self, iterable)
+        self._cache = { }
+        self._cache_epoch = Population._epoch
+
+    def __reduce__(self):
+        return (Population, (list(self),))
+
+    @staticmethod
+    def invalidate_all():
+        '''Discards the cached values of every population. This must be
+        called when individuals are modified in place, for example, by
+        removing their fitness.
+        '''
+        Population._epoch += 1
+
+    def invalidate(self):
+        '''Discards the cached values of this population.'''
+        self._cache.clear()
+
+    def _cached(self, name, func, *args):
+        '''Returns the cached value for `name`, calling `func` with
+        `args` to create it if necessary.
+        '''
+        cache = self._cache
+        if self._cache_epoch != Population._epoch:
+            cache.clear()
+            self._cache_epoch = Population._epoch
+        try:
+            return cache[name]
+        except KeyError:
+            value = cache[name] = func(*args)
+            return value
+
+    @property
+    def fitness_keys(self):
+        '''The fitness of each member, in the same order as the
+        members. Members that evaluate as ``False`` have an
+        `EmptyFitness`.
+        '''
+        return self._cached('fitness_keys', self._get_fitness_keys)
+
+    def _get_fitness_keys(self):
+        '''Returns the value of `fitness_keys`.'''
+        return [i.fitness if i else EmptyFitness() for i in self]
+
+    @property
+    def sort_keys(self):
+        '''Values that sort in the same order as `fitness_keys`. These
+        are the `esec.fitness.Fitness.sort_key` values where possible,
+        which are faster to compare than the fitness values.
+        '''
+        return self._cached('sort_keys', sort_keys, self.fitness_keys)
+
+    def rank_order(self, reverse=True):
+        '''Returns a tuple of the indices of the members in order of
+        decreasing fitness, or increasing fitness if `reverse` is
+        ``False``. Members with equal fitness remain in their original
+        order.
+        '''
+        return self._cached(('rank_order', reverse), self._get_rank_order, reverse)
+
+    def _get_rank_order(self, reverse):
+        '''Returns the value of `rank_order`.'''
+        return tuple(sorted(xrange(len(self)), key=self.sort_keys.__getitem__, reverse=reverse))
+
+    def ranked(self, reverse=True):
+        '''Returns a tuple of the members in order of decreasing fitness,
+        or increasing fitness if `reverse` is ``False``. Members with
+        equal fitness remain in their original order.
+        '''
+        return self._cached(('ranked', reverse), self._get_ranked, reverse)
+
+    def _get_ranked(self, reverse):
+        '''Returns the value of `ranked`.'''
+        return tuple(self[i] for i in self.rank_order(reverse))
+
+    @property
+    def best(self):
+        '''The first member with the highest fitness, or ``None`` if the
+        population is empty.
+        '''
+        return self._cached('best', self._get_extreme, True)
+
+    @property
+    def worst(self):
+        '''The first member with the lowest fitness, or ``None`` if the
+        population is empty.
+        '''
+        return self._cached('worst', self._get_extreme, False)
+
+    def _get_extreme(self, highest):
+        '''Returns the value of `best` or `worst`.'''
+        if not self: return None
+        order = self._cache.get(('rank_order', highest))
+        if order is not None:
+            return self[order[0]]
+        keys = self.sort_keys
+        select = max if highest else min
+        return self[select(xrange(len(self)), key=keys.__getitem__)]
+
+def _invalidating(name):
+    '''Returns a method that calls the list method `name` after
+    discarding any cached values.
+    '''
+    method = getattr(list, name)
+    def _method(self, *args):
+        '''Calls the list method after discarding cached values.'''
+        self._cache.clear()     #pylint: disable=W0212
+        return method(self, *args)
+    _method.__name__ = name
+    _method.__doc__ = method.__doc__
+    return _method
+
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__', '__iadd__', '__imul__',
+              'append', 'extend', 'insert', 'pop', 'remove', 'reverse', 'sort'):
+    setattr(Population, _name, _invalidating(_name))
+del _name
+
+class PopulationIterator(object):
+    '''Iterates over the members of a `Population` and provides access
+    to the population being iterated.
+    '''
+    __slots__ = ( 'population', '_iter' )
+
+    def __init__(self, population):
+        self.population = population
+        '''The population being iterated.'''
+        self._iter = list.__iter__(population)
+
+    def __iter__(self):
+        # The list iterator is returned so that iterating in a loop
+        # does not call `next` for every member.
+        return self._iter
+
+    def next(self):
+        '''Returns the next member of the population.'''
+        return next(self._iter)
+
+    def __length_hint__(self):
+        return self._iter.__length_hint__()
+
+def iter_group(group):
+    '''Returns an iterator over `group`. If `group` is a `Population`,
+    the iterator has a ``population`` attribute referring to it.
+    '''
+    if isinstance(group, Population):
+        return PopulationIterator(group)
+    return iter(group)
+
+def population_of(_source):
+    '''Returns the `Population` that `_source` is, or is an unused
+    iterator over, or ``None`` if there is none.
+    '''
+    if isinstance(_source, Population):
+        return _source
+    if isinstance(_source, PopulationIterator):
+        population = _source.population
+        if _source.__length_hint__() == len(population):
+            return population
+    return None
@@ -9,25 +9,90 @@ A species determines the type and range of gene values contained in
     initialisation generators, all operations should use
     ``type(parent)`` when constructing new individuals.
 
+Genomes are stored in lists by default. Species that provide a
+`Species.genome_typecode` may instead store genomes in typed
+``array.array`` instances, which use much less memory for long genomes
+and are copied more quickly. The storage is selected for each species
+using the ``system.genome_storage`` configuration value, for example::
+    
+    'system': {
+        'definition': ...,
+        'genome_storage': { 'Real': 'array', 'Binary': 'array' },
+    }
+
+Species may provide additional storage types by overriding
+`Species._genome_storage`; for example, `esec.species.binary` supports
+``'bits'`` storage.
+
+Operators should copy genomes using slicing (``genome[:]``) rather
+than ``list(genome)`` so that the storage type is preserved.
+
+Mutation operators should use `select_genes` to choose the genes to
+mutate, so that their cost depends on the number of genes mutated
+rather than the length of the genome.
+
 .. packagetree:: esec.species
    :style: UML
 '''
 
-from itertools import chain, islice, izip
+from array import array
+from itertools import islice, izip
+from math import log, log1p
 from esec.context import notify, rand
 import esec.utils as utils
 from esec.utils import ConfigDict
 from sys import maxsize
 
+def _array_genome(typecode):
+    '''Returns a function that stores genes in an ``array`` with type
+    code `typecode`.
+    '''
+    def _make(genes):
+        '''Returns a new array containing `genes`.'''
+        if type(genes) is array and genes.typecode == typecode:
+            return genes[:]
+        return array(typecode, genes)
+    return _make
+
+def select_genes(length, per_gene_rate, genes=None):
+    '''Returns the indices of the genes to mutate in a genome with
+    `length` genes.
+    
+    If `genes` is provided, exactly that many distinct indices are
+    selected in random order. Otherwise, each index is included with
+    probability `per_gene_rate` and the indices are returned in
+    increasing order.
+    
+    Rather than testing each gene in turn, the number of genes skipped
+    before each selected gene is drawn from the geometric distribution,
+    which selects genes with the same probability but only requires one
+    random number for each selected gene.
+    '''
+    if genes:
+        return rand.sample(xrange(length), min(int(genes), length))
+    if per_gene_rate >= 1.0:
+        return xrange(length)
+    if per_gene_rate <= 0.0 or length <= 0:
+        return [ ]
+    
+    frand = rand.random
+    scale = 1.0 / log1p(-per_gene_rate)
+    result = [ ]
+    i = int(log(1.0 - frand()) * scale)
+    while i < length:
+        result.append(i)
+        i += 1 + int(log(1.0 - frand()) * scale)
+    return result
+
 class Species(object):
     '''Abstract base class for species descriptors.
     '''
     
     _include_automatically = True
     '''Indicates whether the class should be included in the set of
-    available species. If ``True``, the species is instantiated for
-    every system and the contents of `public_context` is merged into the
-    system context.
+    available species. If ``True``, the species is instantiated by any
+    system that uses it and the contents of `public_context` is merged
+    into the system context.
     
     This only applies to classes deriving from `Species` *and* included
     in `esec.species`. Other species classes are never included
@@ -38,6 +103,23 @@ class Species(object):
     '''The display name of the species class.
     '''
     
+    public_names = None
+    '''The names of the items in `public_context`. A system only
+    instantiates the species when one of these names or `name` is
+    used. If ``None``, the species is instantiated for every system.
+    '''
+    
+    genome_typecode = None
+    '''The ``array`` type code used to store genes when ``'array'``
+    storage is selected for the species. If ``None``, genomes can only
+    be stored in lists.
+    '''
+    
+    genome_type = list
+    '''Creates the genome of a new individual from a sequence of genes.
+    This is ``list`` unless another storage type has been selected.
+    '''
+    
     def __init__(self, cfg, eval_default):
         '''Initialises a new `Species` instance.
         
@@ -58,6 +140,12 @@ class Species(object):
         # Now apply user cfg details and test against syntax
         self.cfg.overlay(cfg)
         utils.cfg_validate(self.cfg, self.syntax, type(self), warnings=False)
+        # Select the genome storage type
+        storage = (self.cfg.system or { }).get('genome_storage') or { }
+        storage = storage.get(self.name) or storage.get(self.name.lower()) or 'list'
+        self.genome_type = self._genome_storage(storage)
+        if self.genome_type is None:
+            raise ValueError("Genome storage '%s' is not supported by %s species" % (storage, self.name))
         # Store default evaluator
         self._eval_default = eval_default
         '''The default evaluator for individuals of this species type.'''
@@ -88,6 +176,17 @@ class Species(object):
         :see: Individual.statistic
         '''
     
+    def _genome_storage(self, storage):
+        '''Returns the `genome_type` to use for the storage type named
+        `storage`, or ``None`` if it is not supported. Derived classes
+        may override this to provide additional storage types.
+        '''
+        if storage == 'list':
+            return list
+        if storage == 'array' and self.genome_typecode:
+            return _array_genome(self.genome_typecode)
+        return None
+    
     def legal(self, indiv): #pylint: disable=W0613,R0201
         '''Determines whether the specified individual is legal.
         
@@ -349,8 +448,8 @@ class Species(object):
                 i1_genome, i2_genome = i1.genome, i2.genome
                 i1_len, i2_len = len(i1_genome), len(i2_genome)
                 
-                new_genes1 = list(i1_genome)
-                new_genes2 = list(i2_genome)
+                new_genes1 = i1_genome[:]
+                new_genes2 = i2_genome[:]
                 source = xrange(i1_len if i1_len < i2_len else i2_len)
 
                 if genes:
@@ -475,18 +574,12 @@ class Species(object):
                     cuts = list(sorted(islice(cuts, points)))
                     cuts.append(max_len)
                     
-                    new_genes1 = list(i1_genome)
-                    new_genes2 = list(i2_genome)
+                    new_genes1 = i1_genome[:]
+                    new_genes2 = i2_genome[:]
                     
                     for cut_i, cut_j in utils.pairs(iter(cuts)):
-                        cut1 = islice(new_genes1, cut_i, cut_j)
-                        cut2 = islice(new_genes2, cut_i, cut_j)
-                        new_genes1 = list(chain(islice(new_genes1, cut_i),
-                                                cut2,
-                                                islice(new_genes1, cut_j, None)))
-                        new_genes2 = list(chain(islice(new_genes2, cut_i),
-                                                cut1,
-                                                islice(new_genes2, cut_j, None)))
+                        new_genes1[cut_i:cut_j], new_genes2[cut_i:cut_j] = \
+                            new_genes2[cut_i:cut_j], new_genes1[cut_i:cut_j]
                     
                     i1 = type(i1)(new_genes1, i1, statistic={ 'recombined': 1 })
                     i2 = type(i2)(new_genes2, i2, statistic={ 'recombined': 1 })
@@ -609,20 +702,14 @@ class Species(object):
                     i1_cuts.append(i1_len)
                     i2_cuts.append(i2_len)
                     
-                    new_genes1 = list(i1_genome)
-                    new_genes2 = list(i2_genome)
+                    new_genes1 = i1_genome[:]
+                    new_genes2 = i2_genome[:]
                     
                     for (i1_cut_i, i1_cut_j), (i2_cut_i, i2_cut_j) in \
                         izip(utils.pairs(iter(i1_cuts)), utils.pairs(iter(i2_cuts))):
                         
-                        i1_cut = islice(new_genes1, i1_cut_i, i1_cut_j)
-                        i2_cut = islice(new_genes2, i2_cut_i, i2_cut_j)
-                        new_genes1 = list(chain(islice(new_genes1, i1_cut_i),
-                                                i2_cut,
-                                                islice(new_genes1, i1_cut_j, None)))
-                        new_genes2 = list(chain(islice(new_genes2, i2_cut_i),
-                                                i1_cut,
-                                                islice(new_genes2, i2_cut_j, None)))
+                        new_genes1[i1_cut_i:i1_cut_j], new_genes2[i2_cut_i:i2_cut_j] = \
+                            new_genes2[i2_cut_i:i2_cut_j], new_genes1[i1_cut_i:i1_cut_j]
                     
                     i1_len, i2_len = len(new_genes1), len(new_genes2)
                     if longest_result and i1_len > longest_result:
@@ -747,8 +834,8 @@ class Species(object):
                 i1_genome, i2_genome = i1.genome, i2.genome
                 i1_len, i2_len = len(i1_genome), len(i2_genome)
                 
-                new_genes1 = list(i1_genome)
-                new_genes2 = list(i2_genome)
+                new_genes1 = i1_genome[:]
+                new_genes2 = i2_genome[:]
                 exchanging = (frand() < switch_rate)
                 
                 for i in xrange(i1_len if i1_len < i2_len else i2_len):
@@ -805,3 +892,16 @@ def include(*species):
     assert all(issubclass(s, Species) for s in species), \
            "New species type must derive from Species class"
     SPECIES.extend(species)
+
+def registry():
+    '''Returns a dictionary mapping the `Species.name` and lowercase
+    `Species.public_names` of every type in `SPECIES` to the type. Where
+    more than one type provides a name, the last one in `SPECIES` is
+    used. Types without `Species.public_names` are not included.
+    '''
+    result = { }
+    for cls in SPECIES:
+        if cls.public_names is not None:
+            result[cls.name] = cls
+            result.update((name.lower(), cls) for name in cls.public_names)
+    return result
@@ -1,16 +1,211 @@
 '''Provides the `BinarySpecies` class for binary-valued genomes.
+
+In addition to ``'list'`` and ``'array'`` storage, binary genomes may
+be packed into the bits of a single integer by selecting ``'bits'``
+storage (see `esec.species`)::
+    
+    'system': {
+        'definition': ...,
+        'genome_storage': { 'Binary': 'bits' },
+    }
+
+Packed genomes are stored as `BitGenome` instances, which support the
+same indexing and slicing operations as a list. The mutation and
+uniform crossover operators of `BinarySpecies` modify every gene of a
+packed genome at once using random masks, and landscapes such as
+`esec.landscape.binary.OneMax` evaluate them by counting bits.
+Landscapes and operators that are not aware of packed genomes continue
+to work, though usually more slowly than with list storage.
+
+Masks for packed genomes are generated with the same probabilities as
+the per-gene operators, but use the random number generator
+differently, so results differ from those obtained with other storage
+types.
 '''
 from itertools import islice, chain
-from esec.species import Species
+from math import ceil
+from esec.species import Species, select_genes
 from esec.individual import Individual
 from esec.context import rand
+import esec.utils as utils
 # Disabled: method could be a function
 #pylint: disable=R0201
 
+class BitGenome(object):
+    '''A binary genome packed into the bits of an integer. Gene ``i``
+    is stored in bit ``i`` of `bits`.
+    
+    `BitGenome` supports indexing, slice assignment, iteration and
+    concatenation in the same way as a list, so it may be used by
+    operators and landscapes that are not aware of the packed
+    representation.
+    '''
+    __slots__ = ('bits', 'length')
+    
+    def __init__(self, genes=()):
+        '''Initialises a new genome containing `genes`, which may be a
+        `BitGenome` or any sequence of ``0`` and ``1`` values.
+        '''
+        if type(genes) is BitGenome:
+            self.bits = genes.bits
+            self.length = genes.length
+        else:
+            genes = ''.join('1' if g else '0' for g in genes)
+            self.length = len(genes)
+            self.bits = int(genes[::-1], 2) if genes else 0
+    
+    @classmethod
+    def from_bits(cls, bits, length):
+        '''Returns a new genome containing the lowest `length` bits of
+        `bits`. Bits beyond `length` must be zero.
+        '''
+        genome = cls.__new__(cls)
+        genome.bits = bits
+        genome.length = length
+        return genome
+    
+    def popcount(self):
+        '''Returns the number of genes with the value ``1``.'''
+        return bin(self.bits).count('1')
+    
+    def count(self, value):
+        '''Returns the number of genes equal to `value`.'''
+        if value == 1: return self.popcount()
+        if value == 0: return self.length - self.popcount()
+        return 0
+    
+    def tolist(self):
+        '''Returns the genes as a list.'''
+        if not self.length:
+            return [ ]
+        return map(int, reversed('{0:0{1}b}'.format(self.bits, self.length)))
+    
+    def _index(self, i):
+        '''Returns the bit number for index `i`.'''
+        if i < 0: i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError('genome index out of range')
+        return i
+    
+    def __len__(self):
+        return self.length
+    
+    def __iter__(self):
+        return iter(self.tolist())
+    
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                return BitGenome(self.tolist()[key])
+            length = stop - start if stop > start else 0
+            return BitGenome.from_bits((self.bits >> start) & ((1 << length) - 1), length)
+        return (self.bits >> self._index(key)) & 1
+    
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            if step != 1:
+                genes = self.tolist()
+                genes[key] = value
+                self.__init__(genes)
+                return
+            if stop < start: stop = start
+            if type(value) is not BitGenome: value = BitGenome(value)
+            bits = self.bits
+            self.bits = ((bits & ((1 << start) - 1)) |
+                         (value.bits << start) |
+                         ((bits >> stop) << (start + value.length)))
+            self.length += value.length - (stop - start)
+        elif value:
+            self.bits |= 1 << self._index(key)
+        else:
+            self.bits &= ~(1 << self._index(key))
+    
+    def __add__(self, other):
+        if type(other) is not BitGenome: other = BitGenome(other)
+        return BitGenome.from_bits(self.bits | (other.bits << self.length), self.length + other.length)
+    
+    def __radd__(self, other):
+        return BitGenome(other) + self
+    
+    def __eq__(self, other):
+        if type(other) is BitGenome:
+            return self.bits == other.bits and self.length == other.length
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+    
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+    
+    __hash__ = None
+    
+    def __getstate__(self):
+        return self.bits, self.length
+    
+    def __setstate__(self, state):
+        self.bits, self.length = state
+    
+    def __str__(self):
+        return str(self.tolist())
+    
+    def __repr__(self):
+        return 'BitGenome(%r)' % self.tolist()
+
+def _packed(genome):
+    '''Returns `genome` as a `BitGenome`.'''
+    return genome if type(genome) is BitGenome else BitGenome(genome)
+
+def _random_bits(length):
+    '''Returns an integer with `length` random bits.'''
+    return rand.getrandbits(length) if length > 0 else 0
+
+def _random_mask(length, rate):
+    '''Returns an integer with `length` bits, each of which is set with
+    probability `rate`.
+    
+    Low rates set the bits selected by `select_genes`. Otherwise, the
+    probability is represented by 53 binary digits, which is the same
+    precision as ``rand.random()``. Starting from the least significant
+    digit, the mask is combined with a word of random bits using OR
+    where the digit is one and AND where it is zero.
+    '''
+    if length <= 0 or rate <= 0.0: return 0
+    if rate < 0.02: return _genes_mask(select_genes(length, rate))
+    numerator = int(ceil(rate * 2.0 ** 53))
+    if numerator >= 2 ** 53: return (1 << length) - 1
+    digits = 53
+    while not numerator & 1:
+        numerator >>= 1
+        digits -= 1
+    mask = 0
+    for _ in xrange(digits):
+        if numerator & 1:
+            mask |= rand.getrandbits(length)
+        else:
+            mask &= rand.getrandbits(length)
+        numerator >>= 1
+    return mask
+
+def _exact_mask(length, genes):
+    '''Returns an integer with `length` bits, of which `genes` randomly
+    selected bits are set.'''
+    return _genes_mask(select_genes(length, 0.0, genes))
+
+def _genes_mask(indices):
+    '''Returns an integer with the bits in `indices` set.'''
+    mask = 0
+    for i in indices:
+        mask |= 1 << i
+    return mask
+
 # Override Individual to provide one that provides nicer string formatting.
 class BinaryIndividual(Individual):
     '''An `Individual` for binary-valued genomes.
     '''
+    __slots__ = ( )
     
     @property
     def phenome_string(self):
@@ -26,6 +221,8 @@ class BinarySpecies(Species):
     binary values. Each gene has the value ``0`` or ``1``.
     '''
     name = 'Binary'
+    genome_typecode = 'b'
+    public_names = ('random_binary', 'binary_zero', 'binary_one', 'binary_toggle')
     
     def __init__(self, cfg, eval_default):
         super(BinarySpecies, self).__init__(cfg, eval_default)
@@ -37,6 +234,13 @@ class BinarySpecies(Species):
             'binary_toggle': self.init_toggle
         }
     
+    def _genome_storage(self, storage):
+        '''Returns `BitGenome` for ``'bits'`` storage, in addition to the
+        storage types supported by every species.'''
+        if storage == 'bits':
+            return BitGenome
+        return super(BinarySpecies, self)._genome_storage(storage)
+    
     def legal(self, indiv):
         '''Determines whether `indiv` is legal.'''
         assert isinstance(indiv, BinaryIndividual), "Expected BinaryIndividual"
@@ -181,27 +385,23 @@ class BinarySpecies(Species):
         assert genes is not True, "genes has no value"
         
         frand = rand.random
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
         
         for indiv in _source:
             if do_all_indiv or frand() < per_indiv_rate:
-                new_genes = list(indiv.genome)
-                source = xrange(len(new_genes))
+                if type(indiv.genome) is BitGenome:
+                    bits, length = indiv.genome.bits, indiv.genome.length
+                    mask = _exact_mask(length, genes) if genes else _random_mask(length, per_gene_rate)
+                    bits ^= (bits ^ _random_bits(length)) & mask
+                    yield type(indiv)(BitGenome.from_bits(bits, length), indiv, statistic={ 'mutated': 1 })
+                    continue
                 
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
-                
-                for i in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        new_genes[i] = 0 if frand() < 0.5 else 1
+                new_genes = indiv.genome[:]
+                for i in select_genes(len(new_genes), per_gene_rate, genes):
+                    new_genes[i] = 0 if frand() < 0.5 else 1
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
@@ -236,28 +436,22 @@ class BinarySpecies(Species):
         assert genes is not True, "genes has no value"
         
         frand = rand.random
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
         
         for indiv in _source:
             if do_all_indiv or frand() < per_indiv_rate:
-                new_genes = list(indiv.genome)
-                
-                source = enumerate(new_genes)
+                if type(indiv.genome) is BitGenome:
+                    bits, length = indiv.genome.bits, indiv.genome.length
+                    bits ^= _exact_mask(length, genes) if genes else _random_mask(length, per_gene_rate)
+                    yield type(indiv)(BitGenome.from_bits(bits, length), indiv, statistic={ 'mutated': 1 })
+                    continue
                 
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
-                
-                for i, gene in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        new_genes[i] = 1 - gene
+                new_genes = indiv.genome[:]
+                for i in select_genes(len(new_genes), per_gene_rate, genes):
+                    new_genes[i] = 1 - new_genes[i]
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
@@ -286,7 +480,12 @@ class BinarySpecies(Species):
         
         for indiv in _source:
             if do_all_indiv or frand() < per_indiv_rate:
-                yield type(indiv)([(1 - g) for g in indiv.genome], indiv, statistic={ 'mutated': 1 })
+                genome = indiv.genome
+                if type(genome) is BitGenome:
+                    new_genes = BitGenome.from_bits(genome.bits ^ ((1 << genome.length) - 1), genome.length)
+                else:
+                    new_genes = [(1 - g) for g in genome]
+                yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
                 yield indiv
     
@@ -340,9 +539,93 @@ class BinarySpecies(Species):
                     cut2 = cut1 + length
                 else:
                     cut1, cut2 = 0, len_indiv
+                if type(indiv.genome) is BitGenome:
+                    bits = indiv.genome.bits ^ (((1 << (cut2 - cut1)) - 1) << cut1)
+                    yield type(indiv)(BitGenome.from_bits(bits, len_indiv), indiv, statistic={ 'mutated': 1 })
+                    continue
                 new_genes = list(chain(islice(indiv.genome, cut1),
                                        ((1 - g) for g in islice(indiv.genome, cut1, cut2)),
                                        islice(indiv.genome, cut2, len(indiv.genome))))
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
                 yield indiv
+    
+    def crossover_uniform(self, _source,
+                          per_pair_rate=None, per_indiv_rate=1.0, per_gene_rate=0.5,
+                          genes=None, discrete=False,
+                          one_child=True, two_children=False):
+        '''Performs uniform crossover by selecting genes at random from
+        one of two individuals.
+        
+        Packed genomes (see `BitGenome`) are recombined by blending
+        each pair of genomes with a random mask. Otherwise, this is
+        identical to `Species.crossover_uniform`, which describes the
+        parameters.
+        '''
+        if self.genome_type is not BitGenome:
+            return super(BinarySpecies, self).crossover_uniform(
+                _source,
+                per_pair_rate=per_pair_rate, per_indiv_rate=per_indiv_rate, per_gene_rate=per_gene_rate,
+                genes=genes, discrete=discrete,
+                one_child=one_child, two_children=two_children)
+        
+        return self._crossover_uniform_packed(
+            _source,
+            per_pair_rate=per_pair_rate, per_indiv_rate=per_indiv_rate, per_gene_rate=per_gene_rate,
+            genes=genes, discrete=discrete,
+            one_child=one_child, two_children=two_children)
+    
+    def _crossover_uniform_packed(self, _source,
+                                  per_pair_rate, per_indiv_rate, per_gene_rate,
+                                  genes, discrete,
+                                  one_child, two_children):
+        '''Implements `crossover_uniform` for packed genomes.'''
+        assert per_pair_rate is not True, "per_pair_rate has no value"
+        assert per_indiv_rate is not True, "per_indiv_rate has no value"
+        assert per_gene_rate is not True, "per_gene_rate has no value"
+        assert genes is not True, "genes has no value"
+        
+        if per_pair_rate is None: per_pair_rate = per_indiv_rate
+        if per_pair_rate <= 0.0 or (per_gene_rate <= 0.0 and not genes):
+            if one_child and not two_children:
+                skip = True
+                for indiv in _source:
+                    if not skip: yield indiv
+                    skip = not skip
+            else:
+                for indiv in _source:
+                    yield indiv
+            raise StopIteration
+        
+        do_all_pairs = (per_pair_rate >= 1.0)
+        genes = int(genes or 0)
+        
+        frand = rand.random
+        
+        for i1, i2 in utils.pairs(_source):
+            if do_all_pairs or frand() < per_pair_rate:
+                i1_genome, i2_genome = _packed(i1.genome), _packed(i2.genome)
+                i1_bits, i2_bits = i1_genome.bits, i2_genome.bits
+                length = min(i1_genome.length, i2_genome.length)
+                
+                mask = _exact_mask(length, genes) if genes else _random_mask(length, per_gene_rate)
+                
+                if discrete:
+                    # Bits set in each choice mask are taken from i2
+                    choice1 = i1_bits ^ ((i1_bits ^ i2_bits) & _random_bits(length))
+                    choice2 = i1_bits ^ ((i1_bits ^ i2_bits) & _random_bits(length))
+                    new_bits1 = i1_bits ^ ((i1_bits ^ choice1) & mask)
+                    new_bits2 = i2_bits ^ ((i2_bits ^ choice2) & mask)
+                else:
+                    swap = (i1_bits ^ i2_bits) & mask
+                    new_bits1 = i1_bits ^ swap
+                    new_bits2 = i2_bits ^ swap
+                
+                i1 = type(i1)(BitGenome.from_bits(new_bits1, i1_genome.length), i1, statistic={ 'recombined': 1 })
+                i2 = type(i2)(BitGenome.from_bits(new_bits2, i2_genome.length), i2, statistic={ 'recombined': 1 })
+            
+            if one_child and not two_children:
+                yield i1 if frand() < 0.5 else i2
+            else:
+                yield i1
+                yield i2
@@ -13,6 +13,7 @@ class BinaryIntegerIndividual(Individual):
     '''An `Individual` for binary-valued genomes and integer-valued phenomes. Binary
     values are grouped into integer-valued parameters, summed and scaled.
     '''
+    __slots__ = ( '_phenome', 'bits_per_value', 'encoding', 'lower_bounds', 'upper_bounds' )
     
     def __init__(self, genes, parent,
                  bits_per_value=None,
@@ -110,6 +111,7 @@ class BinaryIntegerSpecies(BinarySpecies):
     '''
     
     name = 'Integer (Binary)'
+    public_names = BinarySpecies.public_names + ('random_int_binary', 'binary_zero_int', 'binary_one_int')
     
     def __init__(self, cfg, eval_default):
         super(BinaryIntegerSpecies, self).__init__(cfg, eval_default)
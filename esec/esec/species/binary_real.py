@@ -13,6 +13,7 @@ class BinaryRealIndividual(Individual):
     '''An `Individual` for binary-valued genomes and real-valued phenomes. Binary
     values are grouped into real-valued parameters, summed and scaled.
     '''
+    __slots__ = ( '_phenome', 'bits_per_value', 'lowest', 'highest', 'encoding' )
     
     def __init__(self, genes, parent,
                  bits_per_value=None,
@@ -111,6 +112,7 @@ class BinaryRealSpecies(BinarySpecies):
     '''
 
     name = 'Real (Binary)'
+    public_names = BinarySpecies.public_names + ('random_real_binary', 'binary_zero_real', 'binary_one_real')
     
     def __init__(self, cfg, eval_default):
         super(BinaryRealSpecies, self).__init__(cfg, eval_default)
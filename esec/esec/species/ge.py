@@ -10,6 +10,8 @@ from esec.species.integer import IntegerSpecies, IntegerIndividual
 class GEIndividual(IntegerIndividual):
     '''An `Individual` for GE genomes.
     '''
+    __slots__ = ( '_phenome', '_compiled', '_effective_size', 'grammar', 'defines', 'wrap_count' )
+    
     def __init__(self, genes, parent,
                  lower_bounds=None, upper_bounds=None,
                  grammar=None, defines=None,
@@ -107,6 +109,10 @@ class GEIndividual(IntegerIndividual):
             program, self._effective_size = self.grammar.eval(self.genome, self.wrap_count)
             self._phenome = program or ''
             
+            # statistic may be shared with other individuals (see
+            # Individual.share_statistic), so we replace it rather than
+            # modifying it.
+            self.statistic = dict(self.statistic)
             self.statistic['did_not_compile'] = 0
             self.statistic['dnc_unterminated'] = 0
             self.statistic['dnc_exception'] = 0
@@ -166,6 +172,7 @@ class GESpecies(IntegerSpecies):
     '''
     
     name = 'GE'
+    public_names = IntegerSpecies.public_names + ('random_ge',)
     
     def __init__(self, cfg, eval_default):
         super(GESpecies, self).__init__(cfg, eval_default)
@@ -2,8 +2,7 @@
 integer-valued genomes.
 '''
 from itertools import izip
-from itertools import islice
-from esec.species import Species
+from esec.species import Species, select_genes
 from esec.individual import Individual
 from esec.context import rand
 
@@ -16,6 +15,8 @@ class IntegerIndividual(Individual):
     gene is stored with the individual so it may be used during mutation
     operations without being respecified.
     '''
+    __slots__ = ( 'lower_bounds', 'upper_bounds' )
+    
     def __init__(self, genes, parent, lower_bounds=None, upper_bounds=None, statistic=None):
         '''Initialises a new `IntegerIndividual`. Instances are generally
         created using the initialisation methods provided by
@@ -75,6 +76,9 @@ class IntegerSpecies(Species):
     '''
     
     name = 'Integer'
+    genome_typecode = 'l'
+    public_names = ('random_int', 'random_integer', 'integer_low', 'integer_high',
+                    'integer_toggle', 'integer_increment', 'integer_count')
     
     def __init__(self, cfg, eval_default):
         super(IntegerSpecies, self).__init__(cfg, eval_default)
@@ -286,7 +290,7 @@ class IntegerSpecies(Species):
         count = 0
         while True:
             indiv = next(low_gen)
-            indiv.genome[:] = [count % (highest - lowest) + lowest for _ in indiv.genome]
+            indiv.genome = self.genome_type(count % (highest - lowest) + lowest for _ in indiv.genome)
             count += 1
             yield indiv
     
@@ -320,27 +324,19 @@ class IntegerSpecies(Species):
         
         frand = rand.random
         irand = rand.randrange
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
         
         for indiv in _source:
             if do_all_indiv or frand() < per_indiv_rate:
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), indiv.lower_bounds, indiv.upper_bounds)
-                
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                for i, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        new_genes[i] = irand(low, high + 1)
+                for i in select_genes(length, per_gene_rate, genes):
+                    new_genes[i] = irand(lower[i], upper[i] + 1)
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
@@ -386,9 +382,7 @@ class IntegerSpecies(Species):
         assert positive_rate is not True, "positive_rate has no value"
         
         frand = rand.random
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -403,22 +397,17 @@ class IntegerSpecies(Species):
             
             if do_all_indiv or frand() < per_indiv_rate:
                 step_size_sum = 0
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), new_genes, indiv.lower_bounds, indiv.upper_bounds)
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
-                
-                for i, gene, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        step_size_sum += step_size
-                        new_gene = gene + (step_size if frand() < positive_rate else -step_size)
-                        new_genes[i] = (low  if new_gene < low  else
-                                        high if new_gene > high else
-                                        new_gene)
+                for i in select_genes(length, per_gene_rate, genes):
+                    gene, low, high = new_genes[i], lower[i], upper[i]
+                    step_size_sum += step_size
+                    new_gene = gene + (step_size if frand() < positive_rate else -step_size)
+                    new_genes[i] = (low  if new_gene < low  else
+                                    high if new_gene > high else
+                                    new_gene)
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1, 'step_sum': step_size_sum })
             else:
@@ -467,10 +456,8 @@ class IntegerSpecies(Species):
         
         sigma = sigma or (step_size * 1.253)
         frand = rand.random
-        shuffle = rand.shuffle
         gauss = rand.gauss
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -480,23 +467,18 @@ class IntegerSpecies(Species):
             
             if do_all_indiv or frand() < per_indiv_rate:
                 step_size_sum = 0
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), new_genes, indiv.lower_bounds, indiv.upper_bounds)
-                
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                for i, gene, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        step = int(gauss(0, sigma))
-                        step_size_sum += step
-                        new_gene = gene + step
-                        new_genes[i] = (low  if new_gene < low  else
-                                        high if new_gene > high else
-                                        new_gene)
+                for i in select_genes(length, per_gene_rate, genes):
+                    gene, low, high = new_genes[i], lower[i], upper[i]
+                    step = int(gauss(0, sigma))
+                    step_size_sum += step
+                    new_gene = gene + step
+                    new_genes[i] = (low  if new_gene < low  else
+                                    high if new_gene > high else
+                                    new_gene)
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1, 'step_sum': step_size_sum })
             else:
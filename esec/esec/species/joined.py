@@ -20,6 +20,7 @@ class JoinedIndividual(Individual):
     that the genome is now a list of the joined individuals (in the
     order provided to the initialiser).
     '''
+    __slots__ = ( )
     
     def __init__(self, members, parent=None):
         '''Initialises a new individual made up of a set of joined
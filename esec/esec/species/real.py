@@ -1,14 +1,27 @@
 '''Provides the `RealSpecies` and `RealIndividual` classes for
 real-valued genomes.
+
+The ``mutate_random_batch``, ``mutate_delta_batch`` and
+``mutate_gaussian_batch`` operators are equivalent to the operators
+without the ``_batch`` suffix, but generate the mutations for a block of
+individuals at once using NumPy. These are substantially faster for
+long genomes. If NumPy is not available, or the individuals in a block
+have different lengths, the normal operators are used instead.
 '''
+from array import array
 from itertools import izip
 from itertools import islice
 import math
-from esec.species import Species
+from esec.species import Species, select_genes
 from esec.individual import Individual
 from esec.context import rand
 import esec.utils as utils
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 # Disabled: method could be a function
 #pylint: disable=R0201
 
@@ -18,6 +31,8 @@ class RealIndividual(Individual):
     gene is stored with the individual so it may be used during mutation
     operations without being respecified.
     '''
+    __slots__ = ( 'lower_bounds', 'upper_bounds', 'strategy' )
+    
     def __init__(self, genes, parent, lower_bounds=None, upper_bounds=None, strategy=None, statistic=None):
         '''Initialises a new `RealIndividual`. Instances are generally
         created using the initialisation methods provided by `RealSpecies`.
@@ -100,6 +115,8 @@ class RealSpecies(Species):
     '''
     
     name = 'Real'
+    genome_typecode = 'd'
+    public_names = ('random_real', 'real_low', 'real_high', 'real_toggle')
     
     def __init__(self, cfg, eval_default):
         super(RealSpecies, self).__init__(cfg, eval_default)
@@ -332,7 +349,7 @@ class RealSpecies(Species):
             if do_all_pairs or frand() < per_pair_rate:
                 i1_genome, i2_genome = i1.genome, i2.genome
                 
-                new_genes = list(i1_genome)
+                new_genes = i1_genome[:]
                 
                 if do_all_genes:
                     for i, g2 in enumerate(i2_genome):
@@ -374,9 +391,7 @@ class RealSpecies(Species):
         assert genes is not True, "genes has no value"
         
         frand = rand.random
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -385,18 +400,20 @@ class RealSpecies(Species):
             assert isinstance(indiv, RealIndividual), "Want RealIndividual, not '%s'" % type(indiv)
             
             if do_all_indiv or frand() < per_indiv_rate:
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), indiv.lower_bounds, indiv.upper_bounds)
-                source = (i for i in source if not math.isinf(i[1]) and not math.isinf(i[2]))
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
+                if genes and any(math.isinf(b) for b in (min(lower), max(lower), min(upper), max(upper))):
+                    # Only genes with finite bounds may be selected
+                    source = [i for i in xrange(length) if not math.isinf(lower[i]) and not math.isinf(upper[i])]
+                    source = [source[i] for i in select_genes(len(source), per_gene_rate, genes)]
+                else:
+                    source = select_genes(length, per_gene_rate, genes)
                 
-                for i, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
+                for i in source:
+                    low, high = lower[i], upper[i]
+                    if not math.isinf(low) and not math.isinf(high):
                         new_genes[i] = frand() * (high - low) + low
                 yield type(indiv)(genes=new_genes, parent=indiv, statistic={ 'mutated': 1 })
             else:
@@ -443,9 +460,7 @@ class RealSpecies(Species):
         assert positive_rate is not True, "positive_rate has no value"
         
         frand = rand.random
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -455,22 +470,17 @@ class RealSpecies(Species):
             
             if do_all_indiv or frand() < per_indiv_rate:
                 step_size_sum = 0
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), new_genes, indiv.lower_bounds, indiv.upper_bounds)
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
-                
-                for i, gene, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        step_size_sum += step_size
-                        new_gene = gene + (step_size if frand() < positive_rate else -step_size)
-                        new_genes[i] = (low  if new_gene < low  else
-                                        high if new_gene > high else
-                                        new_gene)
+                for i in select_genes(length, per_gene_rate, genes):
+                    gene, low, high = new_genes[i], lower[i], upper[i]
+                    step_size_sum += step_size
+                    new_gene = gene + (step_size if frand() < positive_rate else -step_size)
+                    new_genes[i] = (low  if new_gene < low  else
+                                    high if new_gene > high else
+                                    new_gene)
                 
                 yield type(indiv)(genes=new_genes, parent=indiv, statistic={ 'mutated': 1, 'step_sum': step_size_sum })
             else:
@@ -519,10 +529,8 @@ class RealSpecies(Species):
         
         sigma = sigma or (step_size * 1.253)
         frand = rand.random
-        shuffle = rand.shuffle
         gauss = rand.gauss
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -532,24 +540,196 @@ class RealSpecies(Species):
             
             if do_all_indiv or frand() < per_indiv_rate:
                 step_size_sum = 0
-                new_genes = list(indiv.genome)
-                source = izip(xrange(len(new_genes)), new_genes, indiv.lower_bounds, indiv.upper_bounds)
-                
-                if genes:
-                    do_all_gene = True
-                    source = list(source)
-                    shuffle(source)
-                    source = islice(source, genes)
+                new_genes = indiv.genome[:]
+                lower, upper = indiv.lower_bounds, indiv.upper_bounds
+                length = min(len(new_genes), len(lower), len(upper))
                 
-                for i, gene, low, high in source:
-                    if do_all_gene or frand() < per_gene_rate:
-                        step = gauss(0, sigma)
-                        step_size_sum += step
-                        new_gene = gene + step
-                        new_genes[i] = (low  if new_gene <= low  else
-                                        high if new_gene >= high else
-                                        new_gene)
+                for i in select_genes(length, per_gene_rate, genes):
+                    gene, low, high = new_genes[i], lower[i], upper[i]
+                    step = gauss(0, sigma)
+                    step_size_sum += step
+                    new_gene = gene + step
+                    new_genes[i] = (low  if new_gene <= low  else
+                                    high if new_gene >= high else
+                                    new_gene)
                 
                 yield type(indiv)(genes=new_genes, parent=indiv, statistic={ 'mutated': 1, 'step_sum': step_size_sum })
             else:
                 yield indiv
+    
+    def _mutate_blocks(self, _source, block_size, per_indiv_rate, per_gene_rate, genes, fallback, mutate):
+        '''Returns mutated individuals from `_source`. Individuals are
+        taken in blocks of `block_size` and the genomes of each block
+        are mutated together.
+        
+        `mutate` is called with a random number generator, a matrix of
+        genomes, the matrices of lower and upper bounds and a boolean
+        matrix indicating which genes to mutate. It returns the new
+        values of the genes in the mask, in the same order as
+        ``genomes[mask]``, and a matrix of the steps taken by each gene
+        for the ``step_sum`` statistic, or ``None``.
+        
+        If NumPy is not available, or the individuals in a block do not
+        have the same length, `fallback` is called with the block
+        instead.
+        '''
+        assert per_indiv_rate is not True, "per_indiv_rate has no value"
+        assert per_gene_rate is not True, "per_gene_rate has no value"
+        assert genes is not True, "genes has no value"
+        
+        genes = int(genes or 0)
+        block_size = int(block_size)
+        _source = iter(_source)
+        
+        while True:
+            block = list(islice(_source, block_size))
+            if not block:
+                break
+            length = len(block[0].genome)
+            if numpy is None or any(len(indiv.genome) != length for indiv in block):
+                for indiv in fallback(iter(block)):
+                    yield indiv
+                continue
+            
+            assert all(isinstance(indiv, RealIndividual) for indiv in block), "Want `RealIndividual`"
+            
+            count = len(block)
+            random_state = numpy.random.RandomState(rand.getrandbits(32))
+            
+            genomes = utils.genome_matrix(block, length)
+            first = block[0]
+            if all(indiv.lower_bounds is first.lower_bounds and indiv.upper_bounds is first.upper_bounds
+                   for indiv in block):
+                lower = numpy.array(first.lower_bounds[:length], dtype=float)
+                upper = numpy.array(first.upper_bounds[:length], dtype=float)
+            else:
+                lower = numpy.array([indiv.lower_bounds[:length] for indiv in block], dtype=float)
+                upper = numpy.array([indiv.upper_bounds[:length] for indiv in block], dtype=float)
+            lower = numpy.broadcast_to(lower, genomes.shape)
+            upper = numpy.broadcast_to(upper, genomes.shape)
+            
+            if per_indiv_rate >= 1.0:
+                selected = numpy.ones(count, dtype=bool)
+            else:
+                selected = random_state.random_sample(count) < per_indiv_rate
+            
+            if genes:
+                order = random_state.random_sample((count, length)).argsort(axis=1).argsort(axis=1)
+                mask = order < genes
+            elif per_gene_rate >= 1.0:
+                mask = numpy.ones((count, length), dtype=bool)
+            else:
+                mask = random_state.random_sample((count, length)) < per_gene_rate
+            mask &= selected[:, numpy.newaxis]
+            
+            values, steps = mutate(random_state, genomes, lower, upper, mask)
+            genomes[mask] = values
+            if steps is not None:
+                step_sums = steps.sum(axis=1).tolist()
+            
+            # Arrays are created directly from the bytes of each row
+            as_array = type(first.genome) is array and first.genome.typecode == 'd'
+            for i, indiv in enumerate(block):
+                if not selected[i]:
+                    yield indiv
+                    continue
+                statistic = { 'mutated': 1 }
+                if steps is not None:
+                    statistic['step_sum'] = step_sums[i]
+                new_genes = array('d', genomes[i].tostring()) if as_array else genomes[i].tolist()
+                yield type(indiv)(genes=new_genes, parent=indiv, statistic=statistic)
+    
+    def mutate_random_batch(self, _source, per_indiv_rate=1.0, per_gene_rate=0.1, genes=None, block_size=256):
+        '''Mutates a group of individuals by replacing genes with random
+        values. This is equivalent to `mutate_random`, but generates the
+        new values for `block_size` individuals at a time.
+        
+        .. include:: epydoc_include.txt
+        
+        :Parameters:
+          _source : iterable(`RealIndividual`)
+            A sequence of individuals. Individuals are taken in blocks
+            from this sequence and either returned unaltered or cloned
+            and mutated.
+          
+          per_indiv_rate : |prob|
+            The probability of any individual being mutated. If an individual
+            is not mutated, it is returned unmodified.
+          
+          per_gene_rate : |prob|
+            The probability of any gene being mutated. If `genes` is
+            specified, this value is ignored.
+          
+          genes : int
+            The exact number of genes to mutate. If `None`, `per_gene_rate` is
+            used instead.
+          
+          block_size : int > 0
+            The number of individuals mutated together. Larger values
+            are faster, but more individuals are taken from `_source`
+            than may be required.
+        '''
+        def _mutate(random_state, genomes, lower, upper, mask):
+            '''Replaces the genes in `mask` with random values.'''
+            mask &= numpy.isfinite(lower) & numpy.isfinite(upper)
+            low, high = lower[mask], upper[mask]
+            return random_state.random_sample(len(low)) * (high - low) + low, None
+        
+        def _fallback(block):
+            '''Mutates `block` using `mutate_random`.'''
+            return self.mutate_random(block, per_indiv_rate, per_gene_rate, genes)
+        
+        return self._mutate_blocks(_source, block_size, per_indiv_rate, per_gene_rate, genes, _fallback, _mutate)
+    
+    def mutate_delta_batch(self, _source, step_size=0.1, per_indiv_rate=1.0,
+                           per_gene_rate=0.1, genes=None,
+                           positive_rate=0.5, block_size=256):
+        '''Mutates a group of individuals by adding or subtracting
+        `step_size` to or from individual genes. This is equivalent to
+        `mutate_delta`, but generates the new values for `block_size`
+        individuals at a time.
+        
+        Parameters are the same as for `mutate_delta` and
+        `mutate_random_batch`.
+        '''
+        assert step_size is not True, "step_size has no value"
+        assert positive_rate is not True, "positive_rate has no value"
+        
+        def _mutate(random_state, genomes, lower, upper, mask):
+            '''Adjusts the genes in `mask` by `step_size`.'''
+            steps = numpy.where(random_state.random_sample(mask.sum()) < positive_rate, step_size, -step_size)
+            return numpy.clip(genomes[mask] + steps, lower[mask], upper[mask]), mask * step_size
+        
+        def _fallback(block):
+            '''Mutates `block` using `mutate_delta`.'''
+            return self.mutate_delta(block, step_size, per_indiv_rate, per_gene_rate, genes, positive_rate)
+        
+        return self._mutate_blocks(_source, block_size, per_indiv_rate, per_gene_rate, genes, _fallback, _mutate)
+    
+    def mutate_gaussian_batch(self, _source, step_size=0.1, sigma=None, per_indiv_rate=1.0,
+                              per_gene_rate=0.1, genes=None, block_size=256):
+        '''Mutates a group of individuals by adding or subtracting a
+        random value with Gaussian distribution based on `step_size` or
+        `sigma`. This is equivalent to `mutate_gaussian`, but generates
+        the new values for `block_size` individuals at a time.
+        
+        Parameters are the same as for `mutate_gaussian` and
+        `mutate_random_batch`.
+        '''
+        assert step_size is not True, "step_size has no value"
+        assert sigma is not True, "sigma has no value"
+        
+        sigma = sigma or (step_size * 1.253)
+        
+        def _mutate(random_state, genomes, lower, upper, mask):
+            '''Adjusts the genes in `mask` by a random amount.'''
+            steps = random_state.normal(0.0, sigma, mask.sum())
+            step_matrix = numpy.zeros(genomes.shape)
+            step_matrix[mask] = steps
+            return numpy.clip(genomes[mask] + steps, lower[mask], upper[mask]), step_matrix
+        
+        def _fallback(block):
+            '''Mutates `block` using `mutate_gaussian`.'''
+            return self.mutate_gaussian(block, step_size, sigma, per_indiv_rate, per_gene_rate, genes)
+        
+        return self._mutate_blocks(_source, block_size, per_indiv_rate, per_gene_rate, genes, _fallback, _mutate)
@@ -3,7 +3,7 @@ sequencing genomes.
 '''
 import collections
 from itertools import izip, islice, chain
-from esec.species import Species
+from esec.species import Species, select_genes
 from esec.individual import Individual
 from esec.context import rand
 import esec.species
@@ -15,6 +15,8 @@ import esec.species
 class SequenceIndividual(Individual):
     '''An `Individual` for sequence genomes.
     '''
+    __slots__ = ( )
+    
     def __init__(self, genes, parent, statistic=None):
         '''Initialises a new `SequenceIndividual`. Instances are
         generally created using the initialisation methods provided by
@@ -47,6 +49,7 @@ class SequenceSpecies(Species):
     '''
     
     name = 'Sequence'
+    public_names = ('random_seq', 'random_sequence', 'forward_sequence', 'reverse_sequence')
     
     def __init__(self, cfg, eval_default):
         super(SequenceSpecies, self).__init__(cfg, eval_default)
@@ -208,9 +211,7 @@ class SequenceSpecies(Species):
         
         frand = rand.random
         irand = rand.randrange
-        shuffle = rand.shuffle
         
-        do_all_gene = (per_gene_rate >= 1.0)
         do_all_indiv = (per_indiv_rate >= 1.0)
         
         genes = int(genes or 0)
@@ -225,10 +226,9 @@ class SequenceSpecies(Species):
                         i1, i2 = irand(len_genes), irand(len_genes)
                         new_genes[i1], new_genes[i2] = new_genes[i2], new_genes[i1]
                 else:
-                    for _ in xrange(len_genes):
-                        if do_all_gene or frand() < per_gene_rate:
-                            i1, i2 = irand(len_genes), irand(len_genes)
-                            new_genes[i1], new_genes[i2] = new_genes[i2], new_genes[i1]
+                    for _ in select_genes(len_genes, per_gene_rate):
+                        i1, i2 = irand(len_genes), irand(len_genes)
+                        new_genes[i1], new_genes[i2] = new_genes[i2], new_genes[i1]
                 
                 yield type(indiv)(new_genes, indiv, statistic={ 'mutated': 1 })
             else:
@@ -20,6 +20,9 @@ class TgpIndividual(Individual):
     of terminals is stored with the individual so it may be used during
     mutation operations without being respecified.
     '''
+    __slots__ = ( '_phenome_string', 'instructions', 'instruction_set', 'terminals',
+                  'constant_bounds', 'constant_type', 'fixed_root' )
+    
     def __init__(self, genes, parent,
                  instructions=None, instruction_set=None, terminals=2,
                  constant_bounds=None, constant_type=None, fixed_root=False,
@@ -191,6 +194,7 @@ class Instruction(object):
     def __str__(self):       return self.name
     def __repr__(self):      return "%s(%s)" % (self.name, ','.join('*' * self.param_count))
     def __eq__(self, other): return isinstance(other, Instruction) and other.func == self.func
+    def __hash__(self):      return hash(self.func)
     def __ne__(self, other): return not self.__eq__(other)
 
 class InstructionWithState(Instruction):
@@ -267,6 +271,7 @@ class Terminal(object):
     def __str__(self):       return 'T%02d' % self.index
     def __repr__(self):      return "Terminal(%d)" % self.index
     def __eq__(self, other): return isinstance(other, Terminal) and other.index == self.index
+    def __hash__(self):      return hash(self.index)
     def __ne__(self, other): return not self.__eq__(other)
 
 class CallAdf(object):
@@ -290,6 +295,7 @@ class CallAdf(object):
     def __str__(self):              return 'ADF%d' % self.index
     def __repr__(self):             return "CallAdf(%d)" % self.index
     def __eq__(self, other):        return isinstance(other, CallAdf) and other.index == self.index
+    def __hash__(self):             return hash(self.index)
     def __ne__(self, other):        return not self.__eq__(other)
 
 class Constant(object):
@@ -310,6 +316,7 @@ class Constant(object):
     def __str__(self):              return str(self.value)
     def __repr__(self):             return repr(self.value)
     def __eq__(self, other):        return isinstance(other, Constant) and other.value == self.value
+    def __hash__(self):             return hash(self.value)
     def __ne__(self, other):        return not self.__eq__(other)
 
 #pylint: enable=C0111,R0903
@@ -328,6 +335,8 @@ class TgpSpecies(Species):
     function (ADF).
     '''
     name = 'TGP'
+    public_names = ('random_tgp', 'boolean_tgp', 'real_tgp', 'integer_tgp',
+                    'mutate_permutate', 'mutate_edit')
     
     def __init__(self, cfg, eval_default):
         super(TgpSpecies, self).__init__(cfg, eval_default)
@@ -0,0 +1,247 @@
+'''Provides asynchronous evaluation for steady-state systems.
+
+In a steady-state system, each offspring is normally evaluated before
+the next offspring is bred, which prevents evaluations from occurring
+in parallel. The ``insert_async`` function, which is available in ESDL,
+sends offspring to the worker processes of the current
+`esec.pool.EvaluatorPool` and returns immediately. Each offspring is
+inserted into the population as soon as its evaluation is complete,
+replacing an individual chosen by the ``replace`` selector. For
+example::
+    
+    FROM suitable_individuals SELECT (size) population
+    YIELD population
+    
+    BEGIN generation
+        REPEAT (size)
+            FROM population SELECT 2 parents USING binary_tournament
+            FROM parents    SELECT 1 offspring USING crossover_one, mutate_random
+            insert_async(offspring=offspring, into=population, in_flight=8, replace=worst)
+        END REPEAT
+        YIELD population
+    END generation
+
+``insert_async`` only waits when ``in_flight`` offspring are being
+evaluated, so the workers remain busy when evaluation times vary. The
+system must be configured with ``system.evaluator_pool``; otherwise,
+offspring are evaluated and inserted immediately, which is equivalent
+to a normal steady-state system.
+
+Because offspring are inserted in the order their evaluations complete,
+results depend on the time taken by each evaluation and are not
+repeatable between runs.
+
+The number of evaluations per second and the proportion of time that
+workers are idle are reported to the monitor as the ``async_rate`` and
+``async_idle`` statistics. These are calculated from the
+``local_async_time``, ``local_async_capacity`` and ``local_async_busy``
+statistics, which are also accumulated over the entire run as
+``global_async_time``, ``global_async_capacity`` and
+``global_async_busy``. Individuals evaluated asynchronously do not use
+the fitness cache.
+
+Offspring that are still being evaluated when the run ends are waited
+for by `esec.system.System.close` (see `wait_async`). Their evaluations
+are counted, but they are not inserted into any group.
+
+If an evaluation raises an exception in a worker process, the offspring
+is discarded and an `EvaluatorError` is raised by the next call to
+``insert_async`` or `wait_async`.
+'''
+
+import threading
+from collections import deque
+from time import time
+
+from esec import esdl_func
+from esec.context import _context, count, rand
+from esec.individual import evaluate
+from esec.utils.exceptions import EvaluatorError
+
+_WAIT_TIMEOUT = 0.5
+'''The number of seconds to wait for an evaluation before checking
+again. Waiting without a timeout prevents ``KeyboardInterrupt`` from
+being raised.'''
+
+class _AsyncState(object):     #pylint: disable=R0903
+    '''The offspring being evaluated for a system.'''
+    
+    def __init__(self, context):
+        self.context = context
+        self.in_flight = 0
+        self.completed = deque()
+        self.error = None
+        self.condition = threading.Condition()
+        self.last_time = time()
+    
+    def callback(self, individuals):
+        '''Returns a function that stores the result of evaluating
+        `individuals`. The function is called by a background thread
+        when the evaluation is complete.
+        '''
+        def _complete(result):
+            '''Queues the completed evaluation.'''
+            with self.condition:
+                self.completed.append((individuals, result))
+                self.condition.notify()
+        return _complete
+
+def _get_state():
+    '''Returns the `_AsyncState` for the current system.'''
+    state = getattr(_context, 'async_state', None)
+    if state is None or state.context is not _context.context:
+        state = _context.async_state = _AsyncState(_context.context)
+    return state
+
+def _receive(state, completed):
+    '''Assigns the fitness of each individual in `completed`, which
+    contains tuples of individuals and their evaluation results, and
+    counts the evaluations. The first evaluation that raised an
+    exception is stored in ``state.error``.
+    
+    :Returns:
+        The total time spent evaluating the individuals.
+    '''
+    busy = 0.0
+    for individuals, (fitnesses, elapsed, error) in completed:
+        state.in_flight -= len(individuals)
+        busy += elapsed
+        if error is not None:
+            state.error = state.error or error
+            continue
+        for indiv, fitness in zip(individuals, fitnesses):
+            indiv.fitness = fitness
+        count('local_evals', len(individuals))
+        count('global_evals', len(individuals))
+        count('local_async_evals', len(individuals))
+        count('global_async_evals', len(individuals))
+    return busy
+
+def _count_time(state, busy, workers):
+    '''Counts the time since the statistics were last counted and the
+    time spent evaluating, `busy`, by `workers` worker processes.
+    '''
+    now = time()
+    elapsed = now - state.last_time
+    for prefix in ('local_', 'global_'):
+        count(prefix + 'async_time', elapsed)
+        count(prefix + 'async_capacity', elapsed * workers)
+        count(prefix + 'async_busy', busy)
+    state.last_time = now
+
+def _wait(state, until):
+    '''Waits until `until` returns ``True`` or an evaluation completes,
+    then returns the completed evaluations.
+    '''
+    with state.condition:
+        while not until() and not state.completed:
+            state.condition.wait(_WAIT_TIMEOUT)
+        completed = list(state.completed)
+        state.completed.clear()
+    return completed
+
+def _raise_error(state):
+    '''Raises an `EvaluatorError` for the exception stored by
+    `_receive`, if any.
+    '''
+    error, state.error = state.error, None
+    if error is not None:
+        raise EvaluatorError(*error)
+
+def wait_async(context, pool):
+    '''Waits until every individual sent to `pool` by ``insert_async``
+    for the system with `context` has been evaluated. The fitness of each
+    individual is assigned and the evaluations are counted, but the
+    individuals are not inserted into any group.
+    
+    This is called by `esec.system.System.close`.
+    
+    :Raises EvaluatorError:
+        If any evaluation raised an exception.
+    '''
+    state = getattr(_context, 'async_state', None)
+    if state is None or state.context is not context:
+        return
+    if state.in_flight:
+        busy = 0.0
+        while state.in_flight > 0:
+            busy += _receive(state, _wait(state, lambda: False))
+        _count_time(state, busy, pool.workers)
+    _raise_error(state)
+
+def _insert(into, individuals, replace):
+    '''Replaces members of `into` with each of `individuals`.'''
+    for indiv in individuals:
+        if not into:
+            into.append(indiv)
+            continue
+        if replace is None:
+            index = rand.randrange(len(into))
+        else:
+            victim = next(iter(replace(into)))
+            index = next(i for i, member in enumerate(into) if member is victim)
+        into[index] = indiv
+
+@esdl_func('insert_async')
+def InsertAsync(offspring, into, in_flight=None, replace=None):
+    '''Begins evaluating the members of `offspring` and inserts any
+    completed offspring into `into`.
+    
+    :Parameters:
+      offspring : iterable(`Individual`)
+        The individuals to evaluate. Each is inserted into `into` once
+        it has been evaluated, which may occur during a later call.
+      
+      into : list(`Individual`)
+        The group to insert evaluated individuals into. This group is
+        modified in place.
+      
+      in_flight : int [optional]
+        The maximum number of individuals being evaluated at once. This
+        function waits for evaluations to complete until fewer than
+        `in_flight` individuals remain. If omitted, the number of
+        worker processes is used.
+      
+      replace : selector [optional]
+        The selector used to choose the member of `into` that each
+        individual replaces, such as ``worst`` or ``oldest``. The first
+        individual returned by the selector is replaced. If omitted, a
+        random member is replaced.
+    
+    :Raises EvaluatorError:
+        If the evaluation of any offspring in a worker process raised
+        an exception since the last call.
+    '''
+    state = _get_state()
+    pool = getattr(_context, 'evaluator_pool', None)
+    
+    synchronous = [ ]
+    for indiv in offspring:
+        indiv._eval_group = None    #pylint: disable=W0212
+        evaluator = indiv._eval     #pylint: disable=W0212
+        if not evaluator: evaluator = indiv._eval = indiv._eval_default  #pylint: disable=W0212
+        if pool is not None and pool.submit(evaluator, [indiv], state.callback([indiv])):
+            state.in_flight += 1
+        else:
+            synchronous.append(indiv)
+    
+    if synchronous:
+        evaluate(synchronous)
+        _insert(into, synchronous, replace)
+    if pool is None:
+        return
+    
+    limit = max(1, int(in_flight or pool.workers))
+    busy = 0.0
+    while True:
+        completed = _wait(state, lambda: state.in_flight < limit)
+        busy += _receive(state, completed)
+        for individuals, (_, _, error) in completed:
+            if error is None:
+                _insert(into, individuals, replace)
+        
+        if state.in_flight < limit:
+            break
+    
+    _count_time(state, busy, pool.workers)
+    _raise_error(state)
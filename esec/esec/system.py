@@ -5,18 +5,23 @@ for fully customisable breeding systems.
 import sys, random, traceback
 from warnings import warn
 from esec.utils import ConfigDict, cfg_validate, merge_cls_dicts
-from esec.utils.exceptions import EvaluatorError, ESDLCompilerError
+from esec.utils.exceptions import EvaluatorError
 
-from esdlc import compileESDL
-from esdlc.emitters.esec import emit
+from esdlc.emitters.esec import DEFAULT_CONTEXT, Profiler
 
 from esec import GLOBAL_ESDL_FUNCTIONS
 from esec.monitors import MonitorBase
-from esec.individual import Individual, OnIndividual
+from esec.individual import Individual, OnIndividual, defer_evaluation
+from esec.population import Population, iter_group
 import esec.generators  #pylint: disable=W0611
-from esec.species import SPECIES
+import esec.steadystate
+from esec.species import SPECIES, registry as species_registry
+from esec.pool import EvaluatorPool
+from esec.cache import FitnessCache
+from esec.compilecache import CompileCache, compile_definition
 
 import esec.context
+import esec.checkpoint
 
 class GroupAlias(object):   #pylint: disable=R0903
     '''Represents an aliased group.'''
@@ -29,6 +34,42 @@ class GroupAlias(object):   #pylint: disable=R0903
     def __getitem__(self, key):         return esec.context.context[self._source_name].__getitem__(key)
     def __setitem__(self, key, value):  return esec.context.context[self._source_name].__setitem__(key, value)
 
+class _SystemContext(dict):
+    '''The execution context of a system. Looking up a name provided by
+    a species that has not been instantiated instantiates it.
+    '''
+    def __init__(self, system, *args, **kwargs):
+        super(_SystemContext, self).__init__(*args, **kwargs)
+        self._system = system
+    
+    def __missing__(self, key):
+        if self._system._add_species(key):     #pylint: disable=W0212
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+def _group(_source):
+    '''Creates a group from the individuals in `_source`.
+    
+    Unevaluated members of the group are evaluated together when the
+    fitness of any one of them is first requested. The group is a
+    `Population`, which caches values such as its best member.
+    '''
+    group = Population([i.born() for i in _source])
+    defer_evaluation(group)
+    return group
+
+def _evaluate(_source, evaluator=None):
+    '''Assigns `evaluator` to every individual in `_source` and discards
+    any existing fitness values. The individuals are evaluated together
+    when the fitness of any one of them is first requested.
+    '''
+    group = list(_source)
+    for indiv in group:
+        indiv._eval = evaluator     #pylint: disable=W0212
+        del indiv.fitness
+    defer_evaluation(group)
+    Population.invalidate_all()
+
 class System(object):
     '''Provides a system using a dynamically generated controller.
     '''
@@ -37,6 +78,27 @@ class System(object):
         'system': {
             # The textual description of the system using ESDL
             'definition': str,
+            # Settings for evaluating individuals in parallel
+            'evaluator_pool?': {
+                # The number of worker processes (0 for one per CPU)
+                'workers?': int,
+            },
+            # Settings for reusing fitness values
+            'fitness_cache?': {
+                # The maximum number of fitness values (0 for default)
+                'size?': int,
+            },
+            # The storage type ('list' or 'array') for each species name
+            'genome_storage?': dict,
+            # The optimisation level (0-3) used when generating code
+            'optimise?': int,
+            # Settings for reusing compiled definitions
+            'compile_cache?': {
+                # The directory to store compiled definitions in
+                'path?': str,
+            },
+            # True to record the time taken by each statement
+            'profile?': bool,
         },
         # The block selector (must support iter(selector))
         'selector?': '*'
@@ -48,6 +110,9 @@ class System(object):
             # functions or public_context when bound to a species.
             # All other filters are assumed to be OnIndividual and are
             # included implicitly.
+            
+            # Optimisation level for generated code (see esdlc.emitters.esec.emit)
+            'optimise': 2,
         }
     }
     
@@ -71,6 +136,7 @@ class System(object):
         self.monitor = None
         self.selector = None
         self.selector_current = None
+        self._selector_index = 0
         
         self._in_step = False
         self._next_block = []
@@ -78,38 +144,75 @@ class System(object):
 
         # Compile code
         self.definition = self.cfg.system.definition
-        self._context = context = {
+        self.lscape = lscape
+        self._context = context = _SystemContext(self, {
             'config': self.cfg,
-            'rand': random.Random(cfg.random_seed),
+            'rand': self._create_rand(self.cfg),
             'notify': self._do_notify
-        }
+        })
+        self._initial_context = None
         
-        # Add species settings to context
-        for cls in SPECIES:
-            inst = context[cls.name] = cls(self.cfg, lscape)
-            try:
-                for key, value in inst.public_context.iteritems():
-                    context[key.lower()] = value
-            except AttributeError: pass
+        # Species are instantiated when a name they provide is first
+        # used, except for those that do not list their names. Later
+        # types in SPECIES take precedence over earlier ones.
+        self._species = { }
+        self._species_registry = species_registry()
+        for cls in reversed(SPECIES):
+            if cls.public_names is None:
+                self._create_species(cls)
 
+        # Start worker processes for parallel evaluation. Workers create
+        # species when they first receive individuals of that species.
+        self.evaluator_pool = None
+        if self.cfg.system.evaluator_pool is not None:
+            self.evaluator_pool = EvaluatorPool([lscape] if lscape else [],
+                                                SPECIES, (self.cfg, self.lscape),
+                                                self.cfg.system.evaluator_pool.workers,
+                                                self.cfg.random_seed)
+        
+        # Create the fitness cache
+        self.fitness_cache = None
+        if self.cfg.system.fitness_cache is not None:
+            self.fitness_cache = FitnessCache(self.cfg.system.fitness_cache.size)
+        
         # Add external values to context
         for key, value in self.cfg.system.iteritems():
             if isinstance(key, str):
                 key_lower = key.lower()
-                if key_lower in context:
+                if key_lower in context or key_lower in self._species_registry:
                     warn("Overriding variable/function '%s'" % key_lower)
                 context[key_lower] = value
             else:
                 warn('System dictionary contains non-string key %r' % key)
         
         
-        model, self.validation_result = compileESDL(self.definition, context)
-        if not self.validation_result:
-            raise ESDLCompilerError(self.validation_result, "Errors occurred while compiling system.")
-        self._code_string, internal_context = emit(model, out=None, optimise_level=0, profile='_profiler' in context)
+        # Create the statement profiler
+        if self.cfg.system.profile and '_profiler' not in context:
+            context['_profiler'] = Profiler()
+        self.profiler = context.get('_profiler')
+        
+        self.compile_cache = None
+        if self.cfg.system.compile_cache is not None:
+            self.compile_cache = CompileCache(self.cfg.system.compile_cache.path)
+        names = dict.fromkeys(self._species_registry)
+        names.update(context)
+        compiled, self.validation_result = compile_definition(self.definition, names,
+                                                              self.cfg.system.optimise,
+                                                              self.profiler is not None,
+                                                              self.compile_cache)
+        self._code_string = compiled.code_string
+        
+        # Instantiate the species used by the definition
+        for name in compiled.names:
+            if name not in context:
+                self._add_species(name)
         
+        internal_context = dict(DEFAULT_CONTEXT)
         internal_context['_yield'] = lambda name, group: self.monitor.on_yield(self, name, group)
         internal_context['_alias'] = GroupAlias
+        internal_context['_group'] = _group
+        internal_context['_evaluate'] = _evaluate
+        internal_context['_iter'] = iter_group
         
         for key, value in internal_context.iteritems():
             if key in context:
@@ -118,18 +221,70 @@ class System(object):
 
         esec.context._context.context = context
         esec.context._context.config = context['config']
+        esec.context._context.random_seed = self.cfg.random_seed
         esec.context._context.rand = context['rand']
         esec.context._context.notify = context['notify']
+        esec.context._context.evaluator_pool = self.evaluator_pool
+        esec.context._context.fitness_cache = self.fitness_cache
+        esec.context._context.counters = { }
         
         self.monitor = monitor or MonitorBase()
-        self.selector = self.cfg['selector'] or [name for name in model.block_names if name != model.INIT_BLOCK_NAME]
+        self.selector = self.cfg['selector'] or [name for name in compiled.block_names
+                                            if name != compiled.init_block_name]
         self.selector_current = iter(self.selector)
         
-        for func in model.externals.iterkeys():
-            if func not in context:
+        for func in compiled.externals:
+            if func not in context and func not in self._species_registry:
                 context[func] = OnIndividual(func)
         
-        self._code = compile(self._code_string, 'ESDL Definition', 'exec')
+        self._code = compiled.code
+        self._init_call = '_block_' + compiled.init_block_name + '()'
+        
+        # Values in the context at this point are stored by reference
+        # in checkpoints.
+        self._initial_context = dict(context)
+    
+    def _create_species(self, cls):
+        '''Returns the instance of the species type `cls`, creating it
+        and adding the names it provides to the context if necessary.
+        
+        Names that are already in the context, such as those provided
+        in the ``system`` configuration, are not replaced.
+        '''
+        inst = self._species.get(cls)
+        if inst is None:
+            inst = self._species[cls] = cls(self.cfg, self.lscape)
+            names = [(cls.name, inst)]
+            names.extend((key.lower(), value) for key, value in getattr(inst, 'public_context', { }).iteritems())
+            for key, value in names:
+                if key not in self._context and self._species_registry.get(key, cls) is cls:
+                    self._context[key] = value
+                    # Species are stored by reference in checkpoints
+                    if self._initial_context is not None:
+                        self._initial_context[key] = value
+        return inst
+    
+    def _add_species(self, name):
+        '''Instantiates the species providing `name` if it has not been
+        instantiated. Returns ``True`` if `name` is now in the context.
+        '''
+        cls = self._species_registry.get(name)
+        if cls is None:
+            return False
+        self._create_species(cls)
+        return name in self._context
+    
+    @staticmethod
+    def _create_rand(cfg):
+        '''Returns the random number generator for the system.
+        
+        If ``replicate`` is specified in `cfg`, the generator is an
+        independent stream derived from ``random_seed`` for that
+        replicate. Otherwise, it is seeded with ``random_seed``.
+        '''
+        if cfg.replicate is None or cfg.random_seed is None:
+            return random.Random(cfg.random_seed)
+        return random.Random(esec.context.derive_seed(cfg.random_seed, 'replicate', cfg.replicate))
     
     def _do_notify(self, sender, name, value):
         '''Queues a message for the current monitor.
@@ -146,6 +301,19 @@ class System(object):
         '''
         self.monitor._on_notify(sender, name, value)    #pylint: disable=W0212
     
+    def _flush_statistics(self):
+        '''Sends the statistics accumulated by `esec.context.count` and
+        the statement profiler to the monitor.
+        
+        Profiler results are sent as a ``'Profile'`` notification from
+        ``'System'`` containing the value returned by `Profiler.flush`.
+        '''
+        esec.context.flush_counts()
+        if self.profiler is not None:
+            profile = self.profiler.flush()
+            if profile:
+                self.monitor.notify('System', 'Profile', profile)
+    
     def info(self, level):
         '''Report the current configuration.
         
@@ -208,6 +376,7 @@ class System(object):
             # Run the initialisation block
             exec self._code in self._context
             
+            self._flush_statistics()
             self.monitor.on_post_reset(self)
         except KeyboardInterrupt:
             raise
@@ -219,6 +388,7 @@ class System(object):
                 ex_type, ex_value = ex[0], ex[1]
                 ex_trace = ''.join(traceback.format_exception(*ex))
             self.monitor.on_exception(self, ex_type, ex_value, ex_trace)
+            self._flush_statistics()
             self.monitor.on_post_reset(self)
             self.monitor.on_run_end(self)
             return
@@ -269,7 +439,9 @@ class System(object):
                             block_name = next(self.selector_current)
                         except StopIteration:
                             self.selector_current = iter(self.selector)
+                            self._selector_index = 0
                             block_name = next(self.selector_current)
+                        self._selector_index += 1
                         block_name = str(block_name).lower()
                     
                     try:
@@ -287,6 +459,7 @@ class System(object):
                             raise
                 
                 except KeyboardInterrupt:
+                    self._flush_statistics()
                     self.monitor.on_run_end(self)
                     raise
                 except:
@@ -295,10 +468,127 @@ class System(object):
                     ex_trace = ''.join(traceback.format_exception(*ex))
                     self.monitor.on_exception(self, ex_type, ex_value, ex_trace)
                 
+                self._flush_statistics()
                 self.monitor.on_post_breed(self)
         finally:
             self._in_step = False
     
+    def checkpoint(self, path, extra=None):
+        '''Saves the current state of the system to `path`.
+        
+        The state includes every group and variable in the system, the
+        state of the random number generators, the birthday counter,
+        the fitness cache, the number of evaluations sent to the
+        evaluator pool, the position of the block selector and the
+        statistics held by the monitor. Any picklable value provided as
+        `extra` is also saved and is returned by `resume`. A new system
+        constructed with the same configuration can continue the run by
+        calling `resume`, and will produce identical results to a run
+        that was not interrupted.
+        
+        This method should not be called while a step is executing.
+        
+        :See: esec.checkpoint
+        '''
+        if self._in_step:
+            raise RuntimeError('Checkpoints cannot be saved during a step')
+        
+        initial = self._initial_context
+        context = dict((key, value) for key, value in self._context.iteritems()
+                       if not (key in initial and initial[key] is value) and
+                          not key.startswith('_block_') and
+                          key not in ('__builtins__', '_global'))
+        get_state = getattr(self.monitor, 'get_state', None)
+        lscape_rand = getattr(self.lscape, 'rand', None)
+        
+        self._flush_statistics()
+        esec.checkpoint.save(path, initial, {
+            'context': context,
+            'rand': self._context['rand'].getstate(),
+            'landscape_rand': lscape_rand.getstate() if lscape_rand else None,
+            'birthday': Individual._birthday,     #pylint: disable=W0212
+            'fitness_cache': self.fitness_cache,
+            'selector_index': self._selector_index,
+            'monitor': get_state() if get_state else None,
+            'evaluator_pool': self.evaluator_pool.get_state() if self.evaluator_pool else None,
+            'extra': extra,
+        }, exclude=(self, self.monitor), info={
+            'species': sorted(cls.name for cls in self._species),
+        })
+    
+    def resume(self, path):
+        '''Restores the state saved by `checkpoint` from `path`. Each
+        subsequent call to `step` continues the saved run.
+        
+        This is used instead of `begin`. The monitor's ``on_run_start``
+        is called, but the initialisation block is not executed and
+        ``on_pre_reset`` and ``on_post_reset`` are not called.
+        
+        :Returns:
+            The value passed to `checkpoint` as ``extra``, or ``None``
+            if the checkpoint could not be loaded.
+        '''
+        #pylint: disable=W0122
+        
+        try:
+            self.monitor.on_run_start(self)
+            
+            # Objects are stored by reference, so the same species must
+            # exist as when the checkpoint was saved.
+            info = esec.checkpoint.load_info(path)
+            for name in info['species']:
+                self._add_species(name)
+            
+            state = esec.checkpoint.load(path, self._initial_context, exclude=(self, self.monitor))
+            
+            # Define the blocks without running the initialisation block
+            code_string = self._code_string.rpartition(self._init_call)[0]
+            exec compile(code_string, 'ESDL Definition', 'exec') in self._context
+            self._block_cache = { }
+            self._context.update(state['context'])
+            
+            self._context['rand'].setstate(state['rand'])
+            if state['landscape_rand'] is not None:
+                self.lscape.rand.setstate(state['landscape_rand'])
+            Individual._birthday = state['birthday']    #pylint: disable=W0212
+            
+            if self.fitness_cache is not None and state['fitness_cache'] is not None:
+                self.fitness_cache = state['fitness_cache']
+                esec.context._context.fitness_cache = self.fitness_cache
+            
+            self.selector_current = iter(self.selector)
+            self._selector_index = state['selector_index']
+            for _ in xrange(self._selector_index):
+                next(self.selector_current)
+            
+            set_state = getattr(self.monitor, 'set_state', None)
+            if set_state and state['monitor'] is not None:
+                set_state(state['monitor'])
+            
+            if self.evaluator_pool is not None and state.get('evaluator_pool') is not None:
+                self.evaluator_pool.set_state(state['evaluator_pool'])
+            return state.get('extra')
+        except KeyboardInterrupt:
+            raise
+        except:
+            ex = sys.exc_info()
+            ex_type, ex_value = ex[0], ex[1]
+            ex_trace = ''.join(traceback.format_exception(*ex))
+            self.monitor.on_exception(self, ex_type, ex_value, ex_trace)
+            self.monitor.on_run_end(self)
+    
     def close(self):
         '''Executes clean-up code.'''
-        self.monitor.on_run_end(self)
\ No newline at end of file
+        if self.evaluator_pool is not None:
+            try:
+                esec.steadystate.wait_async(self._context, self.evaluator_pool)
+            except EvaluatorError as ex:
+                self.monitor.on_exception(self, *ex.args)
+        self._flush_statistics()
+        self.monitor.on_run_end(self)
+        if self.evaluator_pool is not None:
+            self.evaluator_pool.close()
+            if esec.context._context.evaluator_pool is self.evaluator_pool:
+                esec.context._context.evaluator_pool = None
+        if esec.context._context.fitness_cache is self.fitness_cache:
+            esec.context._context.fitness_cache = None
\ No newline at end of file
@@ -4,11 +4,17 @@ Support functions for the |esec| framework.
 '''
 import sys, copy, os.path
 import itertools
+from array import array
 from warnings import warn
 from esec.utils.attributedict import attrdict
 from esec.utils.configdict import ConfigDict
 from esec.utils.exceptions import ExceptionGroup, UnexpectedKeyWarning
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 def a_or_an(string):
     '''Returns either 'a' or 'an' depending on the value in `string`.
 
@@ -187,6 +193,21 @@ def overlapped_pairs(source):
     first = next(p2, None)
     return itertools.izip(p1, itertools.chain(p2, itertools.repeat(first)))
 
+def genome_matrix(individuals, length):
+    '''Returns a NumPy matrix of floating-point values containing the
+    genomes of `individuals`, one per row. Every individual must have
+    `length` genes.
+    
+    Genomes stored in ``array`` instances are read directly from their
+    buffers. This function requires NumPy.
+    '''
+    if all(type(indiv.genome) is array for indiv in individuals):
+        return numpy.array([numpy.frombuffer(indiv.genome, dtype=indiv.genome.typecode) for indiv in individuals],
+                           dtype=float)
+    matrix = numpy.fromiter(itertools.chain.from_iterable(indiv.genome for indiv in individuals),
+                            float, len(individuals) * length)
+    return matrix.reshape(len(individuals), length)
+
 _is_ironpython = None
 
 def is_ironpython():
@@ -28,6 +28,7 @@ class TourSpecies(SequenceSpecies):
     '''
     
     name = 'tour'
+    public_names = SequenceSpecies.public_names + ('build_tours',)
     
     def __init__(self, cfg, eval_default):
         super(TourSpecies, self).__init__(cfg, eval_default)
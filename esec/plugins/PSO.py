@@ -31,6 +31,7 @@ class PSOIndividual(RealIndividual):
     making the length of the individual half of the length of the genome. Velocity
     values may be accessed using the `velocities` property.
     '''
+    __slots__ = ( )
     
     @property
     def genome_string(self):
@@ -75,6 +76,8 @@ class PSOSpecies(RealSpecies):
     '''
     
     name = 'pso'
+    public_names = ('random_pso', 'update_velocity', 'update_position', 'update_position_clamp',
+                    'update_position_wrap', 'update_position_bounce')
     
     def __init__(self, cfg, eval_default):
         super(PSOSpecies, self).__init__(cfg, eval_default)
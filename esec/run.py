@@ -68,16 +68,24 @@ Multiple "batch" configuration model with logging of results
 
 __docformat__ = 'restructuredtext'
 
+import ast
 import collections
+import hashlib
+import marshal
+import multiprocessing
 import optparse
 import os
+import signal
 import sys
+import tempfile
 import time
+import traceback
 from itertools import islice
 from StringIO import StringIO
 from warnings import warn
 
 from esec import Experiment
+import esec.landscape
 from esec.landscape import LANDSCAPES
 from esec.monitors import ConsoleMonitor, CSVMonitor, MultiMonitor, MultiTarget
 from esec.utils import ConfigDict, settings_split, is_ironpython
@@ -131,21 +139,178 @@ overlays.
 When executing ``run.py`` with the ``--config`` (``-c``) option, the
 string passed is used to select and overlay these dictionarys over the
 configuration passed to `Experiment`.
-'''
 
-# Add keys collected from landscape types
-# Defined as a function to keep variables local
-def _import_landscapes():
-    '''Imports all default landscapes.'''
-    for lscape in LANDSCAPES:
-        name = lscape.ltype + "." + lscape.__name__
-        configs[name] = { 'landscape': { 'class': lscape } }
-_import_landscapes()
+Names of landscape types (such as ``BVP.OneMax``) are added when they
+are first used by `_add_landscape_config`.
+'''
 
 # Add keys collected from dialects
 default.update(dialects.default)
 configs.update(dialects.configs)
 
+#=======================================================================
+# Index of landscapes, configurations and plugins
+#=======================================================================
+
+_INDEX_FORMAT = 1
+'''The current format of the index file.'''
+
+_INDEX_FOLDERS = ('cfgs', 'plugins')
+'''The folders containing configuration and plugin modules, in the
+order that they are searched.'''
+
+_MODULE_NAMES = ('batch', 'config', 'configs', 'defaults', 'settings')
+'''The names that are read from configuration and plugin modules.'''
+
+_INDEX = None
+'''The index used by this process, once it has been loaded.'''
+
+def _index_stamp():
+    '''Returns the path, size and modification time of every module
+    described by the index.
+    '''
+    stamp = [ ]
+    for root in (esec.landscape.__path__[0], ) + _INDEX_FOLDERS:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename.endswith('.py'):
+                    path = os.path.join(dirpath, filename)
+                    info = os.stat(path)
+                    stamp.append((path, info.st_size, info.st_mtime))
+    return stamp
+
+def _module_names(path):
+    '''Returns the names in `_MODULE_NAMES` that are defined by the
+    module at `path` and the names in its ``configs`` dictionary. Only
+    names that are defined at the top level of the module are found.
+    '''
+    with open(path, 'rU') as source:
+        try:
+            tree = ast.parse(source.read(), path)
+        except (SyntaxError, TypeError):
+            return (), ()
+    
+    names, config_names = set(), [ ]
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            targets = [node.name]
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            targets = [(alias.asname or alias.name).partition('.')[0] for alias in node.names]
+        elif isinstance(node, ast.Assign):
+            targets = [target.id for target in node.targets if isinstance(target, ast.Name)]
+            if 'configs' in targets and isinstance(node.value, ast.Dict):
+                config_names.extend(key.s for key in node.value.keys if isinstance(key, ast.Str))
+        else:
+            continue
+        names.update(name for name in targets if name in _MODULE_NAMES)
+    return tuple(sorted(names)), tuple(config_names)
+
+def _index_modules():
+    '''Returns the modules in `_INDEX_FOLDERS` that `_load_module` can
+    load, keyed by folder and module name.
+    
+    Each value is a tuple containing the path of the module, ``True``
+    if it is loaded with ``__import__`` or ``False`` if it is loaded
+    with ``exec``, and the names returned by `_module_names`.
+    '''
+    modules = { }
+    for folder in _INDEX_FOLDERS:
+        for dirpath, _, filenames in os.walk(folder):
+            package = os.path.relpath(dirpath, folder).split(os.sep) if dirpath != folder else [ ]
+            for filename in (f for f in filenames if f.endswith('.py')):
+                stem = filename[:-3]
+                if stem == '__init__':
+                    parts, imported = package, True
+                else:
+                    # Files with periods in their names are executed
+                    # if they are not in a package.
+                    parts, imported = package + [stem], '.' not in stem
+                    if not imported and package: continue
+                if not parts: continue
+                
+                key = (folder, '.'.join(parts))
+                if imported or key not in modules:
+                    path = os.path.join(dirpath, filename)
+                    modules[key] = (path, imported) + _module_names(path)
+    return modules
+
+def _build_index():
+    '''Returns a new index of the available landscapes and modules.
+    
+    All landscape modules are imported to build the index, but
+    configuration and plugin modules are only parsed.
+    '''
+    landscapes = { }
+    for lscape in LANDSCAPES:
+        landscapes[lscape.ltype + "." + lscape.__name__] = (lscape.__module__, lscape.__name__)
+    
+    modules = _index_modules()
+    # Earlier folders take precedence when modules define the same
+    # configuration name.
+    exports = { }
+    for key, entry in sorted(modules.iteritems(), reverse=True,
+                             key=lambda item: (_INDEX_FOLDERS.index(item[0][0]), item[0][1])):
+        exports.update(dict.fromkeys(entry[3], key))
+    
+    return { 'landscapes': landscapes, 'modules': modules, 'exports': exports }
+
+def _get_index():
+    '''Returns the index of landscapes, configurations and plugins.
+    
+    The index is stored in the temporary directory and is rebuilt when
+    any of the files it describes are added, removed or modified. This
+    allows a configuration string to be resolved without importing
+    every landscape and scanning the ``cfgs`` and ``plugins`` folders.
+    
+    :Returns:
+        A dictionary containing ``landscapes``, which maps landscape
+        names to their module and class names, ``modules``, which is
+        returned by `_index_modules`, and ``exports``, which maps the
+        names of configurations defined by modules to the folder and
+        name of the module.
+    '''
+    global _INDEX   #pylint: disable=W0603
+    if _INDEX is None:
+        stamp = _index_stamp()
+        key = hashlib.sha1(os.path.abspath(os.curdir) + '\0' + esec.landscape.__path__[0]).hexdigest()
+        path = os.path.join(tempfile.gettempdir(), 'esec_index_%s' % key)
+        try:
+            with open(path, 'rb') as src:
+                data = marshal.load(src)
+            if data[0] == _INDEX_FORMAT and data[1] == stamp:
+                _INDEX = data[2]
+        except (IOError, OSError, EOFError, ValueError, TypeError, IndexError):
+            pass
+        
+        if _INDEX is None:
+            _INDEX = _build_index()
+            temp_path = '%s.%d.tmp' % (path, os.getpid())
+            try:
+                with open(temp_path, 'wb') as dest:
+                    marshal.dump((_INDEX_FORMAT, stamp, _INDEX), dest)
+                os.rename(temp_path, path)
+            except (IOError, OSError):
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+    return _INDEX
+
+def _add_landscape_config(name):
+    '''Adds the configuration for the landscape type `name` (for
+    example, ``'BVP.OneMax'``) to `configs`. Only the module containing
+    the landscape is imported.
+    
+    :Returns:
+        ``True`` if `name` is a landscape type; otherwise, ``False``.
+    '''
+    entry = _get_index()['landscapes'].get(name)
+    if not entry:
+        return False
+    mod_name, cls_name = entry
+    mod = __import__(mod_name, fromlist=[cls_name])
+    configs[name] = { 'landscape': { 'class': getattr(mod, cls_name) } }
+    return True
+
 #=======================================================================
 
 def _load_module(folder, mod_name):
@@ -159,6 +324,9 @@ def _load_module(folder, mod_name):
     Otherwise, if the file ``<folder>\<mod_name>.py`` exists, the
     ``exec`` statement is used to load the module.
     
+    For the folders in `_INDEX_FOLDERS`, the files are found using the
+    index returned by `_get_index`.
+    
     In either case, all exceptions are passed to the caller.
     
     :Parameters:
@@ -178,16 +346,21 @@ def _load_module(folder, mod_name):
         Returns ``None`` if the module cannot be found.
     '''
     mod_file = os.path.join(*mod_name.split('.')) if '.' in mod_name else mod_name
-    if folder:
-        py_import = os.path.join(folder, mod_file + '.py')
-        init_import = os.path.join(folder, mod_file, '__init__.py')
+    if folder in _INDEX_FOLDERS:
+        entry = _get_index()['modules'].get((folder, mod_name))
+        if not entry:
+            return None
+        imported = entry[1]
+        py_file = entry[0]
+    elif folder:
+        imported = (os.path.exists(os.path.join(folder, mod_file + '.py')) or
+                    os.path.exists(os.path.join(folder, mod_file, '__init__.py')))
         py_file = os.path.join(folder, mod_name + '.py')
     else:
-        py_import = None
-        init_import = None
+        imported = False
         py_file = mod_name + '.py'
     
-    if py_import and os.path.exists(py_import) or init_import and os.path.exists(init_import):
+    if imported:
         source = folder + '.' + mod_name
         mod = __import__(source)
         for bit in mod_name.split('.'):
@@ -220,8 +393,8 @@ def _load_config(config_string, defaults):
     '''Loads a configuration from a configuration string.'''
     cfg = ConfigDict(defaults)
     for name in (o for o in config_string.split('+') if o):
-        # Get name from configs
-        if name in configs: 
+        # Get name from configs or landscapes
+        if name in configs or _add_landscape_config(name):
             cfg.overlay(configs[name])
         # Get name from current configuration
         elif name in cfg:
@@ -229,6 +402,11 @@ def _load_config(config_string, defaults):
         # Attempt to load module from cfgs or plugins
         else:
             mod = _load_module('cfgs', name) or _load_module('plugins', name) or _load_module(None, name)
+            # Attempt to load the module that defines the configuration
+            exported = None
+            if not mod and name in _get_index()['exports']:
+                mod = _load_module(*_get_index()['exports'][name])
+                exported = name
             if not mod:
                 raise ImportError('Cannot find ' + name + ' as configuration or plugin.')
             
@@ -238,6 +416,7 @@ def _load_config(config_string, defaults):
             if mod_cfg1: configs.update(mod_cfg1)
             if mod_def: cfg.overlay(mod_def)
             if mod_cfg2: cfg.overlay(mod_cfg2)
+            if exported in configs: cfg.overlay(configs[exported])
     return cfg
 
 
@@ -299,6 +478,9 @@ def esec_run(options):
     
     # Display all the built-in configuration names
     if cfg.verbose >= 5:
+        for name in _get_index()['landscapes']:
+            if name not in configs:
+                _add_landscape_config(name)
         print HR
         print '>> Configuration Names:'
         print '\n'.join('%s=%s' % item for item in configs.iteritems())
@@ -348,6 +530,7 @@ batch_settings_syntax = {
     'csv': bool,
     'low_priority': bool,
     'quiet': bool,
+    'workers': int,
 }
 '''The syntax used for batch configurations.'''
 
@@ -361,9 +544,183 @@ batch_settings_default = {
     'csv': False,
     'low_priority': False,
     'quiet': False,
+    'workers': 1,
 }
 '''The default values used for batch configurations.'''
 
+def _run_batch_item(options, batch_cfg, batch_default, pathbase, extension,
+                    i, tags, names, config, settings):
+    '''Runs a single configuration of a batch.
+    
+    :Returns:
+        The first two lines of the summary report, or ``None`` if
+        ``batch.dry_run`` is set.
+    '''
+    # Use cfgid instead of converting i repeatedly
+    cfgid = '%04d' % i
+    # Print an obvious header
+    print '\n** ' + "*"*117
+    print ' **'
+    print ("  ** Experiment %04d." % i), (("Tags %s" % tags) if tags else "")
+    print ' **'
+    print "** "+ "*"*117 + '\n'
+    
+    # Overlay any configuration names specified for this run.
+    if names:
+        try:
+            cfg = _load_config(names, batch_default)
+        except AttributeError:
+            print >> sys.stderr, 'Loading config file(s) failed: '+ names
+            raise
+    else:
+        cfg = ConfigDict(batch_default)
+    
+    # Overlay any config dictionary (copy to avoid shared reference issues)
+    cfg.overlay(ConfigDict(config) if isinstance(config, ConfigDict) else config)
+    # Override cfg.verbose
+    if options.verbose >= 0:
+        cfg.verbose = int(options.verbose)
+    # Use settings strings to override configurations
+    for key, value in settings_split(settings).iteritems():
+        cfg.set_by_name(key, value)
+    
+    # Write summary to a buffer first
+    summary_buffer = StringIO()
+    
+    # Helper function to open a unique file
+    def _open(filepattern, mode='w'):
+        '''Returns an open file. `filepattern` must contain a ``%d``
+        value so a unique index may be included.
+        '''
+        i = 0
+        filename = filepattern % i
+        # Not reliable, but no other choice in Python
+        # (specifically, open() has no way to fail when a file exists)
+        while os.path.exists(filename):
+            i += 1
+            filename = filepattern % i
+        return open(filename, mode)
+    
+    # Close files/objects in this list after this run
+    open_files = []
+    
+    # If the monitor has been specified as a dictionary, specify output files.
+    # If the monitor has been specified directly, don't try and change it.
+    if isinstance(cfg.monitor, (ConfigDict, dict)):
+        report_out = _open(os.path.join(pathbase, cfgid + '.%04d' + extension))
+        summary_out = _open(os.path.join(pathbase, cfgid + '.%04d._summary' + extension))
+        config_out = _open(os.path.join(pathbase, cfgid + '.%04d._config.txt'))
+        open_files.extend((report_out, summary_out, config_out))
+        
+        if not batch_cfg.csv:
+            if batch_cfg.quiet:
+                # MultiTarget sends the same output to both the console and the files.
+                cfg.overlay({'monitor': {
+                    'report_out': report_out,
+                    'summary_out': MultiTarget(summary_out, sys.stdout, summary_buffer),
+                    'config_out': config_out,
+                    'error_out': MultiTarget(summary_out, sys.stderr),
+                    'verbose': max(4, cfg.verbose),
+                }})
+            else:
+                # MultiTarget sends the same output to both the console and the files.
+                cfg.overlay({'monitor': {
+                    'report_out': MultiTarget(report_out, sys.stdout),
+                    'summary_out': MultiTarget(summary_out, sys.stdout, summary_buffer),
+                    'config_out': MultiTarget(config_out, sys.stdout),
+                    'error_out': MultiTarget(summary_out, sys.stderr),
+                    'verbose': max(4, cfg.verbose),
+                }})
+        else:
+            # MultiMonitor sends the same callbacks to different monitors.
+            monitor_cfg = ConfigDict(cfg.monitor)
+            if batch_cfg.quiet:
+                monitor_cfg['report_out'] = None
+                monitor_cfg['config_out'] = None
+            console_monitor = ConsoleMonitor(monitor_cfg)
+            monitor_cfg.overlay({
+                'report_out': report_out,
+                'summary_out': MultiTarget(summary_out, summary_buffer),
+                'config_out': config_out,
+                'error_out': summary_out,
+                'verbose': max(4, cfg.verbose),
+            })
+            csv_monitor = CSVMonitor(monitor_cfg)
+            
+            cfg.monitor = {
+                'class': MultiMonitor,
+                'monitors': [ console_monitor, csv_monitor ]
+            }
+    
+    # Create an Experiment instance
+    try:
+        ea_exp = Experiment(cfg)
+    except:
+        ea_exp = None
+    
+    # Run the application (and time it)
+    if batch_cfg.dry_run:
+        print '--> DRY RUN DONE <--'
+    elif ea_exp:
+        start_time = time.clock()
+        ea_exp.run()
+        print '->> DONE <<- in ', (time.clock() - start_time)
+    else:
+        print '--> ERRORS OCCURRED <--'
+    
+    for obj in open_files: obj.close()
+    
+    if batch_cfg.dry_run:
+        return None
+    
+    # Only the second line of the summary is included in the super
+    # summary file (ignore headings)
+    summary_lines = summary_buffer.getvalue().splitlines()[:2]
+    if len(summary_lines) != 2:
+        summary_lines = ['-', '-']
+    return summary_lines
+
+
+_BATCH_WORKER_ARGS = None
+'''The arguments common to every batch item run by the current worker
+process.'''
+_BATCH_WORKER_ITEMS = None
+'''The batch items that may be run by the current worker process.'''
+
+def _initialise_batch_worker(args, items):
+    '''Stores the arguments for use in `_run_batch_worker`.
+    
+    Interrupts are ignored by workers and handled in the main process.
+    '''
+    global _BATCH_WORKER_ARGS, _BATCH_WORKER_ITEMS  #pylint: disable=W0603
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _BATCH_WORKER_ARGS = args
+    _BATCH_WORKER_ITEMS = items
+
+def _run_batch_worker(i):
+    '''Runs batch item `i` in a worker process.
+    
+    Console output is captured and returned rather than displayed, so
+    that output from different items is not interleaved.
+    
+    :Returns:
+        A tuple containing `i`, the captured output, the summary lines
+        returned by `_run_batch_item` and ``True`` if the item completed
+        without raising an exception.
+    '''
+    output = StringIO()
+    saved_stdout, saved_stderr = sys.stdout, sys.stderr
+    sys.stdout = sys.stderr = output
+    try:
+        try:
+            summary_lines = _run_batch_item(*(_BATCH_WORKER_ARGS + _BATCH_WORKER_ITEMS[i]))
+        except Exception:   #pylint: disable=W0703
+            traceback.print_exc()
+            return i, output.getvalue(), None, False
+    finally:
+        sys.stdout, sys.stderr = saved_stdout, saved_stderr
+    return i, output.getvalue(), summary_lines, True
+
 def esec_batch(options):
     '''Runs a batch file of configurations and saves the results.
     
@@ -420,6 +777,11 @@ def esec_batch(options):
     batch.quiet=True
         Hide console output
     
+    batch.workers=...
+        Number of experiments to run at once using separate processes.
+        Use 0 for one process per CPU. Console output from each
+        experiment is displayed when it completes.
+    
     '''
     # Disable pylint complaints about branches and local variables
     #pylint: disable=R0912,R0914
@@ -428,8 +790,11 @@ def esec_batch(options):
     # A batch file is a normal .py file with a method named "batch" that 
     # returns a sequence of tuples of settings.
     mod = _load_module('cfgs', options.batch)
-    if not mod:
-        raise ImportError('Cannot find ' + options.batch + ' as batch file.')
+    if not mod or not mod.get('batch'):
+        batch_names = sorted(name for (folder, name), entry in _get_index()['modules'].iteritems()
+                             if folder == 'cfgs' and 'batch' in entry[2])
+        raise ImportError('Cannot find ' + options.batch + ' as batch file. ' +
+                          'Available batch files are: ' + ', '.join(batch_names))
     # Update configs with anything specified in the batch file
     configs.update(mod.get('configs', None) or { })
     # Get any settings overrides from the batch file
@@ -511,6 +876,24 @@ def esec_batch(options):
     # Create a super summary (summary of the summary lines)
     summary_file = open(os.path.join(pathbase, '_summary' + extension), 'w')
     
+    # Helper function to write summary lines in order
+    def _write_summary(i, summary_lines):
+        '''Writes the summary for item `i` to the super summary file.'''
+        if summary_file and summary_lines:
+            if batch_cfg.csv:
+                if i == 0:
+                    summary_file.write('#,' + summary_lines[0] + '\n')
+                summary_file.write('%d,%s\n' % (i, summary_lines[1]))
+            else:
+                if i == 0:
+                    summary_file.write('  #  ' + summary_lines[0] + '\n')
+                summary_file.write('%04d %s\n' % (i, summary_lines[1]))
+            summary_file.flush()
+    
+    item_args = (options, batch_cfg, batch_default, pathbase, extension)
+    # Items to run using worker processes
+    pending = collections.OrderedDict()
+    
     # Run each configuration of the batch
     for i, batch_item in enumerate(batch):
         # Use get method (dictionary) if available;
@@ -549,134 +932,47 @@ def esec_batch(options):
         if (batch_cfg.include_tags and not batch_cfg.include_tags.intersection(tags) or
             batch_cfg.exclude_tags and batch_cfg.exclude_tags.intersection(tags)):
             continue
-        # Print an obvious header
-        print '\n** ' + "*"*117
-        print ' **'
-        print ("  ** Experiment %04d." % i), (("Tags %s" % tags) if tags else "")
-        print ' **'
-        print "** "+ "*"*117 + '\n'
         
-        # Overlay any configuration names specified for this run.
-        if names:
-            try:
-                cfg = _load_config(names, batch_default)
-            except AttributeError:
-                print >> sys.stderr, 'Loading config file(s) failed: '+ names
-                raise
+        if batch_cfg.workers == 1:
+            _write_summary(i, _run_batch_item(*(item_args + (i, tags, names, config, settings))))
         else:
-            cfg = ConfigDict(batch_default)
-        
-        # Overlay any config dictionary (copy to avoid shared reference issues)
-        cfg.overlay(ConfigDict(config) if isinstance(config, ConfigDict) else config)
-        # Override cfg.verbose
-        if options.verbose >= 0:
-            cfg.verbose = int(options.verbose)
-        # Use settings strings to override configurations
-        for key, value in settings_split(settings).iteritems():
-            cfg.set_by_name(key, value)
-        
-        # Write summary to a buffer first, then only include the second line
-        # in the super summary file (ignore headings)
-        summary_buffer = StringIO()
-
-        # Helper function to open a unique file
-        def _open(filepattern, mode='w'):
-            '''Returns an open file. `filepattern` must contain a ``%d``
-            value so a unique index may be included.
-            '''
-            i = 0
-            filename = filepattern % i
-            # Not reliable, but no other choice in Python
-            # (specifically, open() has no way to fail when a file exists)
-            while os.path.exists(filename):
-                i += 1
-                filename = filepattern % i
-            return open(filename, mode)
-        
-        # Close files/objects in this list after this run
-        open_files = []
-        
-        # If the monitor has been specified as a dictionary, specify output files.
-        # If the monitor has been specified directly, don't try and change it.
-        if isinstance(cfg.monitor, (ConfigDict, dict)):
-            report_out = _open(os.path.join(pathbase, cfgid + '.%04d' + extension))
-            summary_out = _open(os.path.join(pathbase, cfgid + '.%04d._summary' + extension))
-            config_out = _open(os.path.join(pathbase, cfgid + '.%04d._config.txt'))
-            open_files.extend((report_out, summary_out, config_out))
-            
-            if not batch_cfg.csv:
-                if batch_cfg.quiet:
-                    # MultiTarget sends the same output to both the console and the files.
-                    cfg.overlay({'monitor': {
-                        'report_out': report_out,
-                        'summary_out': MultiTarget(summary_out, sys.stdout, summary_buffer),
-                        'config_out': config_out,
-                        'error_out': MultiTarget(summary_out, sys.stderr),
-                        'verbose': max(4, cfg.verbose),
-                    }})
-                else:
-                    # MultiTarget sends the same output to both the console and the files.
-                    cfg.overlay({'monitor': {
-                        'report_out': MultiTarget(report_out, sys.stdout),
-                        'summary_out': MultiTarget(summary_out, sys.stdout, summary_buffer),
-                        'config_out': MultiTarget(config_out, sys.stdout),
-                        'error_out': MultiTarget(summary_out, sys.stderr),
-                        'verbose': max(4, cfg.verbose),
-                    }})
-            else:
-                # MultiMonitor sends the same callbacks to different monitors.
-                monitor_cfg = ConfigDict(cfg.monitor)
-                if batch_cfg.quiet:
-                    monitor_cfg['report_out'] = None
-                    monitor_cfg['config_out'] = None
-                console_monitor = ConsoleMonitor(monitor_cfg)
-                monitor_cfg.overlay({
-                    'report_out': report_out,
-                    'summary_out': MultiTarget(summary_out, summary_buffer),
-                    'config_out': config_out,
-                    'error_out': summary_out,
-                    'verbose': max(4, cfg.verbose),
-                })
-                csv_monitor = CSVMonitor(monitor_cfg)
-                
-                cfg.monitor = {
-                    'class': MultiMonitor,
-                    'monitors': [ console_monitor, csv_monitor ]
-                }
-        
-        # Create an Experiment instance
+            pending[i] = (i, tags, names, config, settings)
+    
+    if pending:
+        workers = batch_cfg.workers or multiprocessing.cpu_count()
+        print '>>>> Running %d experiments using %d worker processes' % (len(pending), workers)
+        pool = multiprocessing.Pool(workers, _initialise_batch_worker, (item_args, pending))
         try:
-            ea_exp = Experiment(cfg)
+            # Results are displayed as they complete, but the summary is
+            # written in the original order.
+            results = pool.imap_unordered(_run_batch_worker, pending.keys())
+            completed = { }
+            order = iter(pending)
+            next_i = next(order, None)
+            for count in xrange(1, len(pending) + 1):
+                # A timeout allows KeyboardInterrupt to be raised while waiting.
+                i, output, summary_lines, succeeded = results.next(0xFFFFFFFF)
+                sys.stdout.write(output)
+                print '>>>> Experiment %04d %s (%d of %d)' % (i, 'completed' if succeeded else 'FAILED',
+                                                               count, len(pending))
+                sys.stdout.flush()
+                
+                if not succeeded and not batch_cfg.dry_run:
+                    summary_lines = ['-', '-']
+                completed[i] = summary_lines
+                while next_i in completed:
+                    _write_summary(next_i, completed.pop(next_i))
+                    next_i = next(order, None)
+            pool.close()
         except:
-            ea_exp = None
-        
-        # Run the application (and time it)
-        if batch_cfg.dry_run:
-            print '--> DRY RUN DONE <--'
-        elif ea_exp:
-            start_time = time.clock()
-            ea_exp.run()
-            print '->> DONE <<- in ', (time.clock() - start_time)
-        else:
-            print '--> ERRORS OCCURRED <--'
-        
-        # Write the summary to the super summary file.
-        if summary_file and not batch_cfg.dry_run:
-            summary_lines = summary_buffer.getvalue().splitlines()[:2]
-            if len(summary_lines) != 2:
-                summary_lines = ['-', '-']
-            if batch_cfg.csv:
-                if i == 0:
-                    summary_file.write('#,' + summary_lines[0] + '\n')
-                summary_file.write('%d,%s\n' % (i, summary_lines[1]))
-            else:
-                if i == 0:
-                    summary_file.write('  #  ' + summary_lines[0] + '\n')
-                summary_file.write('%04d %s\n' % (i, summary_lines[1]))
-            summary_file.flush()
-        
-        for obj in open_files: obj.close()
-        
+            # Pool.join requires the pool to be closed or terminated,
+            # and any exception (including KeyboardInterrupt) must stop
+            # the remaining experiments.
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    
     # Save the tag data
     if batch_cfg.include_tags or batch_cfg.exclude_tags:
         tags_file.write("#\n# Summary of cfgid's per tag\n#\n")
@@ -276,3 +276,66 @@ def check_selectors_BestOfTuple(population, best_population):
     print "len(offspring) = %d, len(population) = %d" % (len(offspring), len(best_population))
     assert len(offspring) == len(best_population), "Did not select all individials"
     assert all([i in best_population for i in offspring]), "Some individuals not in original population"
+
+def test_selectors_proportional_distribution():
+    population = make_pop_max()[:10]
+    fitnesses = [i.fitness.simple for i in population]
+    min_fitness = min(fitnesses)
+    total = float(sum(f - min_fitness for f in fitnesses))
+    expected = [(f - min_fitness) / total for f in fitnesses]
+    yield check_selectors_distribution, selectors.FitnessProportional(_source=population), population, expected
+    
+    ranked = sorted(population, key=lambda i: i.fitness, reverse=True)
+    weights = [1.5 - 2.0*0.5*i/9.0 for i in xrange(10)]
+    expected = [weights[ranked.index(i)] / sum(weights) for i in population]
+    yield check_selectors_distribution, selectors.RankProportional(_source=population, expectation=1.5), population, expected
+
+def check_selectors_distribution(_gen, population, expected):
+    count = 20000
+    offspring = [next(_gen) for _ in xrange(count)]
+    for indiv, prob in izip(population, expected):
+        actual = offspring.count(indiv) / float(count)
+        print "expected = %f, actual = %f" % (prob, actual)
+        assert abs(actual - prob) < 0.02, "Selection frequency does not match fitness"
+
+def test_selectors_Tournament_without_replacement_distribution():
+    population = make_pop_max()[:5]
+    best = max(population, key=lambda i: i.fitness)
+    count = 20000
+    wins = 0
+    for _ in xrange(count):
+        _gen = selectors.Tournament(_source=population, k=2, without_replacement=True)
+        if next(_gen) is best: wins += 1
+    # The best individual wins unless both competitors are another individual
+    expected = 1.0 - (4.0 / 5.0) ** 2
+    actual = wins / float(count)
+    print "expected = %f, actual = %f" % (expected, actual)
+    assert abs(actual - expected) < 0.02, "Best individual not selected with expected frequency"
+
+def test_selectors_Tournament_without_replacement_remainder():
+    population = make_pop_max()[:10]
+    _gen = selectors.Tournament(_source=population, k=5, without_replacement=True)
+    offspring = list(_gen)
+    assert len(set(offspring)) == len(population), "Did not select all individuals"
+    remainder = offspring[-4:]
+    print [population.index(i) for i in remainder]
+    assert remainder == sorted(remainder, key=population.index), "Remaining individuals not in original order"
+
+def test_selectors_limit_hint():
+    population = make_pop_max()
+    # Repeat some fitness values and birthdays to check the order of ties
+    population = population + population[::3]
+    for name in ('Best', 'Worst', 'Youngest', 'Oldest'):
+        for count in (0, 1, 10, len(population) - 1, len(population), len(population) + 1):
+            yield check_selectors_limit_hint, name, population, count
+
+def check_selectors_limit_hint(name, population, count):
+    expected = list(getattr(selectors, name)(_source=iter(population)))
+    
+    _gen = getattr(selectors, name)(_source=iter(population)).limit_hint(count)
+    offspring = list(islice(_gen, count))
+    print "%s: len(offspring) = %d, count = %d" % (name, len(offspring), count)
+    assert offspring == expected[:count], "Limited selection differs from full selection"
+    
+    offspring.extend(_gen)
+    assert offspring == expected, "Selection beyond the limit differs from full selection"
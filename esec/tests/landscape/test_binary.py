@@ -4,6 +4,7 @@ from esec.species.joined import JoinedIndividual, JoinedSpecies
 import esec.landscape.binary as binary
 from esec.species.binary import BinaryIndividual, BinarySpecies
 species = BinarySpecies({ }, lambda _: 0)
+bit_species = BinarySpecies({ 'system': { 'genome_storage': { 'Binary': 'bits' } } }, lambda _: 0)
 
 def test_inttobin():
     assert binary.inttobin(1, 4) == '0001' 
@@ -38,6 +39,20 @@ def check_bvp(cls):
     # test print_info works
     print '\n'.join(bvp.info(5))
     #assert False
+
+def test_packed():
+    for cls in (binary.OneMax, binary.RoyalRoad, binary.GoldbergD3B, binary.WhitleyD4B, binary.MMDP6):
+        yield check_packed, cls
+
+def check_packed(cls):
+    for cfg in cls.test_cfg:
+        bvp = cls.by_cfg_str(cfg)
+        size = bvp.size.exact
+        for genes in [[0] * size, [1] * size] + [[randrange(2) for _ in xrange(size)] for _ in xrange(20)]:
+            expected = bvp.eval(BinaryIndividual(genes, species))
+            actual = bvp.eval(BinaryIndividual(genes, bit_species))
+            assert abs(float(expected.values[0]) - float(actual.values[0])) < 1e-9, \
+                "Packed genome evaluated to %s instead of %s" % (actual, expected)
               
             
 # Special features
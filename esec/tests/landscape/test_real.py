@@ -3,6 +3,7 @@ from itertools import izip
 from esec.fitness import Fitness, EmptyFitness
 import esec.landscape.real as real
 from esec.species.real import RealIndividual, RealSpecies
+from esec.species.binary_real import BinaryRealSpecies
 species = RealSpecies({ }, lambda _: 0)
 
 def test_all_rvp():
@@ -34,3 +35,48 @@ def check_rvp(cls):
     # test print_info works
     print '\n'.join(rvp.info(5))
         
+
+def test_eval_batch():
+    classes = [getattr(real, n) for n in dir(real)]
+    classes = [c for c in classes if type(c) is type]
+    classes = [c for c in classes if issubclass(c, real.Real) and c is not real.Real and c.deterministic]
+    for cls in classes:
+        yield check_eval_batch, cls
+
+def check_eval_batch(cls):
+    for cfg in cls.test_cfg:
+        rvp = cls.by_cfg_str(cfg)
+        group = [RealIndividual([uniform(lower, upper)
+                                 for lower, upper in izip(rvp.lower_bounds, rvp.upper_bounds)],
+                                lower_bounds=rvp.lower_bounds, upper_bounds=rvp.upper_bounds,
+                                parent=species)
+                 for _ in xrange(20)]
+        serial = [rvp.eval(indiv) for indiv in group]
+        batch = rvp.eval_batch(group)
+        print '%s: _use_matrix = %s' % (cls.__name__, getattr(rvp, '_use_matrix', None))
+        assert len(batch) == len(serial), "Incorrect number of fitnesses"
+        for f1, f2 in izip(serial, batch):
+            assert type(f1) is type(f2), "Fitness types differ: %s, %s" % (type(f1), type(f2))
+            for v1, v2 in izip(f1.values, f2.values):
+                assert abs(v1 - v2) <= 1e-9 * max(1.0, abs(v1)), "Batch fitness %r differs from %r" % (v2, v1)
+
+def test_eval_batch_binary_real():
+    rvp = real.Sphere({ 'parameters': 3 })
+    binary_species = BinaryRealSpecies({ }, rvp)
+    _gen = binary_species.init_random_real(length=3, bits_per_value=8, lowest=-5.0, highest=5.0)
+    group = [next(_gen) for _ in xrange(20)]
+    serial = [rvp.eval(indiv) for indiv in group]
+    batch = rvp.eval_batch(group)
+    print 'serial = %s' % [f.values[0] for f in serial]
+    print 'batch  = %s' % [f.values[0] for f in batch]
+    for f1, f2 in izip(serial, batch):
+        assert abs(f1.values[0] - f2.values[0]) <= 1e-9 * max(1.0, abs(f1.values[0])), \
+            "Batch fitness %r differs from %r" % (f2, f1)
+
+def test_quadric():
+    rvp = real.Quadric({ 'size': { 'exact': 4 } })
+    indiv = RealIndividual([1.0, -2.0, 3.0, 0.5], lower_bounds=rvp.lower_bounds, upper_bounds=rvp.upper_bounds,
+                           parent=species)
+    # (1)^2 + (1-2)^2 + (1-2+3)^2 + (1-2+3+0.5)^2
+    expected = 1.0 + 1.0 + 4.0 + 6.25
+    assert rvp.eval(indiv).values[0] == expected, "Incorrect Quadric fitness"
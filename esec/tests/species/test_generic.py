@@ -95,3 +95,36 @@ def check_mutate(pop_gen, gen, params, expected_length):
         assert all(l <= len(i) <= h for i in pop2), "!(%s <= len(i) <= %s)" % (l, h)
     else:
         assert all(len(i) in expected_length for i in pop2), "len(i) not in %s" % (expected_length,)
+
+def test_select_genes():
+    select_genes = esec.species.select_genes
+    assert list(select_genes(10, 1.0)) == range(10), "Not every gene was selected"
+    assert list(select_genes(10, 0.0)) == [ ], "Genes were selected"
+
+    for length, genes in [(10, 3), (10, 10), (10, 20)]:
+        selected = select_genes(length, 0.5, genes)
+        assert len(set(selected)) == len(selected) == min(length, genes), "Incorrect number of genes selected"
+
+    for rate in (0.01, 0.3, 0.9):
+        yield check_select_genes, rate
+
+def check_select_genes(rate):
+    rand.seed(12345)
+    length, trials = 50, 4000
+    counts = [0] * length
+    totals = [ ]
+    for _ in xrange(trials):
+        selected = esec.species.select_genes(length, rate)
+        assert selected == sorted(set(selected)), "Genes were not in order"
+        for i in selected:
+            counts[i] += 1
+        totals.append(len(selected))
+
+    # Each gene is selected independently, so totals are binomial
+    mean = float(sum(totals)) / trials
+    variance = sum((t - mean) ** 2 for t in totals) / (trials - 1)
+    assert abs(mean - length * rate) < 0.1 * length * rate + 0.1, "Mean was %f" % mean
+    assert abs(variance - length * rate * (1 - rate)) < 0.15 * length * rate * (1 - rate) + 0.1, \
+        "Variance was %f" % variance
+    assert all(abs(c - trials * rate) < 5 * (trials * rate * (1 - rate)) ** 0.5 + 1 for c in counts), \
+        "Genes were not selected uniformly"
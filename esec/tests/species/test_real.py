@@ -63,6 +63,11 @@ def test_mutate():
         ]:
         
         yield check_mutate, gen, params, expected_genes
+        yield check_mutate, getattr(Species, gen.__name__ + '_batch'), dict(params), expected_genes
+
+def test_mutate_batch():
+    for numpy in set([real.numpy, None]):
+        yield check_mutate_batch, numpy
 
 def test_crossover_average():
     pop = _make_pop(Species.init_toggle, length=10, lowest=0.0, highest=1.0)
@@ -73,6 +78,28 @@ def test_crossover_average():
     pop2 = _make_pop(Species.crossover_average, _source=selectors.Repeat(iter(pop)), per_pair_rate=1.0, per_gene_rate=1.0)
     assert all(all(g == 0.5 for g in i.genome) for i in pop2), "didn't average each gene"
 
+def check_mutate_batch(numpy):
+    saved_numpy, real.numpy = real.numpy, numpy
+    try:
+        pop = _make_pop(Species.init_random, length=50, lowest=-1.0, highest=1.0)
+        
+        pop2 = _make_pop(Species.mutate_gaussian_batch, _source=iter(pop), per_gene_rate=0.0, block_size=30)
+        assert all(i.genome == j.genome for i, j in zip(pop, pop2)), "genes were mutated"
+        
+        pop2 = _make_pop(Species.mutate_gaussian_batch, _source=iter(pop), genes=5, block_size=30)
+        assert all(sum(g1 != g2 for g1, g2 in zip(i, j)) <= 5 for i, j in zip(pop, pop2)), "too many genes mutated"
+        assert all(-1.0 <= g <= 1.0 for i in pop2 for g in i), "genes were not clamped"
+        assert all(i.statistic['mutated'] == 1 and 'step_sum' in i.statistic for i in pop2), "statistics were not recorded"
+        
+        pop2 = _make_pop(Species.mutate_delta_batch, _source=iter(pop), per_gene_rate=1.0, step_size=0.1)
+        assert all(abs(i.statistic['step_sum'] - 5.0) < 1e-9 for i in pop2), "incorrect step_sum"
+        
+        variable = _make_pop(Species.init_random, shortest=5, longest=15, lowest=-1.0, highest=1.0)
+        pop2 = _make_pop(Species.mutate_random_batch, _source=iter(variable), per_gene_rate=1.0)
+        assert [len(i) for i in variable] == [len(i) for i in pop2], "lengths were changed"
+    finally:
+        real.numpy = saved_numpy
+
 def check_init_length_int(gen, expected_genes):
     pop = _make_pop(gen, length=10, lowest=0.0, highest=1.0)
     
@@ -0,0 +1,113 @@
+import tests
+import cPickle as pickle
+from array import array
+from itertools import islice
+from esec.context import rand
+from esec.individual import OnIndividual
+from esec.species.binary import BinarySpecies, BitGenome
+from esec.species.integer import IntegerSpecies
+from esec.species.real import RealSpecies
+
+OPERATORS = {
+    BinarySpecies: [('mutate_random', { 'per_gene_rate': 0.5 }),
+                    ('mutate_bitflip', { 'per_gene_rate': 0.5 }),
+                    ('mutate_inversion', { 'per_indiv_rate': 1.0 }),
+                    ('mutate_gap_inversion', { 'per_indiv_rate': 1.0 })],
+    IntegerSpecies: [('mutate_random', { 'per_gene_rate': 0.5 }),
+                     ('mutate_delta', { 'per_gene_rate': 0.5 }),
+                     ('mutate_gaussian', { 'per_gene_rate': 0.5 })],
+    RealSpecies: [('mutate_random', { 'per_gene_rate': 0.5 }),
+                  ('mutate_delta', { 'per_gene_rate': 0.5 }),
+                  ('mutate_gaussian', { 'per_gene_rate': 0.5 }),
+                  ('crossover_average', { })],
+}
+
+CROSSOVERS = [('crossover', { }),
+              ('crossover_uniform', { }),
+              ('crossover_discrete', { }),
+              ('crossover_one', { }),
+              ('crossover_two', { }),
+              ('crossover_different', { 'points': 2 }),
+              ('crossover_segmented', { })]
+
+def _apply(species_type, storage, operator, params):
+    cfg = { 'system': { 'genome_storage': { species_type.name: storage } } }
+    species = species_type(cfg, None)
+    rand.seed(12345)
+    population = list(islice(species.init_random(length=20), 10))
+    return population, list(OnIndividual(operator)(_source=iter(population), **params))
+
+def test_storage():
+    for species_type, operators in OPERATORS.iteritems():
+        for operator, params in operators + CROSSOVERS:
+            yield check_storage, species_type, operator, params
+
+def check_storage(species_type, operator, params):
+    list_parents, list_offspring = _apply(species_type, 'list', operator, params)
+    array_parents, array_offspring = _apply(species_type, 'array', operator, params)
+    
+    typecode = species_type.genome_typecode
+    assert all(type(i.genome) is list for i in list_offspring), "List storage was not used"
+    assert all(type(i.genome) is array and i.genome.typecode == typecode for i in array_offspring), \
+        "Array storage was not used"
+    
+    assert [list(i) for i in list_parents] == [list(i) for i in array_parents], "Parents differ"
+    assert [list(i) for i in list_offspring] == [list(i) for i in array_offspring], "Offspring differ"
+    assert all(i.legal() for i in array_offspring), "Illegal offspring"
+
+def test_storage_unsupported():
+    try:
+        RealSpecies({ 'system': { 'genome_storage': { 'Real': 'tuple' } } }, None)
+    except ValueError:
+        pass
+    else:
+        assert False, "Unsupported storage was accepted"
+
+def test_bit_genome():
+    genes = [1, 0, 1, 1, 0, 0, 1]
+    genome = BitGenome(genes)
+    assert len(genome) == len(genes), "Incorrect length"
+    assert list(genome) == genes and genome == genes, "Genes differ"
+    assert [genome[i] for i in xrange(-7, 7)] == genes + genes, "Indexing differs"
+    assert genome[2:5] == genes[2:5] and genome[::2] == genes[::2], "Slicing differs"
+    assert genome[:3] + genes[3:] == genes and genes[:3] + genome[3:] == genes, "Concatenation differs"
+    assert genome.count(1) == genes.count(1), "Counts differ"
+
+    for key, value in [(0, 0), (-1, 0), (slice(1, 3), [1, 1, 1]), (slice(2, 6), [ ]), (slice(0, 4, 2), [0, 0])]:
+        genome[key] = value
+        genes[key] = value
+        assert genome == genes, "Assignment to %r differs" % key
+
+    assert pickle.loads(pickle.dumps(genome, pickle.HIGHEST_PROTOCOL)) == genome, "Pickling failed"
+
+def test_bit_storage():
+    for operator, params in OPERATORS[BinarySpecies] + CROSSOVERS:
+        yield check_bit_storage, operator, params
+
+def check_bit_storage(operator, params):
+    list_parents, list_offspring = _apply(BinarySpecies, 'list', operator, params)
+    bit_parents, bit_offspring = _apply(BinarySpecies, 'bits', operator, params)
+
+    assert all(type(i.genome) is BitGenome for i in bit_offspring), "Packed storage was not used"
+    assert [list(i) for i in list_parents] == [list(i) for i in bit_parents], "Parents differ"
+    assert all(i.legal() for i in bit_offspring), "Illegal offspring"
+    # Mutation masks and uniform crossover use random numbers differently
+    if operator not in ('mutate_random', 'mutate_bitflip', 'crossover_uniform', 'crossover_discrete'):
+        assert [list(i) for i in list_offspring] == [list(i) for i in bit_offspring], "Offspring differ"
+
+def test_bit_storage_mutate():
+    parents, offspring = _apply(BinarySpecies, 'bits', 'mutate_bitflip', { 'genes': 3 })
+    for parent, child in zip(parents, offspring):
+        assert sum(p != c for p, c in zip(parent, child)) == 3, "Incorrect number of genes mutated"
+    parents, offspring = _apply(BinarySpecies, 'bits', 'mutate_bitflip', { 'per_gene_rate': 1.0 })
+    for parent, child in zip(parents, offspring):
+        assert all(p != c for p, c in zip(parent, child)), "Not all genes mutated"
+    parents, offspring = _apply(BinarySpecies, 'bits', 'mutate_bitflip', { 'per_gene_rate': 0.25 })
+    changed = sum(p != c for parent, child in zip(parents, offspring) for p, c in zip(parent, child))
+    assert 20 <= changed <= 80, "Unexpected number of genes mutated (%d)" % changed
+
+def test_bit_storage_crossover_uniform():
+    params = { 'two_children': True, 'per_gene_rate': 0.5 }
+    parents, offspring = _apply(BinarySpecies, 'bits', 'crossover_uniform', params)
+    for p1, p2, c1, c2 in zip(parents[::2], parents[1::2], offspring[::2], offspring[1::2]):
+        assert all(sorted(p) == sorted(c) for p, c in zip(zip(p1, p2), zip(c1, c2))), "Genes were not exchanged"
@@ -0,0 +1,88 @@
+import tests
+from itertools import islice
+from esec.context import _context
+from esec.cache import FitnessCache
+from esec.individual import evaluate
+from esec.fitness import FitnessMaximise
+from esec.species.integer import IntegerSpecies
+
+class CountingEvaluator(object):
+    deterministic = True
+    
+    def __init__(self):
+        self.evaluated = 0
+    
+    def eval(self, indiv):
+        self.evaluated += 1
+        return FitnessMaximise(sum(indiv))
+
+class NoisyEvaluator(CountingEvaluator):
+    deterministic = False
+
+def _make_group(species, count=10):
+    return list(islice(species.init_count(length=5), count))
+
+def _clones(group):
+    return [type(i)(i.genome, i) for i in group]
+
+def _with_cache(func, size=None):
+    _context.fitness_cache = FitnessCache(size)
+    try:
+        return func()
+    finally:
+        _context.fitness_cache = None
+
+def test_cache_hits():
+    evaluator = CountingEvaluator()
+    species = IntegerSpecies({ }, evaluator)
+    group = _make_group(species)
+    def _test():
+        evaluate(group)
+        assert evaluator.evaluated == len(group), "Not all individuals were evaluated"
+        
+        clones = _clones(group)
+        evaluate(clones)
+        print "evaluated = %d" % evaluator.evaluated
+        assert evaluator.evaluated == len(group), "Cached individuals were evaluated again"
+        assert all(i.fitness == j.fitness for i, j in zip(group, clones)), "Incorrect fitness assigned"
+        
+        # Reading a single fitness also uses the cache
+        assert _clones(group)[0].fitness == group[0].fitness, "Incorrect fitness assigned"
+        assert evaluator.evaluated == len(group), "Cached individual was evaluated again"
+    _with_cache(_test)
+
+def test_cache_duplicates():
+    evaluator = CountingEvaluator()
+    species = IntegerSpecies({ }, evaluator)
+    group = _make_group(species, 5)
+    def _test():
+        evaluate(group + _clones(group))
+        print "evaluated = %d" % evaluator.evaluated
+        assert evaluator.evaluated == len(group), "Duplicate genomes were evaluated"
+    _with_cache(_test)
+
+def test_cache_eviction():
+    evaluator = CountingEvaluator()
+    species = IntegerSpecies({ }, evaluator)
+    group = _make_group(species, 10)
+    def _test():
+        evaluate(group)
+        assert len(_context.fitness_cache) == 4, "Cache exceeded maximum size"
+        
+        # Only the four most recently evaluated individuals are cached
+        evaluate(_clones(group))
+        print "evaluated = %d" % evaluator.evaluated
+        assert evaluator.evaluated == 2 * len(group) - 4, "Incorrect number of cache hits"
+    _with_cache(_test, 4)
+
+def test_cache_not_deterministic():
+    evaluator = NoisyEvaluator()
+    species = IntegerSpecies({ }, evaluator)
+    group = _make_group(species)
+    def _test():
+        evaluate(group)
+        evaluate(_clones(group))
+        print "evaluated = %d" % evaluator.evaluated
+        assert evaluator.evaluated == 2 * len(group), "Noisy evaluator was cached"
+        assert len(_context.fitness_cache) == 0, "Noisy evaluator was cached"
+    _with_cache(_test)
@@ -0,0 +1,149 @@
+import tests
+import os
+import tempfile
+from esec.context import _context, context, config
+from esec.experiment import Experiment
+from esec.monitors import ConsoleMonitor
+from esec.landscape.real import Sphere
+from esec.landscape.binary import OneMax
+from test_pool import RecordingMonitor, NoisyOneMax
+
+BINARY_DEFINITION = r'''
+FROM random_binary(length=config.landscape.size.exact) SELECT 20 population
+YIELD population
+
+BEGIN generation
+    FROM population SELECT 20 offspring USING binary_tournament
+    FROM offspring  SELECT population   USING crossover_one(per_pair_rate=0.8), mutate_bitflip(per_gene_rate=0.05)
+    YIELD population
+END generation
+'''
+
+REAL_DEFINITION = r'''
+FROM random_real(length=config.landscape.size.exact, lowest=-2.0, highest=2.0) SELECT 10 population
+YIELD population
+
+BEGIN grow
+    FROM population SELECT 10 offspring USING tournament(k=3), mutate_gaussian(step_size=0.1)
+    FROM population, offspring SELECT 10 population USING best
+    YIELD population
+END grow
+
+BEGIN shrink
+    FROM population SELECT 5 offspring USING uniform_shuffle, mutate_random
+    FROM population, offspring SELECT 10 population USING best
+    YIELD population
+END shrink
+'''
+
+LOOKUP_DEFINITION = BINARY_DEFINITION.replace('random_binary(length=config.landscape.size.exact)',
+                                              'suitable_individuals')
+
+def _suitable_individuals():
+    # The species is only instantiated by this lookup
+    return context['random_binary'](length=config.landscape.size.exact)
+
+class CheckpointMonitor(RecordingMonitor):
+    def get_state(self):
+        return self.iterations, self.evals
+    
+    def set_state(self, state):
+        self.iterations, self.evals = state
+
+def _experiment(definition, lscape, monitor, **system):
+    system['definition'] = definition
+    return Experiment({
+        'random_seed': 12345,
+        'monitor': monitor,
+        'landscape': lscape,
+        'system': system,
+        'selector': ['grow', 'grow', 'shrink'] if 'grow' in definition else None,
+    })
+
+def _run(definition, lscape, **system):
+    saved = dict(_context.__dict__)
+    fd, path = tempfile.mkstemp()
+    os.close(fd)
+    try:
+        # Uninterrupted run
+        expected = CheckpointMonitor(10)
+        _experiment(definition, lscape, expected, **system).run()
+        
+        # Run five steps, then save
+        first = CheckpointMonitor(10)
+        experiment = _experiment(definition, lscape, first, **system)
+        experiment.begin()
+        for _ in xrange(5):
+            experiment.step()
+        experiment.checkpoint(path)
+        experiment.close()
+        
+        # Resume in a new experiment
+        second = CheckpointMonitor(0)
+        experiment = _experiment(definition, lscape, second, **system)
+        experiment.resume(path)
+        while experiment.step(): pass
+        experiment.close()
+        
+        return expected, first, second
+    finally:
+        os.remove(path)
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def _check(expected, first, second):
+    assert not (expected.exceptions or first.exceptions or second.exceptions), "Exceptions occurred"
+    # The initial population is yielded before the first step
+    assert len(first.populations) == 6, "Incorrect number of steps before checkpoint"
+    print "expected evals = %r, resumed evals = %r" % (expected.evals, second.evals)
+    assert expected.populations == first.populations + second.populations, "Resumed run differs from uninterrupted run"
+    assert expected.evals == second.evals, "Statistics differ from uninterrupted run"
+
+def test_checkpoint_binary():
+    lscape = { 'class': OneMax, 'parameters': 30, 'random_seed': 1 }
+    _check(*_run(BINARY_DEFINITION, lscape))
+
+def test_checkpoint_real_selector():
+    lscape = { 'class': Sphere, 'parameters': 5, 'random_seed': 1 }
+    _check(*_run(REAL_DEFINITION, lscape, fitness_cache={ }))
+
+def test_checkpoint_species_lookup():
+    lscape = { 'class': OneMax, 'parameters': 30, 'random_seed': 1 }
+    _check(*_run(LOOKUP_DEFINITION, lscape, suitable_individuals=_suitable_individuals))
+
+def test_checkpoint_pool_noisy():
+    lscape = { 'class': NoisyOneMax, 'parameters': 30, 'random_seed': 1 }
+    _check(*_run(BINARY_DEFINITION, lscape, evaluator_pool={ 'workers': 2 }))
+
+def test_checkpoint_config():
+    saved = dict(_context.__dict__)
+    path = tempfile.mktemp()
+    try:
+        def _create():
+            return Experiment({
+                'random_seed': 12345,
+                'monitor': { 'class': ConsoleMonitor, 'limits': { 'iterations': 6 }, 'verbose': 0 },
+                'landscape': { 'class': OneMax, 'parameters': 30 },
+                'system': { 'definition': BINARY_DEFINITION },
+                'checkpoint': { 'path': path, 'interval': 2 },
+            })
+        
+        experiment = _create()
+        experiment.begin()
+        for _ in xrange(3):
+            experiment.step()
+        experiment.close()
+        assert os.path.exists(path), "Checkpoint was not saved"
+        
+        experiment = _create()
+        experiment.resume()
+        assert experiment._steps == 2, "Step count was not restored"
+        while experiment.step(): pass
+        experiment.close()
+        stats = experiment.monitor._stats
+        print "iterations = %d" % stats['iterations']
+        assert stats['iterations'] == 6, "Run did not continue from checkpoint"
+    finally:
+        if os.path.exists(path): os.remove(path)
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
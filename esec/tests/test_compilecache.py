@@ -0,0 +1,83 @@
+import tests
+import os
+import shutil
+import tempfile
+import esec.compilecache
+from esec.compilecache import CompileCache
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.landscape.binary import OneMax
+from test_pool import DEFINITION, RecordingMonitor
+
+def _run(path, definition=DEFINITION, optimise=2):
+    saved = dict(_context.__dict__)
+    try:
+        monitor = RecordingMonitor(3)
+        experiment = Experiment({
+            'random_seed': 12345,
+            'monitor': monitor,
+            'landscape': { 'class': OneMax, 'parameters': 30, 'random_seed': 1 },
+            'system': { 'definition': definition, 'optimise': optimise, 'compile_cache': { 'path': path } },
+        })
+        experiment.run()
+        return monitor, experiment.system
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def _with_directory(func):
+    path = tempfile.mkdtemp()
+    loaded = dict(esec.compilecache._LOADED)
+    try:
+        esec.compilecache._LOADED.clear()
+        return func(path)
+    finally:
+        esec.compilecache._LOADED.clear()
+        esec.compilecache._LOADED.update(loaded)
+        shutil.rmtree(path)
+
+def test_compile_cache():
+    def _test(path):
+        expected, system = _run(path)
+        assert system.compile_cache.misses == 1, "Definition was found in an empty cache"
+        assert system.validation_result, "Definition was not validated"
+        assert len(os.listdir(path)) == 1, "Definition was not stored"
+        
+        # Only the directory is used by the second system
+        esec.compilecache._LOADED.clear()
+        monitor, system = _run(path)
+        assert system.compile_cache.hits == 1, "Definition was not found in the cache"
+        assert system.validation_result is None, "Definition was compiled again"
+        assert monitor.populations == expected.populations, "Results differ when using the cache"
+        
+        _run(path, optimise=0)
+        _run(path, definition=DEFINITION.replace('0.05', '0.1'))
+        assert len(os.listdir(path)) == 3, "Definitions with different settings were not stored separately"
+    _with_directory(_test)
+
+def test_compile_cache_invalid():
+    def _test(path):
+        expected, _ = _run(path)
+        esec.compilecache._LOADED.clear()
+        for name in os.listdir(path):
+            with open(os.path.join(path, name), 'wb') as dest:
+                dest.write('not marshalled code')
+        monitor, system = _run(path)
+        assert system.compile_cache.misses == 1, "Invalid entry was used"
+        assert monitor.populations == expected.populations, "Results differ after recompiling"
+    _with_directory(_test)
+
+def test_compile_cache_key():
+    names = ['population', 'size']
+    key = CompileCache.key(DEFINITION, names)
+    assert key == CompileCache.key(DEFINITION, list(reversed(names))), "Key depends on name order"
+    assert key != CompileCache.key(DEFINITION, names + ['offspring']), "Key does not include names"
+    assert key != CompileCache.key(DEFINITION, names, optimise_level=1), "Key does not include optimisation level"
+    assert key != CompileCache.key(DEFINITION, names, profile=True), "Key does not include profiling"
+    
+    saved = esec.compilecache._ESDLC_FINGERPRINT
+    try:
+        esec.compilecache._ESDLC_FINGERPRINT = 'upgraded'
+        assert key != CompileCache.key(DEFINITION, names), "Key does not include the compiler version"
+    finally:
+        esec.compilecache._ESDLC_FINGERPRINT = saved
@@ -0,0 +1,61 @@
+import tests
+import threading
+from esec.context import _context, count, flush_counts, derive_seed, stream
+
+def test_count():
+    messages = [ ]
+    notify = _context.notify
+    _context.notify = lambda *p: messages.append(p)
+    try:
+        flush_counts()
+        del messages[:]
+        
+        count('births')
+        count('births')
+        count('global_evals', 10)
+        assert not messages, "Counts were sent before flushing"
+        
+        flush_counts()
+        print messages
+        assert messages == [('individual', 'statistic', { 'births': 2, 'global_evals': 10 })], "Incorrect statistics sent"
+        
+        flush_counts()
+        assert len(messages) == 1, "Empty statistics were sent"
+    finally:
+        _context.notify = notify
+
+def test_count_thread():
+    messages = [ ]
+    def _count():
+        # Counters are thread-local and created on first use
+        _context.notify = lambda *p: messages.append(p)
+        flush_counts()
+        count('births')
+        flush_counts()
+    thread = threading.Thread(target=_count)
+    thread.start()
+    thread.join()
+    assert messages == [('individual', 'statistic', { 'births': 1 })], "Incorrect statistics sent from thread"
+
+def test_stream():
+    seed = getattr(_context, 'random_seed', None)
+    _context.random_seed = 12345
+    try:
+        assert derive_seed(12345, 'island', 0) == derive_seed(12345, 'island', 0), "Seeds are not repeatable"
+        assert derive_seed(12345, 'island', 0) != derive_seed(12345, 'island', 1), "Seeds are not independent"
+        assert derive_seed(12345, 'island', 0) != derive_seed(12346, 'island', 0), "Seeds ignore the base seed"
+        assert isinstance(derive_seed(12345, 'island', 0), int), "Seed is not an int"
+        
+        values = [stream('replicate', 3).random() for _ in xrange(2)]
+        assert values[0] == values[1], "Stream is not repeatable"
+        assert stream('replicate', 2).random() != values[0], "Streams are not independent"
+        
+        _context.random_seed = None
+        assert stream('replicate', 3).random() != stream('replicate', 3).random(), "Unseeded streams are repeatable"
+        try:
+            derive_seed(None, 'island', 0)
+            assert False, "Seed was derived from None"
+        except ValueError:
+            pass
+    finally:
+        _context.random_seed = seed
@@ -0,0 +1,78 @@
+import tests
+import cPickle as pickle
+import random
+from esec.fitness import Fitness, FitnessMaximise, FitnessMinimise, EmptyFitness, SimpleDominatingFitness, sort_keys
+from esec.landscape.tgp import TGPFitness
+
+class TwoPartFitness(Fitness):
+    types = [float, int]
+    defaults = [0.0, 0]
+
+class CheckedFitness(FitnessMaximise):
+    def check(self, index, expected_type, default, value):
+        return expected_type(max(value, 0))
+
+def _values(count, parts=1):
+    rand = random.Random(1)
+    # Few distinct values, so that many compare equal
+    return [tuple(float(rand.randrange(5)) for _ in xrange(parts)) for _ in xrange(count)]
+
+def test_fitness_init():
+    assert FitnessMaximise(3).values == (3.0,), "Incorrect value from scalar"
+    assert FitnessMaximise([3]).values == (3.0,), "Incorrect value from sequence"
+    assert FitnessMaximise().values == (0.0,), "Incorrect default value"
+    assert TwoPartFitness((1, 2.5)).values == (1.0, 2), "Incorrect values from sequence"
+    assert all(type(a) is type(b) for a, b in zip(TwoPartFitness((1, 2.5)).values, (1.0, 2))), "Incorrect value types"
+    assert CheckedFitness(-1).values == (0.0,), "check was not called"
+
+def test_fitness_sort_key():
+    for fitness_type, parts in ((FitnessMaximise, 1), (FitnessMinimise, 1), (TwoPartFitness, 2)):
+        yield check_fitness_sort_key, [fitness_type(v) for v in _values(50, parts)]
+
+    yield check_fitness_sort_key, [TGPFitness(v) for v in _values(50, 2)]
+
+def check_fitness_sort_key(fitnesses):
+    for f1 in fitnesses[:10]:
+        for f2 in fitnesses:
+            assert (f1 > f2) == (f1.sort_key > f2.sort_key), "%s > %s differs from key" % (f1, f2)
+            assert (f1 < f2) == (f1.sort_key < f2.sort_key), "%s < %s differs from key" % (f1, f2)
+            assert (f1 == f2) == (f1.sort_key == f2.sort_key), "%s == %s differs from key" % (f1, f2)
+
+    keys = sort_keys(fitnesses)
+    assert keys[0] is fitnesses[0].sort_key, "Keys not returned"
+    expected = sorted(xrange(len(fitnesses)), key=fitnesses.__getitem__)
+    actual = sorted(xrange(len(fitnesses)), key=keys.__getitem__)
+    assert expected == actual, "Sorting by keys differs from sorting by fitness"
+
+def test_fitness_sort_key_fallback():
+    assert SimpleDominatingFitness(2)([1.0, 2.0]).sort_key is None, "Dominating fitness has a key"
+    assert FitnessMaximise(float('nan')).sort_key is None, "NaN fitness has a key"
+    assert EmptyFitness().sort_key < FitnessMaximise(float('-inf')).sort_key, "Empty fitness key is not smaller"
+
+    fitnesses = [FitnessMaximise(1.0), FitnessMinimise(2.0)]
+    assert sort_keys(fitnesses) == fitnesses, "Keys returned for mixed fitness types"
+    fitnesses = [FitnessMaximise(1.0), SimpleDominatingFitness(2)([1.0, 2.0])]
+    assert sort_keys(fitnesses) == fitnesses, "Keys returned for fitness without a key"
+
+    fitness = FitnessMaximise(1.0)
+    key = fitness.sort_key
+    fitness += FitnessMaximise(2.0)
+    assert fitness.sort_key != key, "Key was not updated"
+
+def test_fitness_arithmetic():
+    total = EmptyFitness()
+    for values in _values(10, 2):
+        total += TwoPartFitness(values)
+    expected = tuple(sum(i) for i in zip(*_values(10, 2)))
+    assert total.values == expected, "Incorrect sum"
+    assert (total / 10).values == (expected[0] / 10, int(expected[1] / 10)), "Incorrect average"
+    assert (FitnessMaximise(1.0) + FitnessMaximise(2.0)).values == (3.0,), "Incorrect sum"
+
+def test_fitness_pickle():
+    for fitness in (FitnessMaximise(1.0), FitnessMinimise(2.0), TGPFitness((1.0, 2L))):
+        fitness.sort_key    #pylint: disable=W0104
+        for protocol in (0, pickle.HIGHEST_PROTOCOL):
+            copy = pickle.loads(pickle.dumps(fitness, protocol))
+            assert type(copy) is type(fitness), "Incorrect type after pickling"
+            assert copy.values == fitness.values, "Incorrect values after pickling"
+            assert copy.sort_key == fitness.sort_key, "Incorrect key after pickling"
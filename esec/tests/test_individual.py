@@ -0,0 +1,102 @@
+import tests
+from itertools import islice
+from esec.individual import Individual, evaluate, defer_evaluation
+from esec.fitness import FitnessMaximise, EmptyFitness
+from esec.species.integer import IntegerSpecies
+
+class CountingEvaluator(object):
+    def __init__(self):
+        self.calls = 0
+        self.evaluated = 0
+    
+    def eval(self, indiv):
+        self.calls += 1
+        self.evaluated += 1
+        return FitnessMaximise(sum(indiv))
+
+class CountingBatchEvaluator(CountingEvaluator):
+    def eval_batch(self, individuals):
+        self.calls += 1
+        self.evaluated += len(individuals)
+        return [FitnessMaximise(sum(indiv)) for indiv in individuals]
+
+def _make_group(evaluator, count=10):
+    species = IntegerSpecies({ }, evaluator)
+    return list(islice(species.init_count(length=5), count))
+
+def test_evaluate_batch():
+    evaluator = CountingBatchEvaluator()
+    group = _make_group(evaluator)
+    evaluate(group)
+    print "calls = %d, evaluated = %d" % (evaluator.calls, evaluator.evaluated)
+    assert evaluator.calls == 1, "eval_batch was not called exactly once"
+    assert evaluator.evaluated == len(group), "Not all individuals were evaluated"
+    assert all(i.fitness.values[0] == sum(i) for i in group), "Incorrect fitness assigned"
+    
+    # Evaluating again should not call the evaluator
+    evaluate(group)
+    assert evaluator.calls == 1, "Evaluated individuals were evaluated again"
+
+def test_evaluate_without_batch():
+    evaluator = CountingEvaluator()
+    group = _make_group(evaluator)
+    evaluate(group + group)
+    print "calls = %d, evaluated = %d" % (evaluator.calls, evaluator.evaluated)
+    assert evaluator.calls == len(group), "Individuals were not evaluated exactly once"
+    assert all(i.fitness.values[0] == sum(i) for i in group), "Incorrect fitness assigned"
+
+def test_defer_evaluation():
+    evaluator = CountingBatchEvaluator()
+    group = _make_group(evaluator)
+    defer_evaluation(group)
+    assert evaluator.calls == 0, "Evaluation was not deferred"
+    
+    fitness = group[3].fitness
+    print "calls = %d, evaluated = %d" % (evaluator.calls, evaluator.evaluated)
+    assert fitness.values[0] == sum(group[3]), "Incorrect fitness assigned"
+    assert evaluator.calls == 1, "eval_batch was not called exactly once"
+    assert evaluator.evaluated == len(group), "Not all individuals were evaluated"
+    
+    # Removed members are still evaluated when requested
+    group2 = _make_group(evaluator)
+    defer_evaluation(group2)
+    removed = group2.pop(0)
+    assert removed.fitness.values[0] == sum(removed), "Incorrect fitness assigned"
+    assert evaluator.calls == 2, "eval_batch was not called exactly once"
+    assert evaluator.evaluated == len(group) + len(group2) + 1, "Not all individuals were evaluated"
+
+def test_compact_individual():
+    evaluator = CountingEvaluator()
+    group = _make_group(evaluator, 2)
+    for indiv in group:
+        assert not any('__dict__' in cls.__dict__ for cls in type(indiv).__mro__), "Individual has a __dict__"
+
+    first, second = group
+    assert first._fitness is second._fitness is EmptyFitness(), "EmptyFitness is not shared"
+
+    # Statistics are not shared unless requested
+    assert first.statistic is not second.statistic, "Statistics are shared"
+    first.statistic['mutated'] = 1
+    assert second.statistic == { }, "Statistics were modified through another individual"
+    child = type(first)(first.genome, first)
+    child.statistic['mutated'] += 1
+    assert first.statistic == { 'mutated': 1 }, "Parent statistics were modified"
+    assert child.statistic == { 'mutated': 2 }, "Incorrect statistics"
+
+def test_shared_statistic():
+    Individual.share_statistic = True
+    try:
+        first, second = _make_group(CountingEvaluator(), 2)
+        assert first.statistic is second.statistic, "Empty statistics are not shared"
+        try:
+            first.statistic['mutated'] = 1
+            assert False, "Shared statistics were modified"
+        except TypeError:
+            pass
+
+        child = type(first)(first.genome, first, statistic={ 'mutated': 1 })
+        grandchild = type(child)(child.genome, child)
+        assert child.statistic == { 'mutated': 1 }, "Incorrect statistics"
+        assert grandchild.statistic is child.statistic, "Statistics were not shared"
+    finally:
+        Individual.share_statistic = False
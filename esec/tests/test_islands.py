@@ -0,0 +1,56 @@
+import tests
+import random
+from esec.islands import IslandModel, ring, fully_connected, random_pairs
+from esec.monitors import ConsoleMonitor
+from esec.landscape.binary import OneMax
+
+DEFINITION = r'''
+FROM random_binary(length=config.landscape.size.exact) SELECT 10 population
+YIELD population
+
+BEGIN generation
+    FROM population, immigrants SELECT 10 parents USING binary_tournament
+    FROM parents SELECT population USING crossover_one(per_pair_rate=0.8), mutate_bitflip(per_gene_rate=0.05)
+    YIELD population
+END generation
+'''
+
+def _island(generations):
+    return {
+        'monitor': { 'class': ConsoleMonitor, 'limits': { 'generations': generations }, 'report_out': None, 'summary_out': None },
+        'landscape': { 'class': OneMax, 'parameters': 20, 'random_seed': 1 },
+        'system': { 'definition': DEFINITION },
+    }
+
+def _run(**migration):
+    model = IslandModel({
+        'random_seed': 12345,
+        'islands': [_island(10), _island(10), _island(6)],
+        'migration': migration,
+    })
+    return model, model.run()
+
+def test_topologies():
+    rand = random.Random(1)
+    assert ring(3, rand) == [[1], [2], [0]], "Incorrect ring topology"
+    assert fully_connected(3, rand) == [[1, 2], [0, 2], [0, 1]], "Incorrect fully connected topology"
+    for i, dest in enumerate(random_pairs(4, rand)):
+        assert len(dest) == 1 and dest[0] != i and 0 <= dest[0] < 4, "Incorrect random topology"
+
+def test_islands_migrate():
+    model, results = _run(interval=2, count=2, topology='ring')
+    print results
+    assert [r['steps'] for r in results] == [10, 10, 6], "Incorrect number of steps"
+    # The third island only takes part in the first three migrations
+    assert model.migrations == 5, "Incorrect number of migrations"
+    assert [r['emigrants'] for r in results] == [10, 10, 6], "Incorrect number of emigrants"
+    assert [r['immigrants'] for r in results] == [6, 10, 6], "Incorrect number of immigrants"
+    assert all(r['best'][1].values[0] > 0 for r in results), "Best individual not returned"
+
+def test_islands_repeatable():
+    for migration in [{ 'topology': 'random', 'select': 'random', 'replace': 'random' },
+                      { 'topology': 'full', 'select': 'best', 'replace': 'worst' }]:
+        _, first = _run(interval=3, count=1, **migration)
+        _, second = _run(interval=3, count=1, **migration)
+        print first
+        assert first == second, "Results differ between runs with %r" % migration
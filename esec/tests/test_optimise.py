@@ -0,0 +1,77 @@
+import tests
+import dialects
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.landscape.binary import OneMax, NKC
+from esec.landscape.real import Sphere
+from test_pool import RecordingMonitor
+
+LANDSCAPES = {
+    'ES': { 'class': Sphere, 'parameters': 5 },
+    'EP': { 'class': Sphere, 'parameters': 5 },
+    'NKC_GA': { 'class': NKC, 'parameters': 10, 'K': 2, 'C': 1 },
+}
+
+DESTINATIONS_DEFINITION = r'''
+FROM random_binary(length=config.landscape.size.exact) SELECT 20 population
+YIELD population
+
+BEGIN generation
+    FROM population SELECT 3 elite, 5 parents USING best
+    FROM parents SELECT 12 offspring USING tournament(k=2), crossover_one, mutate_bitflip
+    FROM population SELECT 2 worst_members, 3 others USING worst
+    FROM elite, offspring, worst_members, others SELECT population
+    YIELD population
+END generation
+'''
+
+def _run(name, level, definition=None):
+    saved = dict(_context.__dict__)
+    try:
+        if definition:
+            system = { 'definition': definition }
+        else:
+            system = dict(dialects.default['system'])
+            system.update(dialects.configs[name]['system'])
+        # Asynchronous evaluation does not produce repeatable results
+        system.pop('evaluator_pool', None)
+        system['optimise'] = level
+        landscape = dict(LANDSCAPES.get(name, { 'class': OneMax, 'parameters': 20 }))
+        landscape['random_seed'] = 1
+        monitor = RecordingMonitor(5)
+        experiment = Experiment({
+            'random_seed': 12345,
+            'monitor': monitor,
+            'landscape': landscape,
+            'system': system,
+        })
+        experiment.run()
+        return monitor, experiment.system._code_string    #pylint: disable=W0212
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def test_optimise():
+    for name in sorted(dialects.configs):
+        yield check_optimise, name
+
+def check_optimise(name):
+    expected, expected_code = _run(name, 0)
+    assert not expected.exceptions, "Exceptions occurred"
+    assert expected.populations, "Nothing was yielded"
+    
+    for level in (1, 2, 3):
+        monitor, code = _run(name, level)
+        assert not monitor.exceptions, "Exceptions occurred at level %d" % level
+        assert code != expected_code, "Level %d code was not optimised" % level
+        assert monitor.populations == expected.populations, "Level %d results differ from level 0" % level
+
+def test_optimise_destinations():
+    expected, _ = _run(None, 0, DESTINATIONS_DEFINITION)
+    monitor, code = _run(None, 2, DESTINATIONS_DEFINITION)
+    print code
+    assert not expected.exceptions and not monitor.exceptions, "Exceptions occurred"
+    # Selectors receive the total number of individuals as a limit hint
+    assert '_gen = _part(best(_source=_iter(population)), 8)' in code, "Limit was not passed to best"
+    assert '_gen = _part(worst(_source=_iter(population)), 5)' in code, "Limit was not passed to worst"
+    assert monitor.populations == expected.populations, "Optimised results differ"
@@ -0,0 +1,138 @@
+import tests
+import esec.pool
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.monitors import MonitorBase
+from esec.landscape.binary import OneMax
+from esec.species.binary import BinarySpecies
+from esec.species.real import RealSpecies
+from esec.fitness import SimpleDominatingFitness
+import cPickle as pickle
+
+DEFINITION = r'''
+FROM random_binary(length=config.landscape.size.exact) SELECT 20 population
+YIELD population
+
+BEGIN generation
+    FROM population SELECT 20 offspring USING binary_tournament
+    FROM offspring  SELECT population   USING crossover_one(per_pair_rate=0.8), mutate_bitflip(per_gene_rate=0.05)
+    YIELD population
+END generation
+'''
+
+class RecordingMonitor(MonitorBase):
+    def __init__(self, iterations):
+        super(RecordingMonitor, self).__init__()
+        self.iterations = iterations
+        self.populations = [ ]
+        self.evals = { }
+        self.exceptions = [ ]
+    
+    def on_yield(self, sender, name, group):
+        self.populations.append([(i.genome, i.fitness.values) for i in group])
+    
+    def on_notify(self, sender, name, value):
+        if name == 'statistic' and isinstance(value, dict):
+            for key, count in value.iteritems():
+                self.evals[key] = self.evals.get(key, 0) + count
+    
+    def on_exception(self, sender, exception_type, value, trace):
+        print trace
+        self.exceptions.append(value)
+    
+    def on_post_breed(self, sender):
+        self.iterations -= 1
+    
+    def should_terminate(self, sender):
+        return self.iterations <= 0
+
+class NoisyOneMax(OneMax):
+    deterministic = False
+
+    def _eval(self, indiv):
+        return sum(indiv) + self.rand.random()
+
+def _run(workers=None, landscape=OneMax):
+    saved = dict(_context.__dict__)
+    try:
+        system = { 'definition': DEFINITION }
+        if workers is not None:
+            system['evaluator_pool'] = { 'workers': workers }
+        monitor = RecordingMonitor(10)
+        experiment = Experiment({
+            'random_seed': 12345,
+            'monitor': monitor,
+            'landscape': { 'class': landscape, 'parameters': 30, 'random_seed': 1 },
+            'system': system,
+        })
+        pool = experiment.system.evaluator_pool
+        experiment.run()
+        return monitor, pool
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def test_pool_matches_serial():
+    serial, _ = _run()
+    parallel, pool = _run(workers=2)
+    assert not serial.exceptions and not parallel.exceptions, "Exceptions occurred"
+    assert pool is not None, "Evaluator pool was not created"
+    assert pool.workers == 2, "Incorrect number of workers"
+    print "serial evals = %r, parallel evals = %r" % (serial.evals, parallel.evals)
+    assert serial.populations == parallel.populations, "Parallel results differ from serial"
+    assert serial.evals == parallel.evals, "Evaluation counts differ from serial"
+    assert parallel.evals['global_evals'] > 0, "No evaluations were counted"
+
+def test_pool_noisy_repeatable():
+    one, _ = _run(workers=1, landscape=NoisyOneMax)
+    three, _ = _run(workers=3, landscape=NoisyOneMax)
+    assert not one.exceptions and not three.exceptions, "Exceptions occurred"
+    assert one.populations == three.populations, "Noisy results depend on the number of workers"
+    fitnesses = [fitness for genome, fitness in one.populations[0]]
+    assert len(set(fitnesses)) == len(fitnesses), "Noise was not applied"
+
+def test_pool_deterministic_seeds():
+    derived = [ ]
+    derive_seed = esec.pool.derive_seed
+    def _derive_seed(*args):
+        derived.append(args)
+        return derive_seed(*args)
+    esec.pool.derive_seed = _derive_seed
+    try:
+        _, pool = _run(workers=2)
+        assert not derived, "Seeds were derived for a deterministic evaluator"
+        _, noisy_pool = _run(workers=2, landscape=NoisyOneMax)
+        assert len(derived) == noisy_pool._evaluations, "Seeds were not derived for a noisy evaluator"
+    finally:
+        esec.pool.derive_seed = derive_seed
+    assert pool._evaluations > 0, "Evaluations were not counted"
+    assert pool._evaluations == noisy_pool._evaluations, "Evaluations were counted differently"
+
+def test_pool_species():
+    saved = dict(_context.__dict__)
+    try:
+        experiment = Experiment({
+            'random_seed': 12345,
+            'monitor': RecordingMonitor(2),
+            'landscape': { 'class': OneMax, 'parameters': 30, 'random_seed': 1 },
+            'system': { 'definition': DEFINITION, 'evaluator_pool': { 'workers': 2 } },
+        })
+        # Species are only created by the workers when they are used
+        assert BinarySpecies in experiment.system._species, "Binary species was not created"
+        assert RealSpecies not in experiment.system._species, "Unused species was created"
+        experiment.run()
+        assert not experiment.monitor.exceptions, "Exceptions occurred"
+        assert experiment.monitor.evals['global_evals'] > 0, "No evaluations were counted"
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def test_pool_closed():
+    _, pool = _run(workers=1)
+    assert pool._pool is None, "Worker processes were not stopped"
+
+def test_dominating_fitness_pickle():
+    fitness = SimpleDominatingFitness(3)([1.0, 2.0, 3.0])
+    copy = pickle.loads(pickle.dumps(fitness, pickle.HIGHEST_PROTOCOL))
+    assert type(copy) is type(fitness), "Incorrect type after pickling"
+    assert copy.values == fitness.values, "Incorrect values after pickling"
@@ -0,0 +1,82 @@
+import tests
+import cPickle as pickle
+from itertools import islice
+from esec.population import Population, iter_group, population_of
+from esec.generators import _key_fitness, selectors
+
+def _make_population():
+    # Repeat some members to check the order of equal fitness values
+    group = tests.make_pop_max()
+    return Population(group + group[::3])
+
+def test_population_list():
+    group = tests.make_pop_max()
+    population = Population(group)
+    assert population == group, "Population differs from list"
+    assert population[5] is group[5], "Indexing differs from list"
+    assert list(population) == group, "Iteration differs from list"
+
+    population = Population(range(10))
+    copy = pickle.loads(pickle.dumps(population, pickle.HIGHEST_PROTOCOL))
+    assert type(copy) is Population, "Unpickled population is not a Population"
+    assert copy == population, "Unpickled population differs"
+
+def test_population_ordering():
+    population = _make_population()
+
+    assert list(population.ranked()) == sorted(population, key=_key_fitness, reverse=True), "Decreasing order differs from sorted"
+    assert list(population.ranked(False)) == sorted(population, key=_key_fitness), "Increasing order differs from sorted"
+    assert population.best is max(population, key=_key_fitness), "Best differs from max"
+    assert population.worst is min(population, key=_key_fitness), "Worst differs from min"
+    assert population.ranked() is population.ranked(), "Order was not cached"
+    assert isinstance(population.ranked(), tuple), "Cached order is mutable"
+
+    assert Population().best is None, "Empty population has a best member"
+
+def test_population_invalidate():
+    population = Population(tests.make_pop_max())
+    best = population.best
+    del population[population.index(best)]
+    print "best = %s, population.best = %s" % (best, population.best)
+    assert population.best is not best, "Removing a member did not discard cached values"
+
+    population.append(best)
+    assert population.best is best, "Adding a member did not discard cached values"
+
+    keys = population.fitness_keys
+    Population.invalidate_all()
+    assert population.fitness_keys is not keys, "invalidate_all did not discard cached values"
+
+def test_population_iterator():
+    population = _make_population()
+    _source = iter_group(population)
+    assert population_of(_source) is population, "Population not found from iterator"
+    assert population_of(population) is population, "Population not found"
+    assert population_of(iter(population)) is None, "Population found from list iterator"
+    assert population_of(iter_group(list(population))) is None, "Population found from list"
+
+    next(_source)
+    assert population_of(_source) is None, "Population found from used iterator"
+    assert list(_source) == population[1:], "Iteration does not continue from next"
+
+def test_population_selectors():
+    population = _make_population()
+    group = list(population)
+    count = 10
+    for name in ('Best', 'Worst', 'BestOnly', 'WorstOnly'):
+        expected = list(islice(getattr(selectors, name)(_source=iter(group)), count))
+        actual = list(islice(getattr(selectors, name)(_source=iter_group(population)), count))
+        assert actual == expected, "%s selection differs for populations" % name
+        _gen = getattr(selectors, name)(_source=iter_group(population))
+        if hasattr(_gen, 'limit_hint'):
+            actual = list(islice(_gen.limit_hint(count), count))
+            assert actual == expected, "%s limited selection differs for populations" % name
+
+    for name in ('Tournament', 'RankProportional', 'RankProportionalSUS', 'FitnessProportionalSUS'):
+        for kwargs in ({ }, { 'without_replacement': True }):
+            if name.endswith('SUS') and kwargs: continue
+            tests._context.rand.seed(1)
+            expected = list(islice(getattr(selectors, name)(_source=iter(group), **kwargs), len(group)))
+            tests._context.rand.seed(1)
+            actual = list(islice(getattr(selectors, name)(_source=iter_group(population), **kwargs), len(group)))
+            assert actual == expected, "%s selection differs for populations" % name
@@ -0,0 +1,100 @@
+import tests
+from StringIO import StringIO
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.landscape.binary import OneMax
+from esec.monitors import ConsoleMonitor
+from esec.system import Profiler
+from test_pool import RecordingMonitor
+
+DEFINITION = r'''FROM random_binary(length=10) SELECT 10 population
+YIELD population
+
+BEGIN generation
+    FROM population SELECT 10 parents USING tournament(k=2)
+    REPEAT 3
+        FROM parents SELECT 5 offspring USING mutate_random(per_gene_rate=0.1)
+    END
+    FROM population, offspring SELECT 10 population USING best
+    YIELD population
+END generation
+'''
+
+class ProfileMonitor(RecordingMonitor):
+    def __init__(self, iterations):
+        super(ProfileMonitor, self).__init__(iterations)
+        self.profiles = [ ]
+    
+    def on_notify(self, sender, name, value):
+        super(ProfileMonitor, self).on_notify(sender, name, value)
+        if sender == 'System' and name == 'Profile':
+            self.profiles.append(value)
+
+def _run(monitor, profile, optimise=2):
+    saved = dict(_context.__dict__)
+    try:
+        experiment = Experiment({
+            'random_seed': 12345,
+            'monitor': monitor,
+            'landscape': { 'class': OneMax, 'parameters': 10, 'random_seed': 1 },
+            'system': { 'definition': DEFINITION, 'optimise': optimise, 'profile': profile },
+        })
+        experiment.run()
+        return experiment.system
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def test_profiler():
+    for optimise in (0, 1, 2, 3):
+        yield check_profiler, optimise
+
+def check_profiler(optimise):
+    expected = RecordingMonitor(4)
+    _run(expected, False, optimise)
+    monitor = ProfileMonitor(4)
+    system = _run(monitor, True, optimise)
+    
+    assert not monitor.exceptions, "Exceptions occurred"
+    assert isinstance(system.profiler, Profiler), "Profiler was not created"
+    assert monitor.populations == expected.populations, "Results differ when profiling"
+    assert len(monitor.profiles) == 5, "Profile was not sent for every step"
+    
+    generation = dict(((block_name, line, text.partition(' ')[0]), values)
+                      for (block_name, line, text), values in monitor.profiles[-1].iteritems())
+    assert all(block_name == 'generation' for block_name, _, _ in generation), "Unexpected blocks"
+    assert generation[('generation', None, 'BLOCK')][0] == 1, "Block was not profiled once"
+    assert generation[('generation', 5, 'FROM')][::2] == (1, 10), "Incorrect totals for line 5"
+    assert generation[('generation', 6, 'REPEAT')][::2] == (1, 0), "Incorrect totals for line 6"
+    assert generation[('generation', 7, 'FROM')][::2] == (3, 15), "Incorrect totals for line 7"
+    assert generation[('generation', 9, 'FROM')][::2] == (1, 10), "Incorrect totals for line 9"
+    assert generation[('generation', 10, 'YIELD')][::2] == (1, 0), "Incorrect totals for line 10"
+    assert all(values[1] >= 0.0 for values in generation.itervalues()), "Negative times"
+
+def test_profiler_disabled():
+    monitor = ProfileMonitor(2)
+    system = _run(monitor, False)
+    assert system.profiler is None, "Profiler was created"
+    assert not monitor.profiles, "Profile was sent"
+    assert '_profiler' not in system._code_string, "Profiling code was generated"  #pylint: disable=W0212
+
+def test_profiler_totals():
+    profiler = Profiler()
+    profiler.define([('block', None, 'BLOCK block'), ('block', 2, 'FROM population SELECT offspring')])
+    data = profiler.data
+    data.extend([(1, 0.5, 3), (1, 0.25, 2), (0, 3.0, 0)])
+    assert profiler.flush() == { ('block', None, 'BLOCK block'): (1, 3.0, 0),
+                                 ('block', 2, 'FROM population SELECT offspring'): (2, 0.75, 5) }, \
+        "Incorrect totals"
+    assert profiler.flush() == { }, "Executions were not discarded"
+    assert profiler.data is data, "Recorded executions were replaced"
+
+def test_profiler_report():
+    out = StringIO()
+    monitor = ConsoleMonitor({ 'out': out, 'report': 'iter+profile', 'limits': { 'iterations': 3 } })
+    _run(monitor, True)
+    text = out.getvalue()
+    assert 'prof.ms' in text, "Report column was not displayed"
+    assert '>> Profile' in text, "Summary was not displayed"
+    assert 'FROM parents SELECT (5) offspring USING mutate_random(per_gene_rate=0.1)' in text, \
+        "Statement was not displayed"
@@ -0,0 +1,238 @@
+import tests
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from StringIO import StringIO
+import esec.landscape
+from esec.landscape import LANDSCAPES
+from esec.landscape.binary import OneMax
+import run
+
+SAMPLE = r'''
+configs = { 'Sample.A': { 'random_seed': 1 } }
+
+def batch():
+    return [ ]
+'''
+
+SAMPLE_CHANGED = r'''
+configs = { 'Sample.A': { 'random_seed': 1 }, 'Sample.B': { 'random_seed': 2 } }
+
+def batch():
+    return [ ]
+'''
+
+def _in_directory(func):
+    '''Runs `func` in a new directory containing an empty ``cfgs``
+    package, with a new index and configurations.
+    '''
+    def _func():
+        path = tempfile.mkdtemp()
+        cwd = os.getcwd()
+        index, configs = run._INDEX, dict(run.configs)
+        try:
+            os.chdir(path)
+            os.mkdir('cfgs')
+            open(os.path.join('cfgs', '__init__.py'), 'w').close()
+            run._INDEX = None
+            func()
+        finally:
+            os.chdir(cwd)
+            run._INDEX = index
+            run.configs.clear()
+            run.configs.update(configs)
+            shutil.rmtree(path)
+    _func.__name__ = func.__name__
+    return _func
+
+def _write(path, source):
+    with open(path, 'w') as dest:
+        dest.write(source)
+
+def test_landscapes_lazy():
+    # Other tests have already imported the landscapes, so a new process
+    # is used to check that importing the package does not.
+    code = ("import sys, esec.landscape\n"
+            "assert 'esec.landscape.binary' not in sys.modules, 'Landscape module was imported'\n"
+            "assert 'OneMax' in [l.__name__ for l in esec.landscape.LANDSCAPES], 'OneMax not found'\n"
+            "assert 'esec.landscape.binary' in sys.modules, 'Landscape module was not imported'\n")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(esec.__file__)))
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=root,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    print process.communicate()[0]
+    assert process.returncode == 0, "Landscapes were not imported lazily"
+
+    assert OneMax in LANDSCAPES, "OneMax not in LANDSCAPES"
+    assert LANDSCAPES[LANDSCAPES.index(OneMax)] is OneMax, "Indexing differs from index"
+    assert len(LANDSCAPES) == len(list(LANDSCAPES)), "Length differs from iteration"
+
+def test_landscape_config():
+    configs = dict(run.configs)
+    try:
+        assert run._add_landscape_config('BVP.OneMax'), "BVP.OneMax was not found"
+        assert run.configs['BVP.OneMax']['landscape']['class'] is OneMax, "Incorrect landscape class"
+        assert not run._add_landscape_config('BVP.NotALandscape'), "Unknown landscape was found"
+
+        cfg = run._load_config('BVP.OneMax', run.default)
+        assert cfg.landscape['class'] is OneMax, "Landscape was not loaded from name"
+    finally:
+        run.configs.clear()
+        run.configs.update(configs)
+
+def test_exported_config():
+    import esec.landscape.sequence
+    cwd = os.getcwd()
+    configs = dict(run.configs)
+    try:
+        os.chdir(os.path.dirname(os.path.abspath(run.__file__)))
+        assert run._get_index()['exports'].get('ACO.TSP') == ('plugins', 'ACO'), "ACO.TSP is not exported"
+        cfg = run._load_config('ACO.TSP', run.default)
+        assert cfg.landscape['class'] is esec.landscape.sequence.TSP, "ACO.TSP was not loaded"
+
+        try:
+            run._load_config('NotAConfiguration', run.default)
+            assert False, "Unknown configuration was loaded"
+        except ImportError:
+            pass
+    finally:
+        os.chdir(cwd)
+        run.configs.clear()
+        run.configs.update(configs)
+
+@_in_directory
+def test_index_rebuild():
+    builds = [ ]
+    build_index = run._build_index
+    def _build_index():
+        builds.append(1)
+        return build_index()
+    run._build_index = _build_index
+    try:
+        _write(os.path.join('cfgs', 'sample.py'), SAMPLE)
+        index = run._get_index()
+        assert len(builds) == 1, "Index was not built"
+        assert index['exports'].get('Sample.A') == ('cfgs', 'sample'), "Sample.A is not exported"
+        assert 'batch' in index['modules'][('cfgs', 'sample')][2], "batch was not found"
+        assert index['landscapes'].get('BVP.OneMax') == ('esec.landscape.binary', 'OneMax'), "BVP.OneMax not indexed"
+
+        run._INDEX = None
+        assert run._get_index() == index, "Stored index differs"
+        assert len(builds) == 1, "Index was rebuilt when no files changed"
+
+        _write(os.path.join('cfgs', 'sample.py'), SAMPLE_CHANGED)
+        run._INDEX = None
+        index = run._get_index()
+        assert len(builds) == 2, "Index was not rebuilt when a file changed"
+        assert index['exports'].get('Sample.B') == ('cfgs', 'sample'), "Sample.B is not exported"
+
+        _write(os.path.join('cfgs', 'other.py'), "settings = ''\n")
+        run._INDEX = None
+        index = run._get_index()
+        assert len(builds) == 3, "Index was not rebuilt when a file was added"
+        assert ('cfgs', 'other') in index['modules'], "New module was not indexed"
+    finally:
+        run._build_index = build_index
+
+@_in_directory
+def test_batch_not_found():
+    _write(os.path.join('cfgs', 'sample.py'), SAMPLE)
+    _write(os.path.join('cfgs', 'other.py'), "settings = ''\n")
+
+    class Options(object):
+        batch = 'missing'
+        settings = ''
+
+    try:
+        run.esec_batch(Options())
+        assert False, "Missing batch file was loaded"
+    except ImportError as ex:
+        print ex
+        assert str(ex).endswith('Available batch files are: sample'), "Incorrect batch files listed"
+
+BATCH = r"""
+from esec.landscape.binary import OneMax
+
+DEFINITION = '''
+FROM random_binary(length=10) SELECT 10 population
+YIELD population
+BEGIN generation
+    FROM population SELECT 10 offspring USING binary_tournament, mutate_bitflip(per_gene_rate=0.1)
+    FROM offspring SELECT population
+    YIELD population
+END generation
+'''
+
+def batch():
+    items = [ ]
+    for seed in (1, 2, 3):
+        items.append({ 'config': {
+            'random_seed': seed,
+            'landscape': { 'class': OneMax, 'parameters': 10 },
+            'system': { 'definition': DEFINITION },
+            'monitor': { 'limits': { 'iterations': 3 } },
+        } })
+    if FAIL:
+        items.insert(1, { 'names': 'NotAConfiguration' })
+    return items
+"""
+
+def _run_batch(workers, fail, output=None):
+    '''Runs the batch in `BATCH` and returns the console output and the
+    summary file.
+    '''
+    # Files with periods in their names are executed rather than imported
+    _write(os.path.join('cfgs', 'sample.batch.py'), BATCH.replace('FAIL', str(fail)))
+    run._INDEX = None
+
+    class Options(object):
+        batch = 'sample.batch'
+        settings = 'batch.workers=%d' % workers
+        verbose = -1
+
+    output = output or StringIO()
+    stdout = sys.stdout
+    sys.stdout = output
+    try:
+        run.esec_batch(Options())
+    finally:
+        sys.stdout = stdout
+    with open(os.path.join('results', 'sample.batch', '_summary.txt')) as src:
+        summary = src.read()
+    shutil.rmtree('results')
+    return output.getvalue(), summary
+
+@_in_directory
+def test_batch_workers():
+    _, serial = _run_batch(1, False)
+    _, parallel = _run_batch(2, False)
+    print serial
+    print parallel
+    assert len(serial.splitlines()) == 4, "Incorrect number of summary lines"
+    assert parallel == serial, "Summary from workers differs from serial summary"
+
+    output, summary = _run_batch(2, True)
+    print summary
+    assert 'using 2 worker processes' in output, "Worker processes were not used"
+    assert '>>>> Experiment 0001 FAILED' in output, "Failed experiment was not reported"
+    serial, summary = serial.splitlines(), summary.splitlines()
+    assert summary[2] == '0001 -', "Failed experiment has a summary"
+    assert summary[:2] + summary[3:] == serial[:2] + ['0002' + serial[2][4:], '0003' + serial[3][4:]], \
+        "Summaries of other experiments differ"
+
+class FailingOutput(StringIO):
+    def write(self, text):
+        # Fails when the output of a worker process is displayed
+        if '->> DONE' in text:
+            raise IOError('Output failed')
+        StringIO.write(self, text)
+
+@_in_directory
+def test_batch_workers_error():
+    try:
+        _run_batch(2, False, FailingOutput())
+        assert False, "Exception was not raised"
+    except IOError as ex:
+        print repr(ex)
+        assert str(ex) == 'Output failed', "Incorrect exception raised"
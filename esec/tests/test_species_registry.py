@@ -0,0 +1,62 @@
+import tests
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.landscape.binary import OneMax
+from esec.monitors import MonitorBase
+from esec.species import SPECIES, registry
+from esec.species.binary import BinarySpecies
+from esec.species.binary_real import BinaryRealSpecies
+from esec.species.integer import IntegerSpecies
+from test_pool import DEFINITION
+
+INTEGER_DEFINITION = DEFINITION.replace('random_binary(length=config.landscape.size.exact)',
+                                        'random_int(length=config.landscape.size.exact, lowest=0, highest=1)')
+
+def _experiment(definition, **system):
+    saved = dict(_context.__dict__)
+    try:
+        cfg = { 'definition': definition }
+        cfg.update(system)
+        return Experiment({
+            'random_seed': 12345,
+            'monitor': MonitorBase(),
+            'landscape': { 'class': OneMax, 'parameters': 10, 'random_seed': 1 },
+            'system': cfg,
+        }).system
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def test_public_names():
+    for cls in SPECIES:
+        yield check_public_names, cls
+
+def check_public_names(cls):
+    if cls.public_names is not None:
+        inst = cls({ }, None)
+        assert set(cls.public_names) == set(inst.public_context), "public_names does not match public_context"
+
+def test_registry():
+    names = registry()
+    assert names['random_binary'] is BinarySpecies, "Incorrect class for random_binary"
+    assert names['Binary'] is BinarySpecies, "Incorrect class for Binary"
+    assert names['random_real_binary'] is BinaryRealSpecies, "Incorrect class for random_real_binary"
+    assert names['random_int'] is IntegerSpecies, "Incorrect class for random_int"
+
+def test_lazy_species():
+    system = _experiment(DEFINITION)
+    assert list(system._species) == [BinarySpecies], "Unused species were created"  #pylint: disable=W0212
+    
+    system = _experiment(INTEGER_DEFINITION)
+    assert list(system._species) == [IntegerSpecies], "Unused species were created"     #pylint: disable=W0212
+    
+    system = _experiment(INTEGER_DEFINITION.replace('random_int', 'suitable_individuals'),
+                         suitable_individuals=lambda **kwargs: None)
+    assert not system._species, "Unused species were created"  #pylint: disable=W0212
+    assert system._context['random_real'].__self__.name == 'Real', "Lookup did not create species"  #pylint: disable=W0212
+
+def test_lazy_species_override():
+    random_binary = lambda **kwargs: None
+    system = _experiment(DEFINITION.replace('random_binary', 'binary_zero'), random_binary=random_binary)
+    assert BinarySpecies in system._species, "Species was not created"    #pylint: disable=W0212
+    assert system._context['random_binary'] is random_binary, "Configured value was replaced"  #pylint: disable=W0212
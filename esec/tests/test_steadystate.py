@@ -0,0 +1,84 @@
+import tests
+import threading
+from esec.context import _context
+from esec.experiment import Experiment
+from esec.landscape.binary import OneMax
+from test_pool import RecordingMonitor
+
+DEFINITION = r'''
+FROM random_binary(length=config.landscape.size.exact) SELECT 10 population
+YIELD population
+
+BEGIN generation
+    REPEAT (10)
+        FROM population SELECT 2 parents USING binary_tournament
+        FROM parents    SELECT 1 offspring USING crossover_one(per_pair_rate=0.9), mutate_bitflip(per_gene_rate=0.1)
+        insert_async(offspring=offspring, into=population, in_flight=4, replace=worst)
+    END REPEAT
+    YIELD population
+END generation
+'''
+
+class FailingOneMax(OneMax):
+    def _eval(self, indiv):
+        if indiv.birthday > 25:
+            raise ValueError('Evaluation failed')
+        return super(FailingOneMax, self)._eval(indiv)
+
+def _run(workers=None, landscape=OneMax):
+    saved = dict(_context.__dict__)
+    try:
+        system = { 'definition': DEFINITION }
+        if workers is not None:
+            system['evaluator_pool'] = { 'workers': workers }
+        monitor = RecordingMonitor(10)
+        Experiment({
+            'random_seed': 12345,
+            'monitor': monitor,
+            'landscape': { 'class': landscape, 'parameters': 30, 'random_seed': 1 },
+            'system': system,
+        }).run()
+        return monitor
+    finally:
+        _context.__dict__.clear()
+        _context.__dict__.update(saved)
+
+def _check(monitor):
+    assert not monitor.exceptions, "Exceptions occurred"
+    assert len(monitor.populations) == 11, "Incorrect number of steps"
+    assert all(len(p) == 10 for p in monitor.populations), "Population size changed"
+    best = [max(f for _, f in p) for p in monitor.populations]
+    print best
+    assert best == sorted(best), "Best individual was replaced"
+
+def test_insert_serial():
+    monitor = _run()
+    _check(monitor)
+    assert monitor.evals['global_evals'] == 110, "Incorrect number of evaluations"
+    assert 'global_async_evals' not in monitor.evals, "Offspring were evaluated asynchronously"
+
+def test_insert_async():
+    monitor = _run(workers=2)
+    _check(monitor)
+    print monitor.evals
+    # Offspring still in flight at the end of the run are evaluated
+    # when the system is closed
+    assert monitor.evals['global_evals'] == 110, "Incorrect number of evaluations"
+    assert monitor.evals['global_async_evals'] == 100, "Offspring were not evaluated asynchronously"
+    assert monitor.evals['local_async_time'] > 0, "Elapsed time was not recorded"
+    for key in ('async_time', 'async_capacity', 'async_busy'):
+        assert monitor.evals['global_' + key] == monitor.evals['local_' + key], "Incorrect global %s" % key
+
+def test_insert_async_exception():
+    result = [ ]
+    # The run is made in another thread so that a failure to collect the
+    # exception is detected rather than waiting forever.
+    thread = threading.Thread(target=lambda: result.append(_run(workers=2, landscape=FailingOneMax)))
+    thread.daemon = True
+    thread.start()
+    thread.join(60)
+    assert not thread.is_alive(), "Run did not complete after an evaluation failed"
+    monitor = result[0]
+    print monitor.exceptions
+    assert monitor.exceptions, "Exception was not reported"
+    assert all('Evaluation failed' in str(ex) for ex in monitor.exceptions), "Incorrect exception reported"